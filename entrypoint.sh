@@ -1,9 +1,13 @@
 #!/bin/bash
 set -e
 
+startup_options=()
+
 if [[ $HOME_ASSISTANT_BUILD ]]; then
     echo "Configuring env variables for Home Assistant Supervisor"
     export DATABASE_URL=sqlite:////data/db.sqlite3
+    export SNAPSHOTS_DIR=/data/snapshots
+    export RENDER_CACHE_DIR=/tmp/render_cache
     export ALLOWED_HOSTS='*'
 
     get_option() {
@@ -13,16 +17,12 @@ if [[ $HOME_ASSISTANT_BUILD ]]; then
     export OPENROUTER_API_KEY="$(get_option "openrouter_api_key")"
     export OPENROUTER_TEXT_MODEL="$(get_option "openrouter_text_model")"
     export HOME_ASSISTANT_INGRESS_ENABLED=true
-fi
 
-django-admin migrate --noinput
-
-if [[ $HOME_ASSISTANT_BUILD ]]; then
-    fixture_file=/share/dailyword.json
-    if [[ -r $fixture_file ]]; then
-        echo "Loading data from $fixture_file"
-        django-admin loaddata --format=json - <"$fixture_file"
-    fi
+    # Data files are loaded only once, based on their content
+    for fixture_file in /share/dailyword.json /share/dailyword.ndjson /share/dailyword.csv; do
+        startup_options+=(--fixture "$fixture_file")
+    done
 fi
 
-exec "$@"
+# Migrate and load data (only when needed) within a single Django boot, then run the server
+exec django-admin startup "${startup_options[@]}" -- "$@"
@@ -0,0 +1,70 @@
+"""
+WSGI dispatch of the stateless public endpoints (images, health checks) to a minimal middleware stack.
+
+These views use neither the session, nor the user, nor CSRF protection, nor messages, and their responses aren't worth
+compressing: they skip all that and only go through `FAST_PATH_MIDDLEWARE`. Every other request goes through the
+complete `MIDDLEWARE`.
+"""
+
+from functools import lru_cache
+
+import django
+from django.conf import settings
+from django.core.handlers import base
+from django.core.handlers.wsgi import WSGIHandler
+from django.urls import Resolver404, resolve
+
+# Names of the URL patterns served by the fast path
+FAST_PATH_VIEWS = {"home", "dailyword:ready", "dailyword:day-image"}
+
+
+class _FastPathSettings:
+    """The settings, with FAST_PATH_MIDDLEWARE as MIDDLEWARE."""
+
+    def __getattr__(self, name: str):
+        if name == "MIDDLEWARE":
+            return settings.FAST_PATH_MIDDLEWARE
+        return getattr(settings, name)
+
+
+class FastPathHandler(WSGIHandler):
+    """WSGI handler running only FAST_PATH_MIDDLEWARE."""
+
+    def load_middleware(self, is_async=False):
+        """Django's load_middleware(), reading FAST_PATH_MIDDLEWARE instead of MIDDLEWARE."""
+        # Only seen by django.core.handlers.base, while the chain is built: when the application is loaded, before
+        # serving any request
+        base.settings = _FastPathSettings()
+        try:
+            super().load_middleware(is_async)
+        finally:
+            base.settings = settings
+
+
+class FastPathDispatcher:
+    """WSGI application sending the requests of FAST_PATH_VIEWS to a FastPathHandler, the others to a WSGIHandler."""
+
+    def __init__(self) -> None:
+        self.application = WSGIHandler()
+        self.fast_path_application = FastPathHandler()
+
+    def __call__(self, environ, start_response):
+        if is_fast_path(environ.get("PATH_INFO", "")):
+            return self.fast_path_application(environ, start_response)
+        return self.application(environ, start_response)
+
+
+# Displays request the same few paths over and over
+@lru_cache(maxsize=1024)
+def is_fast_path(path: str) -> bool:
+    try:
+        match = resolve(path)
+    except Resolver404:
+        return False
+    return match.view_name in FAST_PATH_VIEWS
+
+
+def get_wsgi_application() -> FastPathDispatcher:
+    """Same as Django's get_wsgi_application(), with the fast path."""
+    django.setup(set_prefix=False)
+    return FastPathDispatcher()
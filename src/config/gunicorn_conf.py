@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration, see https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import os
+import shutil
+import tempfile
+
+# Import Django once in the master process, workers inherit it when forked
+preload_app = True
+
+# Workers write their metrics in a directory of their own, so that /metrics/ shows the sum over all of them
+_metrics_dir = None
+if "METRICS_DIR" not in os.environ:
+    _metrics_dir = os.environ["METRICS_DIR"] = tempfile.mkdtemp(
+        prefix="dailyword-metrics-"
+    )
+
+
+def when_ready(server):
+    # Fonts and Pillow plugins loaded here are shared by all the workers
+    from dailyword.warmup import warm_up_rendering  # noqa: PLC0415
+
+    warm_up_rendering()
+
+
+def post_worker_init(worker):
+    # Database access must not be shared between processes, so it's warmed up in each worker before it accepts requests
+    from dailyword.warmup import warm_up  # noqa: PLC0415
+
+    try:
+        warm_up()
+    except Exception:
+        # Failing here would stop gunicorn altogether: /ready/ retries the warm-up once the database is available
+        worker.log.exception("Warm-up failed, left to /ready/")
+
+
+def on_exit(server):
+    if _metrics_dir:
+        shutil.rmtree(_metrics_dir, ignore_errors=True)
@@ -54,9 +54,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "dailyword.middleware.ProfilingMiddleware",
+    "dailyword.middleware.ServerTimingMiddleware",
+    "dailyword.middleware.MetricsMiddleware",
+    "dailyword.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
-    "django.middleware.gzip.GZipMiddleware",
+    "dailyword.middleware.CompressionMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -65,6 +69,15 @@ MIDDLEWARE = [
     "dailyword.middleware.IngressMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
+# Middleware of the stateless public endpoints, served by a lighter stack (see config.fast_path)
+FAST_PATH_MIDDLEWARE = [
+    "dailyword.middleware.ProfilingMiddleware",
+    "dailyword.middleware.ServerTimingMiddleware",
+    "dailyword.middleware.MetricsMiddleware",
+    "dailyword.middleware.QueryBudgetMiddleware",
+    "django.middleware.security.SecurityMiddleware",
+    "django.middleware.common.CommonMiddleware",
+]
 
 HOME_ASSISTANT_INGRESS_ENABLED = env.bool(
     "HOME_ASSISTANT_INGRESS_ENABLED", default=False
@@ -196,6 +209,34 @@ else:
 CACHES = {
     "default": env.dj_cache_url("CACHE_URL", default="locmem://"),
 }
+# Rendered images kept in the memory of each process, in bytes, in front of the default cache (see dailyword.render_cache)
+RENDER_CACHE_MEMORY_BYTES = env.int(
+    "RENDER_CACHE_MEMORY_BYTES", default=32 * 1024 * 1024
+)
+# Directory caching the rendered images for all the processes of the host, useful without a shared CACHE_URL
+RENDER_CACHE_DIR = env.path("RENDER_CACHE_DIR", default=None)
+# While the database fails, the last images and words keep being served for this long (see dailyword.caching)
+STALE_GRACE_SECONDS = env.int("STALE_GRACE_SECONDS", default=60 * 60)
+# Requests per minute allowed to each client of the image endpoint, 0 for no limit (see dailyword.throttling)
+IMAGE_RATE_LIMIT_PER_MINUTE = env.int("IMAGE_RATE_LIMIT_PER_MINUTE", default=0)
+# Addresses of the reverse proxies whose X-Forwarded-For header gives the address of the client, for the rate limiting
+TRUSTED_PROXIES = env.list("TRUSTED_PROXIES", default=[])
+# Renders in progress or queued in a process above which the image endpoint sheds the requests needing one
+RENDER_QUEUE_LIMIT = env.int("RENDER_QUEUE_LIMIT", default=8)
+
+
+# Render today's images of every dictionary when a worker starts
+WARMUP_RENDER_IMAGES = env.bool("WARMUP_RENDER_IMAGES", default=False)
+
+
+# Directory of the compiled dictionaries, to serve images without the database (see dailyword.snapshots)
+SNAPSHOTS_DIR = env.path("SNAPSHOTS_DIR", default=None)
+
+
+# Metrics at /metrics/, for staff users and these addresses
+METRICS_ALLOWED_IPS = env.list("METRICS_ALLOWED_IPS", default=["127.0.0.1", "::1"])
+# Directory where each process writes its metrics, to aggregate them across gunicorn workers (set by config.gunicorn_conf)
+METRICS_DIR = env.path("METRICS_DIR", default=None)
 
 
 # OpenRouter API configuration
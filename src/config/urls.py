@@ -3,11 +3,17 @@ URL Configuration for dailyword project.
 """
 
 from django.contrib import admin
+from django.db import transaction
 from django.http import HttpResponse
 from django.urls import include, path
 
 urlpatterns = [
-    path("", lambda request: HttpResponse(), name="home"),
+    # Health check, polled by Docker: without a transaction, as it doesn't touch the database
+    path(
+        "",
+        transaction.non_atomic_requests(lambda request: HttpResponse()),
+        name="home",
+    ),
     path("admin/", admin.site.urls),
     path("", include("dailyword.urls")),
 ]
@@ -1,10 +1,34 @@
-from datetime import date
+import base64
+from datetime import date, timedelta
 
+from django import forms
 from django.contrib import admin
-from django.urls import reverse
+from django.contrib.admin import helpers
+from django.core.exceptions import PermissionDenied
+from django.db.models import Count
+from django.http import HttpResponse, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
 from django.utils.html import format_html
 
-from .models import Dictionary, Word
+from . import caching, profiling
+from .admin_changelist import EstimatedCountPaginator, KeysetChangeList
+from .jobs import enqueue_generation
+from .models import (
+    RANDOM_SEARCH_DAYS,
+    Dictionary,
+    GenerationJob,
+    RequestProfile,
+    Word,
+)
+from .search import word_search_filter
+
+# Upcoming words shown by the calendar of a dictionary
+CALENDAR_DAYS = 14
+CALENDAR_DAY_CHOICES = [7, 14, 30, 60]
+MAX_CALENDAR_DAYS = 90
+CALENDAR_THUMBNAIL_SIZE = (256, 128)
 
 
 class TimestampedAdmin(admin.ModelAdmin):
@@ -22,6 +46,15 @@ class TimestampedAdmin(admin.ModelAdmin):
         return fieldsets
 
 
+class GenerateWordsForm(forms.Form):
+    count = forms.IntegerField(
+        min_value=1,
+        max_value=100,
+        initial=10,
+        help_text="Number of words to generate for each dictionary",
+    )
+
+
 @admin.register(Dictionary)
 class DictionaryAdmin(TimestampedAdmin):
     list_display = [
@@ -31,6 +64,7 @@ class DictionaryAdmin(TimestampedAdmin):
     ]
     search_fields = ["name", "prompt"]
     prepopulated_fields = {"slug": ("name",)}
+    actions = ["generate_words"]
     readonly_fields = [
         "created_at",
         "updated_at",
@@ -41,13 +75,20 @@ class DictionaryAdmin(TimestampedAdmin):
         "name",
         "slug",
         "prompt",
+        "selection",
         "word_count",
         "todays_image",
     )
 
-    @admin.display(description=Word._meta.verbose_name_plural)
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(_word_count=Count("words"))
+
+    @admin.display(description=Word._meta.verbose_name_plural, ordering="_word_count")
     def word_count(self, obj: Dictionary):
-        count = obj.words.count()
+        # The annotation is missing on instances not coming from get_queryset()
+        count = getattr(obj, "_word_count", None)
+        if count is None:
+            count = obj.words.count()
         url = (
             reverse("admin:dailyword_word_changelist")
             + f"?dictionary__id__exact={obj.pk}"
@@ -56,7 +97,11 @@ class DictionaryAdmin(TimestampedAdmin):
 
     @admin.display(description="Today's Word")
     def todays_image(self, obj: Dictionary):
-        if not obj.pk or not (word := obj.get_word_for_date(date.today())):
+        if not obj.pk:
+            return "-"
+        # Shared with the image endpoint, which serves the image from its cache
+        word = caching.get_daily_words(obj.slug, date.today()).word
+        if word is None:
             return "-"
 
         word_url = reverse("admin:dailyword_word_change", args=[word.pk])
@@ -75,6 +120,127 @@ class DictionaryAdmin(TimestampedAdmin):
             word.word,
         )
 
+    @admin.action(description="Generate words with AI")
+    def generate_words(self, request, queryset):
+        if "apply" in request.POST:
+            form = GenerateWordsForm(request.POST)
+            if form.is_valid():
+                for dictionary in queryset:
+                    enqueue_generation(dictionary, form.cleaned_data["count"])
+                self.message_user(
+                    request,
+                    format_html(
+                        'Queued {} generation job(s). <a href="{}">Follow their progress</a>.',
+                        len(queryset),
+                        reverse("admin:dailyword_generationjob_changelist"),
+                    ),
+                )
+                return None
+        else:
+            form = GenerateWordsForm()
+
+        return TemplateResponse(
+            request,
+            "admin/dailyword/dictionary/generate_words.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Generate words with AI",
+                "opts": self.opts,
+                "queryset": queryset,
+                "form": form,
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            },
+        )
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/calendar/",
+                self.admin_site.admin_view(self.calendar_view),
+                name="dailyword_dictionary_calendar",
+            ),
+            path(
+                "<path:object_id>/calendar.json",
+                self.admin_site.admin_view(self.calendar_json_view),
+                name="dailyword_dictionary_calendar_json",
+            ),
+            *super().get_urls(),
+        ]
+
+    def _calendar(self, request, object_id) -> tuple[Dictionary, list[date], dict]:
+        """The dictionary, the dates of the requested number of days from today, and the words of these dates."""
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        dictionary = get_object_or_404(Dictionary, pk=object_id)
+        try:
+            days = int(request.GET.get("days", CALENDAR_DAYS))
+        except ValueError:
+            days = CALENDAR_DAYS
+        days = max(1, min(days, MAX_CALENDAR_DAYS))
+
+        today = date.today()
+        dates = [today + timedelta(days=i) for i in range(days)]
+        # With the day before the first one, for its "Yesterday" section
+        words = dictionary.get_words_for_dates([today - timedelta(days=1), *dates])
+        return dictionary, dates, words
+
+    def calendar_view(self, request, object_id):
+        dictionary, dates, words = self._calendar(request, object_id)
+        images = caching.get_word_images(
+            dictionary.slug, dates, words, *CALENDAR_THUMBNAIL_SIZE
+        )
+        rows = [
+            {
+                "date": target_date,
+                "word": words[target_date],
+                "thumbnail": base64.b64encode(images[target_date]).decode()
+                if target_date in images
+                else None,
+            }
+            for target_date in dates
+        ]
+        return TemplateResponse(
+            request,
+            "admin/dailyword/dictionary/calendar.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": f"Upcoming words of {dictionary}",
+                "opts": self.opts,
+                "original": dictionary,
+                "rows": rows,
+                "day_choices": CALENDAR_DAY_CHOICES,
+                "days": len(dates),
+            },
+        )
+
+    def calendar_json_view(self, request, object_id):
+        dictionary, dates, words = self._calendar(request, object_id)
+        return JsonResponse(
+            {
+                "dictionary": dictionary.slug,
+                "days": [
+                    {
+                        "date": target_date.isoformat(),
+                        "word": _word_json(words[target_date]),
+                    }
+                    for target_date in dates
+                ],
+            }
+        )
+
+
+def _word_json(word: Word | None) -> dict | None:
+    if word is None:
+        return None
+    return {
+        "id": word.pk,
+        "word": word.word,
+        "part_of_speech": word.part_of_speech,
+        "pronunciation": word.pronunciation,
+        "definition": word.definition,
+        "example_sentence": word.example_sentence,
+    }
+
 
 @admin.register(Word)
 class WordAdmin(TimestampedAdmin):
@@ -92,8 +258,15 @@ class WordAdmin(TimestampedAdmin):
         "definition",
         "example_sentence",
     ]
-    readonly_fields = ["created_at", "updated_at"]
+    # The full-text index only matches the start of words (see dailyword.search)
+    search_help_text = "Matches the words whose word, definition or example sentence have a word starting with each term"
+    readonly_fields = ["created_at", "updated_at", "next_date"]
     autocomplete_fields = ["dictionary"]
+    list_select_related = ["dictionary"]
+    # Total ordering, matching an index, for the keyset pagination
+    ordering = ["word", "id"]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     fieldsets = (
         (
@@ -102,6 +275,7 @@ class WordAdmin(TimestampedAdmin):
                 "fields": (
                     "dictionary",
                     "word",
+                    "next_date",
                 )
             },
         ),
@@ -117,3 +291,153 @@ class WordAdmin(TimestampedAdmin):
             },
         ),
     )
+
+    @admin.display(description="Next date")
+    def next_date(self, obj: Word):
+        if not obj.pk:
+            return "-"
+        next_date = obj.dictionary.get_next_date_for_word(obj, date.today())
+        if next_date is None:
+            return f"Not in the next {RANDOM_SEARCH_DAYS} days"
+        return next_date
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        search_filter = word_search_filter(search_term)
+        if search_filter is None:
+            return super().get_search_results(request, queryset, search_term)
+        return queryset.filter(search_filter), False
+
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = [
+        "dictionary",
+        "count",
+        "status",
+        "created_count",
+        "skipped_count",
+        "total_tokens",
+        "elapsed",
+        "created_at",
+    ]
+    list_filter = ["status"]
+    list_select_related = ["dictionary"]
+
+    @admin.display(description="elapsed")
+    def elapsed(self, obj: GenerationJob):
+        if obj.elapsed is None:
+            return "-"
+        return f"{obj.elapsed.total_seconds():.1f}s"
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def changelist_view(self, request, extra_context=None):
+        extra_context = {
+            # Keep reloading the page while some job is still in progress
+            "has_active_jobs": GenerationJob.objects.filter(
+                status__in=[
+                    GenerationJob.Status.PENDING,
+                    GenerationJob.Status.RUNNING,
+                ]
+            ).exists(),
+            **(extra_context or {}),
+        }
+        return super().changelist_view(request, extra_context=extra_context)
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = [
+        "path",
+        "method",
+        "status_code",
+        "duration_ms",
+        "requested_by",
+        "created_at",
+        "download",
+    ]
+    list_filter = ["status_code"]
+    search_fields = ["path"]
+    fields = [
+        "method",
+        "path",
+        "status_code",
+        "duration_ms",
+        "requested_by",
+        "created_at",
+        "download",
+        "top_functions",
+    ]
+    readonly_fields = ["duration_ms", "download", "top_functions"]
+
+    @admin.display(description="duration", ordering="duration")
+    def duration_ms(self, obj: RequestProfile):
+        return f"{obj.duration * 1000:.1f} ms"
+
+    @admin.display(description="pstats file")
+    def download(self, obj: RequestProfile):
+        return format_html(
+            '<a href="{}">Download</a>',
+            reverse("admin:dailyword_requestprofile_download", args=[obj.pk]),
+        )
+
+    @admin.display(description="top functions (cumulative time)")
+    def top_functions(self, obj: RequestProfile):
+        return format_html("<pre>{}</pre>", profiling.summary(obj))
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                "token/",
+                self.admin_site.admin_view(self.token_view),
+                name="dailyword_requestprofile_token",
+            ),
+            path(
+                "<path:object_id>/download/",
+                self.admin_site.admin_view(self.download_view),
+                name="dailyword_requestprofile_download",
+            ),
+            *super().get_urls(),
+        ]
+
+    def token_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        return TemplateResponse(
+            request,
+            "admin/dailyword/requestprofile/token.html",
+            {
+                **self.admin_site.each_context(request),
+                "title": "Profiling token",
+                "opts": self.opts,
+                "token": profiling.make_token(request.user),
+                "max_age_minutes": int(profiling.TOKEN_MAX_AGE.total_seconds() // 60),
+                "query_parameter": profiling.QUERY_PARAMETER,
+                "header": profiling.HEADER,
+            },
+        )
+
+    def download_view(self, request, object_id):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        profile = get_object_or_404(RequestProfile, pk=object_id)
+        return HttpResponse(
+            bytes(profile.stats),
+            content_type="application/octet-stream",
+            headers={
+                "Content-Disposition": f'attachment; filename="profile-{profile.pk}.prof"'
+            },
+        )
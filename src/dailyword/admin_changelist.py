@@ -0,0 +1,118 @@
+"""
+Changelist helpers for the admin of big tables, whose cost must not grow with the number of rows.
+"""
+
+from functools import cached_property
+
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.contrib.admin.views.main import ORDER_VAR, ChangeList
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Model, Q
+
+CURSOR_VAR = "after"
+# Below this number of rows, counting them exactly is cheap enough
+ESTIMATE_ABOVE = 10_000
+
+
+def estimated_count(model: type[Model]) -> int | None:
+    """Approximate number of rows of the model's table, from the database statistics."""
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [table],
+            )
+            row = cursor.fetchone()
+            # -1 when the table was never analyzed
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            # SQLite has no cheap statistics, but rows are rarely deleted so the highest id is close
+            cursor.execute(f"SELECT MAX(rowid) FROM {connection.ops.quote_name(table)}")
+            return cursor.fetchone()[0] or 0
+    return None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator counting the rows of big unfiltered tables from the database statistics, instead of COUNT(*)."""
+
+    count_is_estimated = False
+
+    @cached_property
+    def count(self) -> int:
+        if not self.object_list.query.has_filters():
+            estimate = estimated_count(self.object_list.model)
+            if estimate is not None and estimate > ESTIMATE_ABOVE:
+                self.count_is_estimated = True
+                return estimate
+        return super().count
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Changelist paginated with a cursor when sorted by the default ordering: a page starts after the last row of the
+    previous one, so the database doesn't have to skip the rows of the previous pages as with page numbers.
+
+    The admin ordering must be ascending on fields providing a total ordering, for example ["word", "id"].
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = request.GET.get(CURSOR_VAR)
+        self.uses_cursor = False
+        self.next_cursor = None
+        super().__init__(request, *args, **kwargs)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_results(self, request):
+        super().get_results(request)
+        # The links to other filters and orderings start from the first page
+        self.params.pop(CURSOR_VAR, None)
+        self.filter_params.pop(CURSOR_VAR, None)
+
+        if (
+            ORDER_VAR in self.params
+            or (self.show_all and self.can_show_all)
+            or not (self.multi_page or self.cursor)
+        ):
+            return
+        self.uses_cursor = True
+
+        ordering = list(self.model_admin.get_ordering(request))
+        queryset = self.queryset
+        if self.cursor:
+            try:
+                last = (
+                    self.model._default_manager.filter(pk=self.cursor)
+                    .values(*ordering)
+                    .get()
+                )
+            except (ValueError, ValidationError, self.model.DoesNotExist) as e:
+                raise IncorrectLookupParameters from e
+            queryset = queryset.filter(_after(ordering, last))
+
+        self.result_list = queryset[: self.list_per_page]
+        if len(self.result_list) == self.list_per_page:
+            self.next_cursor = self.result_list[self.list_per_page - 1].pk
+
+    @property
+    def first_page_url(self) -> str:
+        return self.get_query_string()
+
+    @property
+    def next_page_url(self) -> str:
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+
+def _after(ordering: list[str], last: dict) -> Q:
+    """Rows after the given one, in the (ascending, total) ordering."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        equal_before = Q(**{name: last[name] for name in ordering[:i]})
+        condition |= equal_before & Q(**{f"{field}__gt": last[field]})
+    return condition
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DailywordConfig(AppConfig):
     name = "dailyword"
+
+    def ready(self) -> None:
+        # Connect the signals invalidating the caches and recompiling the snapshots
+        from . import caching, middleware, search, snapshots  # noqa: F401, PLC0415
+
+        # Migrations rebuilding the words table on SQLite drop the triggers of its full-text index
+        post_migrate.connect(search.restore_sqlite_triggers, sender=self)
@@ -0,0 +1,310 @@
+"""
+Shared cache of today's words of each dictionary, in the default Django cache, and of their rendered images, in the
+render cache (see `dailyword.render_cache`).
+
+The image endpoint and the admin preview both go through it, so the words of a dictionary are looked up once a day
+(in its snapshot if compiled, see `dailyword.snapshots`, otherwise in the database), and each size of its image is
+rendered once a day. All the entries depend on a version that changes whenever a dictionary or a word is saved or
+deleted (see `invalidate()`), so they never outlive the data they were computed from.
+
+The last image of each dictionary and size is also kept regardless of the version and date, for the image endpoint to
+serve it while a background thread renders the current one (stale-while-revalidate, see `get_fresh_or_stale_image()`):
+requests at midnight or just after a change don't wait for a render. While the database fails, the last images and
+words keep being served for `STALE_GRACE_SECONDS`.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import render_cache, snapshots
+from .models import Dictionary, Word
+from .rendering import generate_word_image
+from .timing import timed
+
+TIMEOUT = render_cache.TIMEOUT
+# Unknown slugs are remembered this long (and until a dictionary is created), not to query the database for each of
+# the requests of a misconfigured display or a scanner
+MISSING_TIMEOUT = 60
+# Threads rendering the images of several dates: Pillow releases the GIL while compressing
+RENDER_WORKERS = min(4, os.cpu_count() or 1)
+
+logger = logging.getLogger(__name__)
+
+# Threads refreshing the stale images served meanwhile
+_refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="image-refresh")
+# Keys of the images being refreshed, to refresh each one once
+_refreshing: set[str] = set()
+# Images being rendered by requests
+_rendering = 0
+_refreshing_lock = threading.Lock()
+# Time (monotonic) of the first of the database errors in a row, in this process
+_failing_since: float | None = None
+
+
+class Overloaded(Exception):
+    """Raised instead of rendering an image while RENDER_QUEUE_LIMIT renders are already in progress or queued."""
+
+
+@dataclass(frozen=True)
+class DailyWords:
+    word: Word | None
+    yesterday_word: Word | None
+
+
+def _version() -> str:
+    return render_cache.version()
+
+
+def invalidate() -> None:
+    """Make all the cached words and images stale."""
+    render_cache.new_version()
+
+
+def _within_grace() -> bool:
+    """Whether stale data can be served: the database works, or fails since less than STALE_GRACE_SECONDS."""
+    return (
+        _failing_since is None
+        or time.monotonic() - _failing_since < settings.STALE_GRACE_SECONDS
+    )
+
+
+def get_daily_words(dictionary_slug: str, today: date) -> DailyWords:
+    """
+    Today's and yesterday's words of a dictionary. Raises Dictionary.DoesNotExist for unknown slugs.
+
+    While the database fails, the last words looked up for the dictionary are returned instead, within the grace period.
+    """
+    try:
+        return _get_daily_words(dictionary_slug, today)
+    except DatabaseError:
+        if (last := cache.get(_last_words_key(dictionary_slug))) is not None and (
+            _within_grace()
+        ):
+            return last
+        raise
+
+
+def _get_daily_words(dictionary_slug: str, today: date) -> DailyWords:
+    global _failing_since  # noqa: PLW0603
+
+    version = _version()
+    key = f"dailyword:words:{version}:{dictionary_slug}:{today.isoformat()}"
+    daily_words = cache.get(key)
+    if daily_words is None:
+        missing_key = f"dailyword:missing:{version}:{dictionary_slug}"
+        if cache.get(missing_key):
+            raise Dictionary.DoesNotExist(f"No dictionary {dictionary_slug!r}")
+        yesterday = today - timedelta(days=1)
+        if (snapshot := snapshots.load(dictionary_slug)) is not None:
+            with timed("word"):
+                words = snapshot.get_words_for_dates([today, yesterday])
+        else:
+            try:
+                with timed("dictionary"):
+                    dictionary = Dictionary.objects.get(slug=dictionary_slug)
+                with timed("word"):
+                    words = dictionary.get_words_for_dates([today, yesterday])
+            except Dictionary.DoesNotExist:
+                _failing_since = None
+                cache.set(missing_key, True, MISSING_TIMEOUT)
+                raise
+            except DatabaseError:
+                if _failing_since is None:
+                    _failing_since = time.monotonic()
+                raise
+            _failing_since = None
+        daily_words = DailyWords(words[today], words[yesterday])
+        cache.set_many(
+            {key: daily_words, _last_words_key(dictionary_slug): daily_words}, TIMEOUT
+        )
+    return daily_words
+
+
+def get_word_image(
+    dictionary_slug: str, today: date, width: int, height: int
+) -> render_cache.Image | None:
+    """
+    Today's image of a dictionary, rendered only if it's not already in the cache.
+
+    Returns None if the dictionary has no words, and raises Dictionary.DoesNotExist for unknown slugs.
+    """
+    key = _image_key(_version(), dictionary_slug, today, width, height)
+    with timed("cache"):
+        image_data = render_cache.get(key)
+    if image_data is not None:
+        return image_data
+    return _render(key, dictionary_slug, today, width, height)
+
+
+def get_fresh_or_stale_image(
+    dictionary_slug: str, today: date, width: int, height: int
+) -> tuple[render_cache.Image | None, bool]:
+    """
+    Same as get_word_image(), but serving the last image of the dictionary and size if today's one isn't rendered yet
+    (or if the database fails, within the grace period), while it's rendered in the background.
+
+    Returns the image and whether it's stale. Raises Overloaded instead of rendering when too many renders are queued.
+    """
+    key = _image_key(_version(), dictionary_slug, today, width, height)
+    with timed("cache"):
+        image_data = render_cache.get(key)
+        if image_data is None:
+            last_image_data = render_cache.get(
+                _last_image_key(dictionary_slug, width, height)
+            )
+    if image_data is not None:
+        return image_data, False
+
+    global _rendering  # noqa: PLW0603
+
+    if last_image_data is not None and _within_grace():
+        with _refreshing_lock:
+            # Overloaded: a later request will refresh it
+            schedule = (
+                key not in _refreshing
+                and render_queue_depth() < settings.RENDER_QUEUE_LIMIT
+            )
+            if schedule:
+                _refreshing.add(key)
+        if schedule:
+            _refresher.submit(_refresh, key, dictionary_slug, today, width, height)
+        return last_image_data, True
+
+    with _refreshing_lock:
+        if render_queue_depth() >= settings.RENDER_QUEUE_LIMIT:
+            raise Overloaded
+        _rendering += 1
+    try:
+        return _render(key, dictionary_slug, today, width, height), False
+    finally:
+        with _refreshing_lock:
+            _rendering -= 1
+
+
+def get_cached_image(
+    dictionary_slug: str, today: date, width: int, height: int
+) -> render_cache.Image | None:
+    """Today's image of a dictionary, or the last one, if in the cache: neither renders nor queries the database."""
+    return render_cache.get(
+        _image_key(_version(), dictionary_slug, today, width, height)
+    ) or render_cache.get(_last_image_key(dictionary_slug, width, height))
+
+
+def render_queue_depth() -> int:
+    """Images being rendered by requests or waiting to be refreshed, in this process."""
+    return _rendering + len(_refreshing)
+
+
+def _render(
+    key: str, dictionary_slug: str, today: date, width: int, height: int
+) -> render_cache.Image | None:
+    """Render today's image and cache it, also as the last image of the dictionary and size."""
+    last_key = _last_image_key(dictionary_slug, width, height)
+    try:
+        daily_words = _get_daily_words(dictionary_slug, today)
+    except Dictionary.DoesNotExist:
+        render_cache.delete_many([last_key])
+        raise
+    if daily_words.word is None:
+        render_cache.delete_many([last_key])
+        return None
+    image_data = render_cache.Image(
+        generate_word_image(daily_words.word, width, height, daily_words.yesterday_word)
+    )
+    render_cache.set_many({key: image_data, last_key: image_data})
+    return image_data
+
+
+def _refresh(
+    key: str, dictionary_slug: str, today: date, width: int, height: int
+) -> None:
+    # Worker threads don't go through the request cycle, so connections have to be handled manually
+    close_old_connections()
+    try:
+        _render(key, dictionary_slug, today, width, height)
+    except Dictionary.DoesNotExist:
+        pass
+    except DatabaseError:
+        logger.warning(
+            "Cannot refresh the image of %s, serving the last one", dictionary_slug
+        )
+    finally:
+        with _refreshing_lock:
+            _refreshing.discard(key)
+        close_old_connections()
+
+
+def get_word_images(
+    dictionary_slug: str,
+    dates: list[date],
+    words: dict[date, Word | None],
+    width: int,
+    height: int,
+) -> dict[date, render_cache.Image]:
+    """
+    Images of a dictionary for several dates, rendering the ones not in the cache in parallel.
+
+    `words` are the words of the dates and of the day before each, as returned by `Dictionary.get_words_for_dates()`.
+    Dates without a word have no image.
+    """
+    version = _version()
+    keys = {
+        target_date: _image_key(version, dictionary_slug, target_date, width, height)
+        for target_date in dates
+        if words[target_date] is not None
+    }
+    cached = render_cache.get_many(keys.values())
+    images = {
+        target_date: cached[key] for target_date, key in keys.items() if key in cached
+    }
+
+    missing = [target_date for target_date in keys if target_date not in images]
+    if missing:
+
+        def render(target_date: date) -> render_cache.Image:
+            yesterday_word = words[target_date - timedelta(days=1)]
+            return render_cache.Image(
+                generate_word_image(words[target_date], width, height, yesterday_word)
+            )
+
+        with ThreadPoolExecutor(max_workers=RENDER_WORKERS) as executor:
+            images.update(zip(missing, executor.map(render, missing), strict=True))
+        render_cache.set_many(
+            {keys[target_date]: images[target_date] for target_date in missing}
+        )
+    return images
+
+
+def _image_key(
+    version: str, dictionary_slug: str, target_date: date, width: int, height: int
+) -> str:
+    return f"dailyword:image:{version}:{dictionary_slug}:{target_date.isoformat()}:{width}x{height}"
+
+
+def _last_image_key(dictionary_slug: str, width: int, height: int) -> str:
+    return f"dailyword:image:last:{dictionary_slug}:{width}x{height}"
+
+
+def _last_words_key(dictionary_slug: str) -> str:
+    return f"dailyword:words:last:{dictionary_slug}"
+
+
+@receiver(post_save, sender=Dictionary)
+@receiver(post_delete, sender=Dictionary)
+@receiver(post_save, sender=Word)
+@receiver(post_delete, sender=Word)
+def _invalidate_on_change(**kwargs) -> None:
+    invalidate()
+    # Again once committed, in case another request cached the old data in the meantime
+    transaction.on_commit(invalidate)
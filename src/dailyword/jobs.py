@@ -0,0 +1,90 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Dictionary, GenerationJob, Word
+from .services import OpenRouterService
+
+logger = logging.getLogger(__name__)
+
+# A single worker thread: jobs are executed one at a time, which keeps SQLite writes serialized.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="generation-job")
+
+
+def enqueue_generation(dictionary: Dictionary, count: int) -> GenerationJob:
+    """Create a generation job and hand it over to the worker once the transaction commits."""
+    job = GenerationJob.objects.create(dictionary=dictionary, count=count)
+    transaction.on_commit(lambda: _executor.submit(_run_in_worker, job.pk))
+    return job
+
+
+def fail_orphaned_jobs() -> int:
+    """
+    Mark as failed the jobs left pending or running by a previous server process: they were lost with its worker thread.
+
+    To be called before the server starts, when no job can be running.
+    """
+    return GenerationJob.objects.filter(
+        status__in=[GenerationJob.Status.PENDING, GenerationJob.Status.RUNNING]
+    ).update(
+        status=GenerationJob.Status.FAILED,
+        error="Interrupted by a restart of the server",
+        finished_at=timezone.now(),
+    )
+
+
+def _run_in_worker(job_id: int) -> None:
+    # Worker threads don't go through the request cycle, so connections have to be handled manually
+    close_old_connections()
+    try:
+        run_generation(job_id)
+    finally:
+        close_old_connections()
+
+
+def run_generation(job_id: int) -> None:
+    """Generate the words for a job, recording its progress and results on the job row."""
+    job = GenerationJob.objects.select_related("dictionary").get(pk=job_id)
+    jobs = GenerationJob.objects.filter(pk=job_id)
+    jobs.update(status=GenerationJob.Status.RUNNING, started_at=timezone.now())
+
+    try:
+        service = OpenRouterService()
+        try:
+            word_definitions = service.generate_word_list(
+                prompt=job.dictionary.prompt,
+                count=job.count,
+            )
+        finally:
+            jobs.update(total_tokens=service.total_tokens)
+
+        # A single transaction, so that the snapshot of the dictionary is compiled once for all the words
+        with transaction.atomic():
+            for wd in word_definitions:
+                _, created = Word.objects.get_or_create(
+                    dictionary=job.dictionary,
+                    word=wd.word,
+                    defaults={
+                        "definition": wd.definition,
+                        "example_sentence": wd.example_sentence,
+                        "pronunciation": wd.pronunciation,
+                        "part_of_speech": wd.part_of_speech,
+                    },
+                )
+                if created:
+                    jobs.update(created_count=F("created_count") + 1)
+                else:
+                    jobs.update(skipped_count=F("skipped_count") + 1)
+    except Exception as e:
+        logger.exception("Generation job %s failed", job_id)
+        jobs.update(
+            status=GenerationJob.Status.FAILED,
+            error=str(e),
+            finished_at=timezone.now(),
+        )
+        return
+
+    jobs.update(status=GenerationJob.Status.DONE, finished_at=timezone.now())
@@ -0,0 +1,102 @@
+import statistics
+import time
+from contextlib import nullcontext
+from typing import Annotated
+from unittest.mock import patch
+
+import typer
+from django.conf import settings
+from django.core.files.storage import storages
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings
+from django_typer.management import TyperCommand
+
+from dailyword.middleware import HA_SUPERVISOR_IP
+
+INGRESS_HEADERS = {
+    "REMOTE_ADDR": HA_SUPERVISOR_IP,
+    "HTTP_X_INGRESS_PATH": "/api/hassio_ingress/benchmark",
+    "HTTP_X_REMOTE_USER_NAME": "benchmark",
+    "HTTP_X_REMOTE_USER_DISPLAY_NAME": "Benchmark",
+}
+
+
+class Command(TyperCommand):
+    help = "Measure the time spent rendering an admin changelist under Home Assistant Ingress, with and without the memoized static URLs"
+
+    def handle(
+        self,
+        requests_count: Annotated[
+            int, typer.Option("--requests", help="Requests per case", min=1)
+        ] = 200,
+        path: Annotated[
+            str, typer.Option(help="Admin page to request")
+        ] = "/admin/dailyword/word/",
+    ):
+        storage = storages["staticfiles"]
+        if not storage.manifest_hash:
+            raise CommandError("No static files manifest, run collectstatic first")
+
+        client = Client()
+        url = storage.url
+        url_times = []
+
+        def timed_url(name, force=False):
+            start = time.perf_counter()
+            try:
+                return url(name, force)
+            finally:
+                url_times.append(time.perf_counter() - start)
+
+        cases = {"memoized": nullcontext, "uncached": storage.unmemoized_urls}
+        results = {name: ([], []) for name in cases}
+        # The ingress user and its session are rolled back
+        with (
+            transaction.atomic(),
+            override_settings(
+                DEBUG=False,
+                HOME_ASSISTANT_INGRESS_ENABLED=True,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ),
+            patch.object(storage, "url", timed_url),
+        ):
+            _get(client, path)
+            # Alternated, so that both cases suffer the same noise
+            for _ in range(requests_count):
+                for name, url_mode in cases.items():
+                    url_times.clear()
+                    with url_mode():
+                        page_time = _get(client, path)
+                    results[name][0].append(page_time)
+                    results[name][1].append(sum(url_times))
+            transaction.set_rollback(True)
+
+        self.secho(f"{path}: {len(url_times)} static URLs per page")
+        for name, (page_times, static_times) in results.items():
+            self.secho(
+                f"{name:<10} {statistics.median(page_times) * 1e3:8.2f} ms median per page"
+                f" {_p99(page_times) * 1e3:8.2f} ms p99"
+                f" {statistics.median(static_times) * 1e6:8.1f} us median in static URLs"
+            )
+        saved = statistics.median(results["uncached"][1]) - statistics.median(
+            results["memoized"][1]
+        )
+        self.secho(
+            f"{'saved':<10} {saved * 1e6:8.1f} us per page", fg=typer.colors.GREEN
+        )
+
+
+def _get(client: Client, path: str) -> float:
+    """Time to render the page, in seconds."""
+    start = time.perf_counter()
+    response = client.get(path, **INGRESS_HEADERS)
+    elapsed = time.perf_counter() - start
+    if response.status_code != 200:
+        raise CommandError(f"{path} answered {response.status_code}")
+    return elapsed
+
+
+def _p99(times: list[float]) -> float:
+    return statistics.quantiles(times, n=100)[-1] if len(times) > 1 else times[0]
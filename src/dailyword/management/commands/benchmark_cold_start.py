@@ -0,0 +1,123 @@
+import json
+import statistics
+import subprocess
+import sys
+import time
+from typing import Annotated
+
+import typer
+from django.core.management.base import CommandError
+from django_typer.management import TyperCommand
+
+# Runs in a fresh interpreter, reporting when each phase ended (perf_counter is system-wide, so comparable with the parent's)
+CHILD_SCRIPT = """
+import io, json, sys, time
+marks = {}
+import django, django.core.wsgi
+marks["interpreter_and_imports"] = time.perf_counter()
+django.setup(set_prefix=False)
+marks["app_registry"] = time.perf_counter()
+from config.wsgi import application
+marks["wsgi_handler"] = time.perf_counter()
+from dailyword.models import Word
+from dailyword.rendering import generate_word_image
+generate_word_image(Word(word="Cold", definition="Having a low temperature.", example_sentence="A cold start."), 512, 256)
+marks["first_render"] = time.perf_counter()
+if sys.argv[1]:
+    environ = {
+        "REQUEST_METHOD": "GET", "PATH_INFO": f"/{sys.argv[1]}/512x256/", "SERVER_NAME": "localhost", "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost", "wsgi.input": io.BytesIO(), "wsgi.url_scheme": "http", "wsgi.errors": sys.stderr,
+    }
+    statuses = []
+    b"".join(application(environ, lambda status, headers: statuses.append(status)))
+    if not statuses[0].startswith("200"):
+        raise SystemExit(f"First request failed: {statuses[0]}")
+    marks["first_request"] = time.perf_counter()
+print(json.dumps(marks))
+"""
+
+
+class Command(TyperCommand):
+    help = "Measure the time from process start to the first served image, in fresh interpreters"
+
+    def handle(
+        self,
+        runs: Annotated[
+            int, typer.Option(help="Number of processes to start", min=1)
+        ] = 5,
+        dictionary: Annotated[
+            str,
+            typer.Option(
+                help="Slug of a dictionary to request an image from (needs a database), otherwise only rendering is measured"
+            ),
+        ] = "",
+        max_total: Annotated[
+            float,
+            typer.Option(help="Fail if the median total time exceeds it (seconds)"),
+        ] = 0,
+        top: Annotated[
+            int, typer.Option(help="Number of slowest imports to show")
+        ] = 10,
+    ):
+        phases: dict[str, list[float]] = {}
+        imports: dict[str, list[int]] = {}
+        for _ in range(runs):
+            run_phases, run_imports = self._run(dictionary)
+            for phase, duration in run_phases.items():
+                phases.setdefault(phase, []).append(duration)
+            for module, cumulative in run_imports.items():
+                imports.setdefault(module, []).append(cumulative)
+
+        self.secho(f"Median over {runs} runs:")
+        for phase, durations in phases.items():
+            self.secho(f"  {phase:<24} {statistics.median(durations) * 1000:8.1f} ms")
+
+        self.secho("\nSlowest top-level imports (cumulative, -X importtime):")
+        slowest = sorted(
+            imports.items(), key=lambda item: statistics.median(item[1]), reverse=True
+        )
+        for module, cumulative in slowest[:top]:
+            self.secho(f"  {module:<40} {statistics.median(cumulative) / 1000:8.1f} ms")
+
+        total = statistics.median(phases["total"])
+        if max_total and total > max_total:
+            raise CommandError(
+                f"Cold start takes {total:.2f}s, more than the {max_total:.2f}s allowed"
+            )
+
+    def _run(self, dictionary: str) -> tuple[dict[str, float], dict[str, int]]:
+        """Start a process, returning the duration of each phase and the cumulative time of the top-level imports (µs)."""
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", CHILD_SCRIPT, dictionary],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        end = time.perf_counter()
+        if result.returncode:
+            raise CommandError(f"Benchmark process failed:\n{result.stderr[-2000:]}")
+
+        marks = json.loads(result.stdout.splitlines()[-1])
+        phases = {}
+        previous = start
+        for phase, mark in marks.items():
+            phases[phase] = mark - previous
+            previous = mark
+        # The first phase includes the interpreter start, since it's timed from the parent's clock
+        phases["total"] = previous - start
+        phases["process_exit"] = end - previous
+
+        return phases, _parse_importtime(result.stderr)
+
+
+def _parse_importtime(output: str) -> dict[str, int]:
+    """Extract the top-level imports from the output of -X importtime."""
+    imports = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, module = line.removeprefix("import time:").split("|")
+        if cumulative.strip().isdigit() and not module.startswith("  "):
+            imports[module.strip()] = int(cumulative)
+    return imports
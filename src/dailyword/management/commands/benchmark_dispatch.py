@@ -0,0 +1,91 @@
+import io
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from typing import Annotated
+
+import typer
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django_typer.management import TyperCommand
+
+from config.fast_path import FastPathDispatcher
+
+
+class Command(TyperCommand):
+    help = "Measure the time spent serving requests in process, through the complete middleware and the fast path"
+
+    def handle(
+        self,
+        requests_count: Annotated[
+            int, typer.Option("--requests", help="Requests per case", min=1)
+        ] = 2000,
+        dictionary: Annotated[
+            str,
+            typer.Option(
+                help="Slug of a dictionary to request images from (needs a database), otherwise only health checks"
+            ),
+        ] = "",
+    ):
+        paths = ["/", "/ready/"]
+        if dictionary:
+            paths.append(f"/{dictionary}/512x256/")
+
+        applications = {
+            "complete": WSGIHandler(),
+            "fast path": FastPathDispatcher(),
+        }
+        # All the requests come from the same client
+        with override_settings(IMAGE_RATE_LIMIT_PER_MINUTE=0):
+            for path in paths:
+                results = {
+                    name: _measure(application, path, requests_count)
+                    for name, application in applications.items()
+                }
+                for name, (median, p99) in results.items():
+                    self.secho(
+                        f"{path:<32} {name:<10} {median:8.1f} us median {p99:8.1f} us p99"
+                    )
+                saved = results["complete"][0] - results["fast path"][0]
+                self.secho(
+                    f"{path:<32} {'saved':<10} {saved:8.1f} us per request",
+                    fg=typer.colors.GREEN,
+                )
+
+
+def _measure(
+    application: Callable, path: str, requests_count: int
+) -> tuple[float, float]:
+    """Median and 99th percentile of the time to serve the path, in microseconds, after a first request."""
+    times = []
+    statuses = []
+    for _ in range(requests_count + 1):
+        environ = {
+            "REQUEST_METHOD": "GET",
+            "PATH_INFO": path,
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "HTTP_HOST": "localhost",
+            "REMOTE_ADDR": "127.0.0.1",
+            "wsgi.input": io.BytesIO(),
+            "wsgi.url_scheme": "http",
+            "wsgi.errors": sys.stderr,
+        }
+        start = time.perf_counter()
+        response = application(environ, lambda status, headers: statuses.append(status))
+        b"".join(response)
+        # Like WSGI servers do, sending the request_finished signal
+        response.close()
+        times.append(time.perf_counter() - start)
+        if not statuses[-1].startswith("200"):
+            raise CommandError(f"{path} answered {statuses[-1]}")
+
+    times = times[1:]
+    return (
+        statistics.median(times) * 1e6,
+        statistics.quantiles(times, n=100)[-1] * 1e6
+        if len(times) > 1
+        else times[0] * 1e6,
+    )
@@ -0,0 +1,184 @@
+import itertools
+import json
+import statistics
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from django.core.management.base import CommandError
+from django_typer.management import TyperCommand
+
+from dailyword.models import Word
+from dailyword.rendering import generate_error_image, generate_word_image
+
+SIZES = [
+    (100, 100),
+    (512, 256),
+    (800, 600),
+    (1920, 1080),
+    (4096, 4096),
+]
+
+DEFINITIONS = {
+    "short": "Brief.",
+    "medium": "Lasting for a very short time, especially when compared to what was expected.",
+    "paragraph": (
+        "Something that exists or lasts only for a very short period of time, often used to describe "
+        "experiences, feelings or natural phenomena that disappear quickly and cannot be held on to. "
+        "The word is frequently applied to art forms designed to be temporary, to fashions that come "
+        "and go within a season, and to the fleeting moments of beauty that make life memorable, "
+        "such as the blooming of cherry blossoms or the colors of a sunset over the sea."
+    ),
+}
+
+EXAMPLE = "The ephemeral beauty of cherry blossoms reminds us to appreciate the moment."
+
+YESTERDAY_WORD = Word(
+    word="Serendipity",
+    definition="The occurrence of finding pleasant things by chance.",
+    example_sentence="It was pure serendipity that they met at the cafe.",
+    pronunciation="ser-en-DIP-ih-tee",
+    part_of_speech="noun",
+)
+
+METRICS = ("time_ms", "peak_memory_bytes", "size_bytes")
+# Time differences below this are noise, whatever the relative increase
+NOISE_FLOOR_MS = 1.0
+
+
+class Command(TyperCommand):
+    help = "Benchmark image rendering across sizes and contents, optionally comparing with a baseline"
+
+    def handle(
+        self,
+        repeat: Annotated[
+            int, typer.Option(help="Renders per case, the median time is kept", min=1)
+        ] = 5,
+        size: Annotated[
+            list[str] | None,
+            typer.Option(
+                help="Only benchmark this size, as WIDTHxHEIGHT (can be repeated)"
+            ),
+        ] = None,
+        baseline: Annotated[
+            Path | None,
+            typer.Option(
+                help="JSON baseline to compare the results with", dir_okay=False
+            ),
+        ] = None,
+        save: Annotated[
+            bool,
+            typer.Option("--save", help="Write the results to the baseline file"),
+        ] = False,
+        tolerance: Annotated[
+            float,
+            typer.Option(
+                help="Relative increase over the baseline flagged as regression"
+            ),
+        ] = 0.25,
+    ):
+        if save and not baseline:
+            raise CommandError("--save needs --baseline")
+        sizes = [_parse_size(s) for s in size] if size else SIZES
+
+        results = {}
+        for case, render, pixels in _cases(sizes):
+            results[case] = _measure(render, pixels, repeat)
+            self.secho(
+                f"{case:<48} {results[case]['time_ms']:9.2f} ms "
+                f"{results[case]['peak_memory_bytes'] / 1024:10.0f} KiB peak "
+                f"{results[case]['size_bytes'] / 1024:8.1f} KiB PNG"
+            )
+
+        if baseline and save:
+            baseline.write_text(json.dumps({"cases": results}, indent=2) + "\n")
+            self.secho(f"\nBaseline written to {baseline}", fg=typer.colors.GREEN)
+        elif baseline:
+            self._compare(results, json.loads(baseline.read_text())["cases"], tolerance)
+
+    def _compare(self, results: dict, reference: dict, tolerance: float) -> None:
+        regressions = []
+        for case, metrics in results.items():
+            if case not in reference:
+                continue
+            for metric in METRICS:
+                before, after = reference[case][metric], metrics[metric]
+                if metric == "time_ms" and after - before < NOISE_FLOOR_MS:
+                    continue
+                if after > before * (1 + tolerance):
+                    regressions.append(
+                        f"{case} {metric}: {before:.2f} -> {after:.2f} (+{after / before - 1:.0%})"
+                    )
+
+        if regressions:
+            raise CommandError(
+                "Rendering regressions over the baseline:\n" + "\n".join(regressions)
+            )
+        self.secho("\nNo regressions over the baseline", fg=typer.colors.GREEN)
+
+
+def _parse_size(size: str) -> tuple[int, int]:
+    try:
+        width, height = (int(value) for value in size.lower().split("x"))
+    except ValueError as e:
+        raise CommandError(f"Invalid size '{size}', expected WIDTHxHEIGHT") from e
+    return width, height
+
+
+def _cases(sizes: list[tuple[int, int]]):
+    """Yield (case name, render function, number of pixels) for the whole matrix."""
+    for width, height in sizes:
+        for length, with_example, with_yesterday in itertools.product(
+            DEFINITIONS, (True, False), (True, False)
+        ):
+            word = Word(
+                word="Ephemeral",
+                definition=DEFINITIONS[length],
+                example_sentence=EXAMPLE if with_example else "",
+                pronunciation="ih-FEM-er-uhl",
+                part_of_speech="adjective",
+            )
+            yesterday_word = YESTERDAY_WORD if with_yesterday else None
+            case = (
+                f"word {width}x{height} {length}"
+                f"{' +example' if with_example else ''}"
+                f"{' +yesterday' if with_yesterday else ''}"
+            )
+            yield (
+                case,
+                lambda w=word, y=yesterday_word, width=width, height=height: (
+                    generate_word_image(w, width, height, y)
+                ),
+                width * height,
+            )
+
+        yield (
+            f"error {width}x{height}",
+            lambda width=width, height=height: generate_error_image(
+                "Dictionary not found", width, height
+            ),
+            width * height,
+        )
+
+
+def _measure(render: Callable[[], bytes], pixels: int, repeat: int) -> dict:
+    # Pillow allocates the raster (1 byte per pixel in mode "L") outside of Python's allocator, so tracemalloc doesn't see it
+    tracemalloc.start()
+    image_data = render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        render()
+        times.append(time.perf_counter() - start)
+
+    return {
+        "time_ms": statistics.median(times) * 1000,
+        "peak_memory_bytes": peak + pixels,
+        "size_bytes": len(image_data),
+    }
@@ -0,0 +1,56 @@
+import time
+from typing import Annotated
+
+import typer
+from django.conf import settings
+from django.core.management.base import CommandError
+from django_typer.management import TyperCommand
+
+from dailyword import caching, snapshots
+from dailyword.models import Dictionary
+
+
+class Command(TyperCommand):
+    help = "Compile the dictionaries to the snapshots read by the image endpoint, in SNAPSHOTS_DIR"
+
+    def handle(
+        self,
+        dictionary: Annotated[
+            list[str] | None,
+            typer.Option(help="Slug of a dictionary to compile (default: all)"),
+        ] = None,
+    ):
+        if not settings.SNAPSHOTS_DIR:
+            raise CommandError("SNAPSHOTS_DIR is not set.")
+
+        dictionaries = Dictionary.objects.all()
+        if dictionary:
+            dictionaries = dictionaries.filter(slug__in=dictionary)
+        dictionaries = list(dictionaries)
+        if dictionary:
+            found = {d.slug for d in dictionaries}
+            if missing := set(dictionary) - found:
+                raise CommandError(
+                    f"Dictionary not found: {', '.join(sorted(missing))}"
+                )
+
+        compiled = 0
+        for d in dictionaries:
+            start = time.perf_counter()
+            if snapshots.compile_dictionary(d):
+                compiled += 1
+                snapshot = snapshots.load(d.slug)
+                self.secho(
+                    f"  {d.slug}: {snapshot.word_count} words in {time.perf_counter() - start:.2f}s",
+                    fg=typer.colors.YELLOW,
+                )
+        removed = snapshots.remove_stale()
+        for slug in removed:
+            self.secho(f"  {slug}: removed", fg=typer.colors.YELLOW)
+        if compiled or removed:
+            caching.invalidate()
+
+        self.secho(
+            f"Compiled {compiled} dictionaries ({len(dictionaries) - compiled} up to date) in {settings.SNAPSHOTS_DIR}",
+            fg=typer.colors.GREEN,
+        )
@@ -0,0 +1,16 @@
+from typing import Annotated
+
+import typer
+from django_typer.management import TyperCommand
+
+from dailyword.throttling import make_device_token
+
+
+class Command(TyperCommand):
+    help = "Make the X-Device-Token header identifying a display to the rate limiting of the image endpoint"
+
+    def handle(
+        self,
+        device: Annotated[str, typer.Argument(help="Name of the display")],
+    ):
+        self.secho(make_device_token(device))
@@ -18,6 +18,12 @@ class Command(TyperCommand):
             str,
             typer.Option(help="URL-friendly slug (auto-generated if not provided)"),
         ] = "",
+        rotation: Annotated[
+            bool,
+            typer.Option(
+                help="Show every word once before repeating any, instead of picking them at random"
+            ),
+        ] = False,
     ):
         # Check if dictionary with same name exists
         if Dictionary.objects.filter(name=name).exists():
@@ -31,6 +37,9 @@ class Command(TyperCommand):
             name=name.strip(),
             slug=slug.strip(),
             prompt=prompt.strip(),
+            selection=Dictionary.Selection.ROTATION
+            if rotation
+            else Dictionary.Selection.RANDOM,
         )
 
         self.secho(
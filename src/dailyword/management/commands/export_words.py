@@ -0,0 +1,61 @@
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from django.core.management.base import CommandError
+from django_typer.management import TyperCommand
+
+from dailyword.models import Dictionary, Word
+from dailyword.wordfiles import FIELDS, WordFileFormat, write_records
+
+
+class Command(TyperCommand):
+    help = "Export words to a NDJSON or CSV file"
+
+    def handle(
+        self,
+        output: Annotated[
+            Path,
+            typer.Argument(help="File to write to, or '-' for the standard output"),
+        ],
+        dictionary: Annotated[
+            list[str] | None,
+            typer.Option(help="Slug of a dictionary to export (default: all)"),
+        ] = None,
+        file_format: Annotated[
+            WordFileFormat | None,
+            typer.Option(
+                "--format", help="File format (default: guessed from the extension)"
+            ),
+        ] = None,
+    ):
+        words = Word.objects.all()
+        if dictionary:
+            found = set(
+                Dictionary.objects.filter(slug__in=dictionary).values_list(
+                    "slug", flat=True
+                )
+            )
+            if missing := set(dictionary) - found:
+                raise CommandError(
+                    f"Dictionary not found: {', '.join(sorted(missing))}"
+                )
+            words = words.filter(dictionary__slug__in=dictionary)
+
+        # Follow the (dictionary, word) unique index, and stream the rows instead of loading them all
+        records = (
+            words.order_by("dictionary_id", "word")
+            .values_list("dictionary__slug", *FIELDS[1:])
+            .iterator(chunk_size=2000)
+        )
+
+        if str(output) == "-":
+            write_records(self.stdout, file_format or WordFileFormat.NDJSON, records)
+            return
+
+        with output.open("w", encoding="utf-8", newline="") as f:
+            count = write_records(
+                f, file_format or WordFileFormat.from_path(output), records
+            )
+
+        self.secho(f"Exported {count} words to {output}", fg=typer.colors.GREEN)
@@ -0,0 +1,119 @@
+import time
+from collections.abc import Iterable
+from itertools import batched
+from pathlib import Path
+from typing import Annotated
+
+import typer
+from django.core.management.base import CommandError
+from django.db import transaction
+from django_typer.management import TyperCommand
+
+from dailyword import caching, snapshots
+from dailyword.models import Dictionary, ImportedFile, Word
+from dailyword.wordfiles import (
+    FIELDS,
+    WordFileError,
+    WordFileFormat,
+    file_hash,
+    read_records,
+)
+
+UPDATE_FIELDS = [*FIELDS[2:], "updated_at"]
+
+
+class Command(TyperCommand):
+    help = "Import words from a NDJSON or CSV file, skipping files already imported"
+
+    def handle(
+        self,
+        path: Annotated[
+            Path, typer.Argument(help="File to import", exists=True, dir_okay=False)
+        ],
+        file_format: Annotated[
+            WordFileFormat | None,
+            typer.Option(
+                "--format", help="File format (default: guessed from the extension)"
+            ),
+        ] = None,
+        batch_size: Annotated[
+            int, typer.Option(help="Number of words written per query", min=1)
+        ] = 1000,
+        force: Annotated[
+            bool,
+            typer.Option("--force", help="Import the file even if already imported"),
+        ] = False,
+    ):
+        content_hash = file_hash(path)
+        if (
+            not force
+            and ImportedFile.objects.filter(content_hash=content_hash).exists()
+        ):
+            self.secho(f"Skipping {path}: already imported", fg=typer.colors.YELLOW)
+            return
+
+        start = time.perf_counter()
+        self._dictionary_ids: dict[str, int] = dict(
+            Dictionary.objects.values_list("slug", "id")
+        )
+
+        self._imported_dictionary_ids: set[int] = set()
+
+        count = 0
+        with path.open(encoding="utf-8", newline="") as f:
+            records = read_records(f, file_format or WordFileFormat.from_path(path))
+            try:
+                for batch in batched(records, batch_size, strict=False):
+                    count += self._import_batch(batch)
+            except WordFileError as e:
+                raise CommandError(f"Failed to import {path}: {e}") from e
+            finally:
+                # Once for the whole file, instead of after each batch
+                snapshots.schedule_compile(self._imported_dictionary_ids)
+
+        ImportedFile.objects.update_or_create(
+            content_hash=content_hash,
+            defaults={"name": path.name, "record_count": count},
+        )
+
+        elapsed = time.perf_counter() - start
+        self.secho(
+            f"Imported {count} words from {path} in {elapsed:.1f}s "
+            f"({count / elapsed if elapsed else 0:.0f} words/s)",
+            fg=typer.colors.GREEN,
+        )
+
+    def _import_batch(self, records: Iterable[dict[str, str]]) -> int:
+        """Upsert a batch of records, deduplicating them on (dictionary, word)."""
+        words: dict[tuple[int, str], Word] = {}
+        for record in records:
+            dictionary_id = self._get_dictionary_id(record["dictionary"])
+            words[dictionary_id, record["word"]] = Word(
+                dictionary_id=dictionary_id,
+                **{field: record[field] for field in FIELDS[1:]},
+            )
+
+        with transaction.atomic():
+            Word.objects.bulk_create(
+                words.values(),
+                update_conflicts=True,
+                unique_fields=["dictionary", "word"],
+                update_fields=UPDATE_FIELDS,
+            )
+        # bulk_create() doesn't send the signals invalidating the cache and recompiling the snapshots
+        caching.invalidate()
+        self._imported_dictionary_ids.update(
+            dictionary_id for dictionary_id, _ in words
+        )
+        return len(words)
+
+    def _get_dictionary_id(self, slug: str) -> int:
+        """Get the ID of a dictionary by slug, creating it if missing."""
+        if slug not in self._dictionary_ids:
+            dictionary, created = Dictionary.objects.get_or_create(
+                slug=slug, defaults={"name": slug}
+            )
+            if created:
+                self.secho(f"  Created dictionary: {slug}", fg=typer.colors.YELLOW)
+            self._dictionary_ids[slug] = dictionary.id
+        return self._dictionary_ids[slug]
@@ -0,0 +1,266 @@
+import os
+import random
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Annotated
+
+import requests
+import typer
+from django.conf import settings
+from django.core.management.base import CommandError
+from django_typer.management import TyperCommand
+
+from dailyword.warmup import STANDARD_SIZES
+from dailyword.wordfiles import WordFileFormat, write_records
+
+
+@dataclass
+class PlannedRequest:
+    path: str
+    conditional: bool
+
+
+@dataclass
+class Result:
+    path: str
+    status: int
+    latency: float
+
+
+class Command(TyperCommand):
+    help = "Load test the image endpoint through gunicorn, against a seeded database"
+
+    def handle(
+        self,
+        requests_count: Annotated[
+            int, typer.Option("--requests", help="Total number of requests", min=1)
+        ] = 1000,
+        concurrency: Annotated[
+            int, typer.Option(help="Number of concurrent clients", min=1)
+        ] = 4,
+        workers: Annotated[int, typer.Option(help="Gunicorn workers", min=1)] = 2,
+        dictionaries: Annotated[
+            int, typer.Option(help="Number of dictionaries to seed", min=1)
+        ] = 5,
+        words: Annotated[
+            int, typer.Option(help="Number of words per dictionary", min=1)
+        ] = 1000,
+        size: Annotated[
+            list[str] | None,
+            typer.Option(
+                help="Image size to request, as WIDTHxHEIGHT (can be repeated)"
+            ),
+        ] = None,
+        miss_ratio: Annotated[
+            float,
+            typer.Option(
+                help="Share of requests for unknown dictionaries", min=0, max=1
+            ),
+        ] = 0.05,
+        conditional_ratio: Annotated[
+            float,
+            typer.Option(
+                help="Share of requests revalidating a previous response (If-None-Match/If-Modified-Since)",
+                min=0,
+                max=1,
+            ),
+        ] = 0.2,
+        database_url: Annotated[
+            str,
+            typer.Option(
+                help="Database to seed and serve from (default: a temporary SQLite database). Seeded dictionaries are named loadtest-N."
+            ),
+        ] = "",
+        seed: Annotated[int, typer.Option(help="Random seed for the traffic mix")] = 0,
+    ):
+        sizes = size or [f"{width}x{height}" for width, height in STANDARD_SIZES]
+
+        with tempfile.TemporaryDirectory(prefix="dailyword-loadtest-") as tmp:
+            src_dir = str(settings.BASE_DIR / "src")
+            env = os.environ | {
+                "DATABASE_URL": database_url or f"sqlite:///{Path(tmp) / 'db.sqlite3'}",
+                "PYTHONPATH": os.pathsep.join(
+                    filter(None, [src_dir, os.environ.get("PYTHONPATH")])
+                ),
+                # All the requests come from this host
+                "IMAGE_RATE_LIMIT_PER_MINUTE": "0",
+            }
+            self._seed(Path(tmp), env, dictionaries, words)
+
+            port = _free_port()
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "config.wsgi:application",
+                    "--config",
+                    "python:config.gunicorn_conf",
+                    "--bind",
+                    f"127.0.0.1:{port}",
+                    "--workers",
+                    str(workers),
+                    "--chdir",
+                    src_dir,
+                ],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                base_url = f"http://127.0.0.1:{port}"
+                _wait_until_ready(base_url, server)
+
+                plan = _plan_requests(
+                    random.Random(seed),
+                    requests_count,
+                    [f"loadtest-{i}" for i in range(dictionaries)],
+                    sizes,
+                    miss_ratio,
+                    conditional_ratio,
+                )
+                self.secho(
+                    f"Sending {requests_count} requests with {concurrency} clients to {workers} workers"
+                )
+                start = time.perf_counter()
+                results = _run(base_url, plan, concurrency)
+                elapsed = time.perf_counter() - start
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+
+        for line in _summarize(results, elapsed):
+            self.secho(line)
+
+    def _seed(self, tmp: Path, env: dict[str, str], dictionaries: int, words: int):
+        """Migrate the database and import the words, in a separate process using the load test database."""
+        seed_file = tmp / "seed.ndjson"
+        with seed_file.open("w", encoding="utf-8") as f:
+            write_records(
+                f,
+                WordFileFormat.NDJSON,
+                (
+                    (
+                        f"loadtest-{d}",
+                        f"word{w}",
+                        f"Definition of the word number {w}, long enough to wrap on small displays.",
+                        f"An example sentence using word{w}.",
+                        f"wurd-{w}",
+                        "noun",
+                    )
+                    for d in range(dictionaries)
+                    for w in range(words)
+                ),
+            )
+
+        self.secho(f"Seeding {dictionaries} dictionaries of {words} words")
+        result = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "django",
+                "startup",
+                f"--fixture={seed_file}",
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode:
+            raise CommandError(f"Failed to seed the database:\n{result.stderr[-2000:]}")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_ready(base_url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise CommandError("Gunicorn exited before being ready")
+        try:
+            if requests.get(f"{base_url}/ready/", timeout=5).status_code == 200:
+                return
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    raise CommandError(f"Gunicorn not ready after {timeout}s")
+
+
+def _plan_requests(
+    rng: random.Random,
+    count: int,
+    slugs: list[str],
+    sizes: list[str],
+    miss_ratio: float,
+    conditional_ratio: float,
+) -> list[PlannedRequest]:
+    plan = []
+    for _ in range(count):
+        if rng.random() < miss_ratio:
+            slug = f"missing-{rng.randrange(1_000_000)}"
+        else:
+            slug = rng.choice(slugs)
+        plan.append(
+            PlannedRequest(
+                path=f"/{slug}/{rng.choice(sizes)}/",
+                conditional=rng.random() < conditional_ratio,
+            )
+        )
+    return plan
+
+
+def _run(base_url: str, plan: list[PlannedRequest], concurrency: int) -> list[Result]:
+    local = threading.local()
+    # Validators of the last response for each path, to build the conditional requests
+    validators: dict[str, dict[str, str]] = {}
+
+    def send(planned: PlannedRequest) -> Result:
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        headers = validators.get(planned.path, {}) if planned.conditional else {}
+        start = time.perf_counter()
+        response = local.session.get(base_url + planned.path, headers=headers)
+        latency = time.perf_counter() - start
+        if response.status_code == 200:
+            validators[planned.path] = {
+                request_header: response.headers[response_header]
+                for response_header, request_header in (
+                    ("ETag", "If-None-Match"),
+                    ("Last-Modified", "If-Modified-Since"),
+                )
+                if response_header in response.headers
+            }
+        return Result(planned.path, response.status_code, latency)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(send, plan))
+
+
+def _summarize(results: list[Result], elapsed: float) -> list[str]:
+    latencies = sorted(result.latency * 1000 for result in results)
+    if len(latencies) > 1:
+        percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        percentiles = latencies * 99
+    statuses = Counter(result.status for result in results)
+    return [
+        f"Requests:   {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s)",
+        f"Latency:    p50 {percentiles[49]:.1f} ms, p95 {percentiles[94]:.1f} ms, p99 {percentiles[98]:.1f} ms, max {latencies[-1]:.1f} ms",
+        "Statuses:   "
+        + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())),
+    ]
@@ -0,0 +1,331 @@
+"""
+Counters and histograms exposed in the Prometheus text format at /metrics/.
+
+Each process keeps its metrics in memory. When `METRICS_DIR` is set (gunicorn sets it, see `config.gunicorn_conf`),
+each process serving requests also writes them every second to its own file in that directory, and the scrape sums
+the files of all the processes, including the counters of the workers that exited since, so that counters never go
+backwards. The files of the exited workers are folded into a single one by the scrapes, so that recycling workers
+doesn't make the directory grow.
+"""
+
+import atexit
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Metric:
+    type: str  # "counter", "gauge" or "histogram"
+    help: str
+    buckets: tuple[float, ...] = ()
+
+
+METRICS = {
+    "dailyword_render_seconds": Metric(
+        "histogram",
+        "Time to render an image, by kind (word or error) and size class",
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+    ),
+    "dailyword_error_images_total": Metric(
+        "counter", "Error images served by the image endpoint, by reason"
+    ),
+    "dailyword_throttled_requests_total": Metric(
+        "counter",
+        "Image requests over the rate limit or shed under load, by reason and response (image or error)",
+    ),
+    "dailyword_font_cache_hits_total": Metric("counter", "Font cache hits"),
+    "dailyword_font_cache_misses_total": Metric("counter", "Font cache misses"),
+    "dailyword_font_cache_size": Metric("gauge", "Fonts loaded, summed over processes"),
+    "dailyword_render_cache_requests_total": Metric(
+        "counter", "Lookups in the render cache, by tier and result (hit or miss)"
+    ),
+    "dailyword_render_cache_memory_bytes": Metric(
+        "gauge",
+        "Bytes of images in the memory tier of the render cache, summed over processes",
+    ),
+    "dailyword_openrouter_request_seconds": Metric(
+        "histogram",
+        "Duration of the OpenRouter API calls, by outcome",
+        (0.5, 1, 2.5, 5, 10, 30, 60, 120),
+    ),
+    "dailyword_openrouter_tokens_total": Metric(
+        "counter", "Tokens used by the OpenRouter API calls"
+    ),
+    "dailyword_db_queries_per_request": Metric(
+        "histogram",
+        "Database queries run by each request",
+        (0, 1, 2, 5, 10, 20, 50, 100),
+    ),
+}
+
+# Delay between two writes of the metrics file of a process
+FLUSH_INTERVAL = 1.0
+# File of METRICS_DIR summing the counters of the exited processes, and the lock of the scrapes updating it
+EXITED_FILE_NAME = "exited.json"
+EXITED_LOCK_NAME = "exited.lock"
+
+type Labels = tuple[tuple[str, str], ...]
+type Key = tuple[str, Labels]
+
+_lock = threading.Lock()
+_flush_lock = threading.Lock()
+# Counters and gauges
+_values: dict[Key, float] = {}
+# Histograms: count per bucket (non cumulative, the last one being +Inf), then sum
+_histograms: dict[Key, list[float]] = {}
+# Functions setting gauges or counters from state owned by other modules, called before exporting
+_collectors: list[Callable[[], None]] = []
+_file_name = ""
+_flusher: threading.Thread | None = None
+
+
+def _key(name: str, labels: dict[str, str]) -> Key:
+    if name not in METRICS:
+        raise KeyError(f"Unknown metric {name}")
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, value: float = 1, **labels: str) -> None:
+    """Increment a counter."""
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + value
+
+
+def set_value(name: str, value: float, **labels: str) -> None:
+    """Set a gauge, or a counter maintained elsewhere (like the hits of an lru_cache)."""
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = value
+
+
+def observe(name: str, value: float, **labels: str) -> None:
+    """Add an observation to a histogram."""
+    key = _key(name, labels)
+    buckets = METRICS[name].buckets
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = [0.0] * (len(buckets) + 2)
+        histogram[bisect.bisect_left(buckets, value)] += 1
+        histogram[-1] += value
+
+
+def register_collector(collector: Callable[[], None]) -> None:
+    _collectors.append(collector)
+
+
+def _serialize(values: dict[Key, float], histograms: dict[Key, list[float]]) -> dict:
+    return {
+        "values": [[name, labels, value] for (name, labels), value in values.items()],
+        "histograms": [
+            [name, labels, list(histogram)]
+            for (name, labels), histogram in histograms.items()
+        ],
+    }
+
+
+def _snapshot() -> dict:
+    for collector in _collectors:
+        collector()
+    with _lock:
+        return _serialize(_values, _histograms)
+
+
+def _write(path: Path, snapshot: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(snapshot))
+    tmp_path.replace(path)
+
+
+def flush() -> None:
+    """Write the metrics of this process to its file in METRICS_DIR."""
+    global _file_name  # noqa: PLW0603
+    if not settings.METRICS_DIR:
+        return
+
+    with _flush_lock:
+        if not _file_name:
+            # Unique even if a pid is reused
+            _file_name = f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        _write(settings.METRICS_DIR / _file_name, _snapshot())
+
+
+def start_flushing() -> None:
+    """Write the metrics of this process every FLUSH_INTERVAL from a background thread, and when it exits."""
+    global _flusher  # noqa: PLW0603
+    if _flusher is not None or not settings.METRICS_DIR:
+        return
+
+    with _flush_lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(
+            target=_flush_periodically, name="metrics-flush", daemon=True
+        )
+        _flusher.start()
+    atexit.register(flush)
+
+
+def _flush_periodically() -> None:
+    # Stops when replaced, after a fork
+    while _flusher is threading.current_thread():
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush()
+        except OSError:
+            logger.exception("Failed to write the metrics")
+
+
+def _reset_after_fork() -> None:
+    """Forked processes (gunicorn workers) start with empty metrics, their own file and their own flushing thread."""
+    global _lock, _flush_lock, _file_name, _flusher  # noqa: PLW0603
+    # Another thread may have held the locks when forking
+    _lock = threading.Lock()
+    _flush_lock = threading.Lock()
+    _values.clear()
+    _histograms.clear()
+    _file_name = ""
+    _flusher = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _merge(snapshots: list[dict]) -> tuple[dict[Key, float], dict[Key, list[float]]]:
+    values: dict[Key, float] = {}
+    histograms: dict[Key, list[float]] = {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["values"]:
+            # Labels went through JSON as lists
+            key = name, tuple(tuple(label) for label in labels)
+            values[key] = values.get(key, 0) + value
+        for name, labels, histogram in snapshot["histograms"]:
+            key = name, tuple(tuple(label) for label in labels)
+            if key in histograms:
+                histograms[key] = [
+                    a + b for a, b in zip(histograms[key], histogram, strict=True)
+                ]
+            else:
+                histograms[key] = histogram
+    return values, histograms
+
+
+def collect() -> tuple[dict[Key, float], dict[Key, list[float]]]:
+    """Metrics of all the processes sharing METRICS_DIR, or only of this process."""
+    if not settings.METRICS_DIR:
+        return _merge([_snapshot()])
+
+    flush()
+    with _exited_lock():
+        exited_path = settings.METRICS_DIR / EXITED_FILE_NAME
+        exited = _read(exited_path) or {"values": [], "histograms": []}
+        snapshots = []
+        exited_paths = []
+        for path in settings.METRICS_DIR.glob("*.json"):
+            if path == exited_path or (snapshot := _read(path)) is None:
+                continue
+            if _is_alive(int(path.name.split("-", 1)[0])):
+                snapshots.append(snapshot)
+                continue
+            # The counters of the exited processes still count, but their gauges describe a state gone with them
+            snapshot["values"] = [
+                value
+                for value in snapshot["values"]
+                if value[0] in METRICS and METRICS[value[0]].type != "gauge"
+            ]
+            exited = _serialize(*_merge([exited, snapshot]))
+            exited_paths.append(path)
+        if exited_paths:
+            _write(exited_path, exited)
+            for path in exited_paths:
+                path.unlink()
+    return _merge([exited, *snapshots])
+
+
+def _read(path: Path) -> dict | None:
+    try:
+        return json.loads(path.read_text())
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _exited_lock() -> Iterator[None]:
+    """Lock shared with the other processes, so that the files of the exited ones are folded once."""
+    with (settings.METRICS_DIR / EXITED_LOCK_NAME).open("a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if value == int(value) else repr(value)
+
+
+def export() -> str:
+    """All the metrics, in the Prometheus text exposition format."""
+    values, histograms = collect()
+    lines = []
+    for name, metric in METRICS.items():
+        lines.append(f"# HELP {name} {metric.help}")
+        lines.append(f"# TYPE {name} {metric.type}")
+        if metric.type != "histogram":
+            for (sample_name, labels), value in sorted(values.items()):
+                if sample_name == name:
+                    lines.append(
+                        f"{name}{_format_labels(labels)} {_format_value(value)}"
+                    )
+            continue
+
+        for (sample_name, labels), histogram in sorted(histograms.items()):
+            if sample_name != name:
+                continue
+            bounds = [*(_format_value(bound) for bound in metric.buckets), "+Inf"]
+            cumulative = 0.0
+            for bound, count in zip(bounds, histogram[:-1], strict=True):
+                cumulative += count
+                bucket_labels = (*labels, ("le", bound))
+                lines.append(
+                    f"{name}_bucket{_format_labels(bucket_labels)} {_format_value(cumulative)}"
+                )
+            lines.append(
+                f"{name}_sum{_format_labels(labels)} {_format_value(histogram[-1])}"
+            )
+            lines.append(
+                f"{name}_count{_format_labels(labels)} {_format_value(cumulative)}"
+            )
+    return "\n".join(lines) + "\n"
@@ -1,13 +1,60 @@
+import logging
+import re
+import time
+from functools import lru_cache
+
+import brotli
 from django.conf import settings
-from django.contrib.auth import login
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    login,
+)
 from django.contrib.auth.models import User
-from django.urls import set_script_prefix
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.urls import get_script_prefix, set_script_prefix
+from django.utils.cache import get_max_age, patch_vary_headers
+from django.utils.text import (
+    acompress_sequence,
+    compress_sequence,
+    compress_string,
+)
+
+from . import metrics, profiling, timing
+from .query_budget import BUDGETS, count_queries
 
 HA_SUPERVISOR_IP = "172.30.32.2"
+INGRESS_USERS_CACHE_KEY = "dailyword:ingress-users"
+# Seconds another process may keep using its copy of the map after a change, with the local memory cache
+INGRESS_USERS_TIMEOUT = 300
+# Session key of the logins of the HA users sharing the session
+INGRESS_LOGINS_SESSION_KEY = "_ingress_logins"
+
+# Responses worth compressing: text formats, not the already compressed ones (images, fonts, archives)
+COMPRESSIBLE_TYPES = re.compile(
+    r"^(text/|application/(json|javascript|xml|xhtml\+xml|manifest\+json)|image/svg\+xml)"
+)
+# Shorter responses gain nothing
+COMPRESSION_MIN_SIZE = 200
+# Brotli quality: 11 is much slower for little gain on pages compressed on the fly
+BROTLI_QUALITY = 5
+
+logger = logging.getLogger(__name__)
+timing_logger = logging.getLogger("dailyword.timing")
+compression_logger = logging.getLogger("dailyword.compression")
 
 
 class IngressMiddleware:
-    """Handle Home Assistant Ingress: IP-gated SCRIPT_NAME, auto-login, CSRF exemption, iframe."""
+    """
+    Handle Home Assistant Ingress: IP-gated SCRIPT_NAME, auto-login, CSRF exemption, iframe.
+
+    The HA users are logged in once per session: afterwards the session already holds the id their username maps to, and
+    that map is cached (see `ingress_user_id()`), so the requests cost no query besides the loading of the session.
+    """
 
     def __init__(self, get_response):
         self.get_response = get_response
@@ -23,31 +70,273 @@ class IngressMiddleware:
             return self.get_response(request)
 
         # Set script prefix for correct URL generation (reverse(), {% url %}, {% static %})
-        set_script_prefix(request.headers.get("x-ingress-path", ""))
+        prefix = _script_prefix(request.META.get("HTTP_X_INGRESS_PATH", ""))
+        if get_script_prefix() != prefix:
+            set_script_prefix(prefix)
 
         # HA already authenticates ingress requests
         request._dont_enforce_csrf_checks = True
 
         # Auto-login HA users
-        username = request.headers.get("x-remote-user-name", "")
-        if username and not (
-            request.user.is_authenticated and request.user.username == username
-        ):
-            display_name = request.headers.get("x-remote-user-display-name", "")
-            user, _ = User.objects.get_or_create(
-                username=username,
-                defaults={
-                    "first_name": display_name,
-                    "is_staff": True,
-                    "is_superuser": True,
-                },
+        username = request.META.get("HTTP_X_REMOTE_USER_NAME", "")
+        if username:
+            _log_in(
+                request,
+                username,
+                request.META.get("HTTP_X_REMOTE_USER_DISPLAY_NAME", ""),
             )
 
-            login(request, user, backend="django.contrib.auth.backends.ModelBackend")
-
         response = self.get_response(request)
 
         # Allow iframe embedding for HA's UI
         response.headers.pop("X-Frame-Options", None)
 
         return response
+
+
+def _log_in(request, username: str, display_name: str) -> None:
+    """Log the HA user in, unless the session already is. Each user is logged in with login() once per session."""
+    user_id = str(ingress_user_id(username, display_name))
+    if request.session.get(SESSION_KEY) == user_id:
+        return
+
+    logins = request.session.get(INGRESS_LOGINS_SESSION_KEY, {})
+    if user_id in logins:
+        # HA users sharing the browser: back to one already logged in, without cycling the session and saving the user
+        request.session.update(logins[user_id])
+        return
+
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        # Deleted by another process, the map of this one is outdated
+        cache.delete(INGRESS_USERS_CACHE_KEY)
+        user = User.objects.get(pk=ingress_user_id(username, display_name))
+    login(request, user, backend="django.contrib.auth.backends.ModelBackend")
+    # Kept across the flush of the session by login() when the user changes
+    request.session[INGRESS_LOGINS_SESSION_KEY] = {
+        **logins,
+        str(user.pk): {
+            key: request.session[key]
+            for key in (SESSION_KEY, BACKEND_SESSION_KEY, HASH_SESSION_KEY)
+        },
+    }
+
+
+@lru_cache(maxsize=16)
+def _script_prefix(ingress_path: str) -> str:
+    return ingress_path.rstrip("/") + "/"
+
+
+def ingress_user_id(username: str, display_name: str = "") -> int:
+    """
+    Id of the user of an HA username, created on its first visit as a superuser.
+
+    The whole username -> id map is a single entry of the default cache, dropped whenever a user is saved or deleted.
+    With the local memory cache each process has its own, hence the timeout bounding how long another process may miss
+    a change.
+    """
+    users = cache.get(INGRESS_USERS_CACHE_KEY, {})
+    if username not in users:
+        user, _ = User.objects.get_or_create(
+            username=username,
+            defaults={
+                "first_name": display_name,
+                "is_staff": True,
+                "is_superuser": True,
+            },
+        )
+        users = {**users, username: user.pk}
+        cache.set(INGRESS_USERS_CACHE_KEY, users, timeout=INGRESS_USERS_TIMEOUT)
+    return users[username]
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def _invalidate_ingress_users(update_fields=None, **kwargs) -> None:
+    # login() saves the last login of every user
+    if update_fields is not None and set(update_fields) <= {"last_login"}:
+        return
+    cache.delete(INGRESS_USERS_CACHE_KEY)
+
+
+class ServerTimingMiddleware:
+    """Expose the timed phases of a request in a Server-Timing header and in the logs."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with timing.recording() as timings:
+            response = self.get_response(request)
+
+        # Only instrumented views record phases, the others are left alone
+        if not timings:
+            return response
+
+        timings["total"] = (time.perf_counter() - start) * 1000
+        response["Server-Timing"] = timing.server_timing_header(timings)
+        timing_logger.info(
+            "%s %s %d %s",
+            request.method,
+            request.path,
+            response.status_code,
+            " ".join(f"{name}={duration:.1f}ms" for name, duration in timings.items()),
+            extra={
+                "method": request.method,
+                "path": request.path,
+                "status": response.status_code,
+                "timings": timings,
+            },
+        )
+        return response
+
+
+class MetricsMiddleware:
+    """Count the database queries of each request, and make sure the metrics of this process get written."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as queries:
+            response = self.get_response(request)
+
+        metrics.observe("dailyword_db_queries_per_request", queries.count)
+        metrics.start_flushing()
+        return response
+
+
+class ProfilingMiddleware:
+    """Profile the requests carrying a valid profiling token, see `dailyword.profiling`."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        username = profiling.requested_by(request)
+        if username is None:
+            return self.get_response(request)
+        return profiling.profile_request(self.get_response, request, username)
+
+
+class QueryBudgetMiddleware:
+    """In DEBUG, warn about the requests running more queries than the budget of their view, see `dailyword.query_budget`."""
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with count_queries() as queries:
+            response = self.get_response(request)
+
+        match = request.resolver_match
+        budget = BUDGETS.get(match.view_name) if match else None
+        if budget is not None and queries.count > budget:
+            logger.warning(
+                "%s ran %d queries, over the budget of %d for %s",
+                request.path,
+                queries.count,
+                budget,
+                match.view_name,
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compress text responses, with brotli if the client accepts it, otherwise gzip.
+
+    Already compressed media types (PNG images, fonts) are left alone, and the compressed variants of cacheable responses
+    are reused. The ratio and CPU time of each compression are logged by the `dailyword.compression` logger.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.has_header("Content-Encoding") or not COMPRESSIBLE_TYPES.match(
+            response.get("Content-Type", "")
+        ):
+            return response
+        if not response.streaming and len(response.content) < COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        accepted = request.headers.get("accept-encoding", "")
+        if re.search(r"\bbr\b", accepted) and not response.streaming:
+            encoding = "br"
+        elif re.search(r"\bgzip\b", accepted):
+            encoding = "gzip"
+        else:
+            return response
+
+        if response.streaming:
+            # Its size isn't known: compressed as it's sent, and not logged
+            compress = acompress_sequence if response.is_async else compress_sequence
+            response.streaming_content = compress(
+                response.streaming_content, max_random_bytes=100
+            )
+            del response.headers["Content-Length"]
+        else:
+            start = time.thread_time()
+            if _is_cacheable(response):
+                compressed = _compress_cached(encoding, response.content)
+            else:
+                compressed = _compress(encoding, response.content)
+            cpu_time = (time.thread_time() - start) * 1000
+            compression_logger.info(
+                "%s %s %s: %d -> %d bytes (%.0f%%) in %.2fms",
+                request.path,
+                response["Content-Type"],
+                encoding,
+                len(response.content),
+                len(compressed),
+                100 * len(compressed) / len(response.content),
+                cpu_time,
+                extra={
+                    "path": request.path,
+                    "encoding": encoding,
+                    "size": len(response.content),
+                    "compressed_size": len(compressed),
+                    "cpu_time": cpu_time,
+                },
+            )
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response["Content-Length"] = str(len(compressed))
+
+        # A strong ETag would claim the compressed content is the same as the original one
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        response["Content-Encoding"] = encoding
+        return response
+
+
+def _is_cacheable(response) -> bool:
+    """Whether the response is the same for everyone: shared caches may store it."""
+    cache_control = response.get("Cache-Control", "")
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and "private" not in cache_control
+        and "no-store" not in cache_control
+        and bool(get_max_age(response))
+    )
+
+
+def _compress(encoding: str, content: bytes) -> bytes:
+    if encoding == "br":
+        return brotli.compress(content, quality=BROTLI_QUALITY)
+    # Random padding against BREACH, as Django's GZipMiddleware does
+    return compress_string(content, max_random_bytes=100)
+
+
+# Cacheable responses contain no secret, so the random padding of their gzip variant can be reused
+_compress_cached = lru_cache(maxsize=64)(_compress)
@@ -0,0 +1,95 @@
+# Generated by Django 6.0.7 on 2026-10-19 07:36
+
+from django.db import migrations, models
+
+# Full-text search on the words, used by the admin search (see dailyword.search)
+POSTGRESQL_FORWARD = [
+    """
+    CREATE INDEX dailyword_word_search_idx ON dailyword_word
+    USING GIN (to_tsvector('simple', word || ' ' || definition || ' ' || example_sentence))
+    """,
+]
+POSTGRESQL_BACKWARD = ["DROP INDEX IF EXISTS dailyword_word_search_idx"]
+
+# External content FTS5 table, kept in sync by triggers
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE dailyword_word_fts USING fts5(
+        word, definition, example_sentence, content='dailyword_word', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER dailyword_word_fts_insert AFTER INSERT ON dailyword_word BEGIN
+        INSERT INTO dailyword_word_fts(rowid, word, definition, example_sentence)
+        VALUES (new.id, new.word, new.definition, new.example_sentence);
+    END
+    """,
+    """
+    CREATE TRIGGER dailyword_word_fts_delete AFTER DELETE ON dailyword_word BEGIN
+        INSERT INTO dailyword_word_fts(dailyword_word_fts, rowid, word, definition, example_sentence)
+        VALUES ('delete', old.id, old.word, old.definition, old.example_sentence);
+    END
+    """,
+    """
+    CREATE TRIGGER dailyword_word_fts_update AFTER UPDATE ON dailyword_word BEGIN
+        INSERT INTO dailyword_word_fts(dailyword_word_fts, rowid, word, definition, example_sentence)
+        VALUES ('delete', old.id, old.word, old.definition, old.example_sentence);
+        INSERT INTO dailyword_word_fts(rowid, word, definition, example_sentence)
+        VALUES (new.id, new.word, new.definition, new.example_sentence);
+    END
+    """,
+    "INSERT INTO dailyword_word_fts(dailyword_word_fts) VALUES ('rebuild')",
+]
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS dailyword_word_fts_insert",
+    "DROP TRIGGER IF EXISTS dailyword_word_fts_delete",
+    "DROP TRIGGER IF EXISTS dailyword_word_fts_update",
+    "DROP TABLE IF EXISTS dailyword_word_fts",
+]
+
+
+def _run(schema_editor, statements_by_vendor):
+    for statement in statements_by_vendor.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(statement)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            if not cursor.fetchone()[0]:
+                # The admin search falls back to LIKE queries
+                return
+    _run(
+        schema_editor,
+        {"postgresql": POSTGRESQL_FORWARD, "sqlite": SQLITE_FORWARD},
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    _run(
+        schema_editor,
+        {"postgresql": POSTGRESQL_BACKWARD, "sqlite": SQLITE_BACKWARD},
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dailyword", "0005_requestprofile"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="word",
+            index=models.Index(
+                fields=["word", "id"], name="dailyword_w_word_0bb452_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="word",
+            index=models.Index(
+                fields=["part_of_speech"], name="dailyword_w_part_of_b905d3_idx"
+            ),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
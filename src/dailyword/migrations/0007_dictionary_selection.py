@@ -0,0 +1,25 @@
+# Generated by Django 6.0.7 on 2026-10-19 07:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("dailyword", "0006_word_indexes_and_search"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dictionary",
+            name="selection",
+            field=models.CharField(
+                choices=[
+                    ("random", "Random (words may repeat within days)"),
+                    ("rotation", "Rotation (every word once before any repeats)"),
+                ],
+                default="random",
+                help_text="How the word of each day is chosen. Adding or removing words reshuffles the rotation.",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -1,10 +1,19 @@
 import hashlib
-from datetime import date
+from collections.abc import Iterable
+from datetime import date, timedelta
 
 from django.db import models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
 from django.urls import reverse
+from django.utils import timezone
 from django.utils.text import slugify
 
+from . import rotation
+
+# How far get_next_date_for_word() looks for a word, when words are selected at random
+RANDOM_SEARCH_DAYS = 366
+
 
 class Timestamped(models.Model):
     """Abstract base class with created and updated timestamps."""
@@ -21,9 +30,20 @@ class Dictionary(Timestamped):
 
     name = models.CharField(max_length=255)
     slug = models.SlugField(max_length=255, unique=True, blank=True)
+
+    class Selection(models.TextChoices):
+        RANDOM = "random", "Random (words may repeat within days)"
+        ROTATION = "rotation", "Rotation (every word once before any repeats)"
+
     prompt = models.TextField(
         help_text="Prompt used for AI word generation, for example: 'vocabulary words related to cooking at beginner level'",
     )
+    selection = models.CharField(
+        max_length=20,
+        choices=Selection,
+        default=Selection.RANDOM,
+        help_text="How the word of each day is chosen. Adding or removing words reshuffles the rotation.",
+    )
 
     class Meta(Timestamped.Meta):
         verbose_name_plural = "dictionaries"
@@ -50,15 +70,84 @@ class Dictionary(Timestamped):
 
     def get_word_for_date(self, target_date: date) -> Word | None:
         """Get the word assigned to a specific date for this dictionary."""
-        words = list(self.words.all().order_by("id"))
-        if not words:
+        return self.get_words_for_dates([target_date])[target_date]
+
+    def get_words_for_dates(self, dates: Iterable[date]) -> dict[date, Word | None]:
+        """Get the words assigned to several dates, with two queries whatever the number of dates."""
+        dates = list(dates)
+        word_count = self.words.count()
+        if not word_count:
+            return dict.fromkeys(dates)
+
+        indexes = {
+            target_date: self.word_index(target_date, word_count)
+            for target_date in dates
+        }
+        # Number the words in a single pass over the index, and fetch only the ones at these positions
+        positions = sorted(set(indexes.values()))
+        ids_at_positions = (
+            self.words.order_by()
+            .annotate(_position=Window(RowNumber(), order_by=F("id").asc()))
+            .filter(_position__in=[index + 1 for index in positions])
+            .values("id")
+        )
+        words = dict(
+            zip(
+                positions,
+                Word.objects.filter(id__in=ids_at_positions).order_by("id"),
+                strict=False,
+            )
+        )
+        return {target_date: words.get(index) for target_date, index in indexes.items()}
+
+    def get_next_date_for_word(self, word: Word, from_date: date) -> date | None:
+        """
+        Get the first date from from_date assigned to the word.
+
+        In rotation, that's computed directly and is at most two rotations away. Otherwise, the dates are searched up
+        to RANDOM_SEARCH_DAYS ahead, and None is returned if the word isn't found.
+        """
+        word_count = self.words.count()
+        if not word_count:
             return None
+        # Position of the word among the words ordered by id
+        index = self.words.filter(id__lt=word.id).count()
+
+        if self.selection == self.Selection.ROTATION:
+            day = from_date.toordinal()
+            cycle = day // word_count
+            next_day = self._rotation_day(index, cycle, word_count)
+            if next_day < day:
+                # Already shown in this rotation
+                next_day = self._rotation_day(index, cycle + 1, word_count)
+            return date.fromordinal(next_day)
+
+        for offset in range(RANDOM_SEARCH_DAYS):
+            target_date = from_date + timedelta(days=offset)
+            if self.word_index(target_date, word_count) == index:
+                return target_date
+        return None
+
+    def word_index(self, target_date: date, word_count: int) -> int:
+        """Position of the word of the date, among the words ordered by id."""
+        if self.selection == self.Selection.ROTATION:
+            # Each rotation of word_count days shows every word once, in its own order
+            cycle, day = divmod(target_date.toordinal(), word_count)
+            return rotation.permute(day, word_count, self._rotation_key(cycle))
 
         # Use a deterministic hash based on dictionary id and date
         hash_input = f"{self.id}-{target_date.isoformat()}"
         hash_value = int(hashlib.md5(hash_input.encode()).hexdigest(), 16)
-        index = hash_value % len(words)
-        return words[index]
+        return hash_value % word_count
+
+    def _rotation_day(self, index: int, cycle: int, word_count: int) -> int:
+        """Day (as a date ordinal) of the word at the index in the given rotation."""
+        return cycle * word_count + rotation.unpermute(
+            index, word_count, self._rotation_key(cycle)
+        )
+
+    def _rotation_key(self, cycle: int) -> bytes:
+        return f"{self.id}-{cycle}".encode()
 
 
 class Word(Timestamped):
@@ -76,6 +165,80 @@ class Word(Timestamped):
     class Meta(Timestamped.Meta):
         ordering = ["word"]
         unique_together = ["dictionary", "word"]
+        indexes = [
+            # Default ordering of the admin changelist, with the primary key to make it total
+            models.Index(fields=["word", "id"]),
+            models.Index(fields=["part_of_speech"]),
+        ]
 
     def __str__(self) -> str:
         return f"{self.word} ({self.dictionary.name})"
+
+
+class GenerationJob(Timestamped):
+    """A request to generate words for a dictionary, executed in the background."""
+
+    class Status(models.TextChoices):
+        PENDING = "pending"
+        RUNNING = "running"
+        DONE = "done"
+        FAILED = "failed"
+
+    dictionary = models.ForeignKey(
+        Dictionary, on_delete=models.CASCADE, related_name="generation_jobs"
+    )
+    count = models.PositiveIntegerField(help_text="Number of words to generate")
+    status = models.CharField(max_length=20, choices=Status, default=Status.PENDING)
+    created_count = models.PositiveIntegerField(default=0)
+    skipped_count = models.PositiveIntegerField(default=0)
+    total_tokens = models.PositiveIntegerField(default=0)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta(Timestamped.Meta):
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.count} words for {self.dictionary.name} ({self.status})"
+
+    @property
+    def elapsed(self) -> timedelta | None:
+        """Time spent running the job so far, or in total once finished."""
+        if not self.started_at:
+            return None
+        return (self.finished_at or timezone.now()) - self.started_at
+
+
+class ImportedFile(Timestamped):
+    """A data file loaded into the database, recorded so that it's not loaded twice."""
+
+    content_hash = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    record_count = models.PositiveIntegerField(default=0)
+
+    class Meta(Timestamped.Meta):
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class RequestProfile(Timestamped):
+    """A cProfile profile of a single request, taken on demand with a signed token."""
+
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=2000)
+    status_code = models.PositiveSmallIntegerField()
+    duration = models.FloatField(help_text="Duration of the request in seconds")
+    requested_by = models.CharField(
+        max_length=150, help_text="User who generated the profiling token"
+    )
+    # Marshalled pstats data, as written by pstats.Stats.dump_stats()
+    stats = models.BinaryField()
+
+    class Meta(Timestamped.Meta):
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.method} {self.path}"
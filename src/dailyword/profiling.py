@@ -0,0 +1,126 @@
+"""
+On-demand profiling of single requests, in production.
+
+Staff users get a signed token from the admin. A request carrying it, in the `_profile` query parameter or the
+`X-Profile` header, runs under cProfile and its profile is saved as a `RequestProfile`, downloadable from the admin.
+"""
+
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import time
+from datetime import timedelta
+
+from django.contrib.auth.models import AbstractBaseUser, User
+from django.core import signing
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import RequestProfile
+
+logger = logging.getLogger(__name__)
+
+QUERY_PARAMETER = "_profile"
+HEADER = "X-Profile"
+TOKEN_MAX_AGE = timedelta(hours=1)
+MAX_PROFILES_PER_WINDOW = 100
+PROFILES_WINDOW = timedelta(hours=1)
+
+_signer = signing.TimestampSigner(salt="dailyword.profiling")
+
+
+def make_token(user: AbstractBaseUser) -> str:
+    return _signer.sign(user.get_username())
+
+
+def check_token(token: str) -> str | None:
+    """Return the username the token was made for, if it's valid and not expired."""
+    try:
+        return _signer.unsign(token, max_age=TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+
+
+def requested_by(request) -> str | None:
+    """
+    The staff user profiling the request, if it carries a valid token.
+
+    The token only proves who it was made for: the user must still be an active staff member, and may save at most
+    MAX_PROFILES_PER_WINDOW profiles per PROFILES_WINDOW, so that a leaked token can't fill the database.
+    """
+    token = request.GET.get(QUERY_PARAMETER) or request.headers.get(HEADER)
+    if not token or (username := check_token(token)) is None:
+        return None
+
+    try:
+        if not User.objects.filter(
+            username=username, is_active=True, is_staff=True
+        ).exists():
+            return None
+        recent_profiles = RequestProfile.objects.filter(
+            requested_by=username, created_at__gte=timezone.now() - PROFILES_WINDOW
+        ).count()
+    except DatabaseError:
+        logger.exception("Failed to check the profiling token of %s", request.path)
+        return None
+    if recent_profiles >= MAX_PROFILES_PER_WINDOW:
+        logger.warning(
+            "Not profiling %s: %s saved %d profiles in the last %s",
+            request.path,
+            username,
+            recent_profiles,
+            PROFILES_WINDOW,
+        )
+        return None
+    return username
+
+
+def profile_request(get_response, request, username: str):
+    """Serve the request under cProfile, and save its profile."""
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler (or a debugger, a coverage tool) is already active
+        logger.warning("Cannot profile %s, a profiler is already active", request.path)
+        return get_response(request)
+
+    start = time.perf_counter()
+    try:
+        response = get_response(request)
+    finally:
+        profiler.disable()
+    duration = time.perf_counter() - start
+
+    try:
+        profile = RequestProfile.objects.create(
+            method=request.method,
+            path=request.path[:2000],
+            status_code=response.status_code,
+            duration=duration,
+            requested_by=username,
+            stats=marshal.dumps(pstats.Stats(profiler).stats),
+        )
+    except DatabaseError:
+        logger.exception("Failed to save the profile of %s", request.path)
+    else:
+        response["X-Profile-Id"] = profile.pk
+    return response
+
+
+def load_stats(profile: RequestProfile) -> pstats.Stats:
+    stats = pstats.Stats()
+    stats.stats = marshal.loads(bytes(profile.stats))
+    stats.get_top_level_stats()
+    return stats
+
+
+def summary(profile: RequestProfile, limit: int = 30) -> str:
+    """The functions with the highest cumulative time, as printed by pstats."""
+    output = io.StringIO()
+    stats = load_stats(profile)
+    stats.stream = output
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,46 @@
+"""
+Maximum number of database queries of the hot pages, whatever the amount of data.
+
+The tests enforce these budgets (see the `query_budget` fixture), and in DEBUG `QueryBudgetMiddleware` logs a warning
+when a request exceeds the budget of its view, so that N+1 queries get noticed before reaching production.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from django.db import connection
+
+# URL name -> maximum number of queries
+BUDGETS = {
+    # On a cache miss: dictionary, number of words, today's and yesterday's words
+    "dailyword:day-image": 3,
+    # Session, user, counts (filtered and total), page of dictionaries with their word count
+    "admin:dailyword_dictionary_changelist": 5,
+    # Session, user, counts (filtered and total), page of words with their dictionary, dictionaries and parts of speech for the filters
+    "admin:dailyword_word_changelist": 7,
+}
+
+
+# Transactions and savepoints (like the ones of ATOMIC_REQUESTS) are not counted
+TRANSACTION_CONTROL = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+def is_transaction_control(sql: str) -> bool:
+    return sql.lstrip().upper().startswith(TRANSACTION_CONTROL)
+
+
+class QueryCounter:
+    count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not is_transaction_control(sql):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """Count the queries run on the default database inside the block."""
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        yield counter
@@ -0,0 +1,296 @@
+"""
+Cache of the rendered images, in tiers from the fastest to the most shared:
+
+1. memory: a LRU of this process, bounded in bytes (`RENDER_CACHE_MEMORY_BYTES`), free of any round trip or copy
+2. Django cache: the default cache, shared between processes and hosts when it's Redis or Memcached (skipped when it's
+   the per-process local memory cache, which would duplicate the first tier)
+3. files: a directory on local disk (`RENDER_CACHE_DIR`), shared by the processes of a host without Redis
+
+A hit in a tier fills the faster ones. Each tier counts its hits and misses in the
+`dailyword_render_cache_requests_total` metric. Images are cached with their ETag (see `Image`), so that hits don't hash
+them again.
+
+The version of the cached data (see `version()`) lives in the most shared place, so that all the processes see it
+change: the Django cache when it's shared, otherwise a file (in `RENDER_CACHE_DIR`, or else in the temporary directory).
+Without a shared cache, only the processes of the same host see it change.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from collections.abc import Iterable
+from functools import cache as memoize
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.http import quote_etag
+
+from . import metrics
+
+# Entries are keyed by date, so they're useless after a day
+TIMEOUT = 24 * 60 * 60
+VERSION_KEY = "dailyword:version"
+# Expired files are removed every this many writes
+PRUNE_EVERY = 1000
+# Directory of the version file without RENDER_CACHE_DIR nor a shared cache: the processes of a host share it
+VERSION_DIR = Path(tempfile.gettempdir()) / "dailyword"
+
+
+class Image(bytes):
+    """A rendered PNG, with its ETag: hashed once when rendered, then cached along with it."""
+
+    etag: str
+
+    def __new__(cls, content: bytes, etag: str | None = None) -> Image:
+        image = super().__new__(cls, content)
+        image.etag = etag or quote_etag(
+            hashlib.blake2b(content, digest_size=16).hexdigest()
+        )
+        return image
+
+    def __reduce__(self) -> tuple[type[Image], tuple[bytes, str]]:
+        # Pickled by shared caches without hashing it again when loaded
+        return Image, (bytes(self), self.etag)
+
+
+class MemoryTier:
+    """LRU of the images, bounded by their total size."""
+
+    name = "memory"
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[str, Image] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Image]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if (value := self._entries.get(key)) is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = value
+        return found
+
+    def set_many(self, values: dict[str, Image]) -> None:
+        with self._lock:
+            for key, value in values.items():
+                if len(value) > self.max_bytes:
+                    continue
+                if (previous := self._entries.pop(key, None)) is not None:
+                    self.size -= len(previous)
+                self._entries[key] = value
+                self.size += len(value)
+            while self.size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.size -= len(evicted)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                if (previous := self._entries.pop(key, None)) is not None:
+                    self.size -= len(previous)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+class DjangoCacheTier:
+    name = "django"
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Image]:
+        return cache.get_many(keys)
+
+    def set_many(self, values: dict[str, Image]) -> None:
+        cache.set_many(values, TIMEOUT)
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        cache.delete_many(keys)
+
+    def clear(self) -> None:
+        # Its entries expire by themselves, and clearing the whole cache would drop more than images
+        pass
+
+
+class FileTier:
+    """One file per image (its ETag on the first line), named after the hash of its key, expiring after TIMEOUT."""
+
+    name = "file"
+
+    def __init__(self, directory: Path) -> None:
+        self.directory = directory
+        self._writes = 0
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode()).hexdigest()
+        return self.directory / digest[:2] / digest
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Image]:
+        found = {}
+        expired_before = time.time() - TIMEOUT
+        for key in keys:
+            path = self._path(key)
+            try:
+                if path.stat().st_mtime <= expired_before:
+                    continue
+                data = path.read_bytes()
+            except FileNotFoundError:
+                continue
+            etag, _, content = data.partition(b"\n")
+            # Otherwise written before the ETags were cached
+            if etag.startswith(b'"'):
+                found[key] = Image(content, etag.decode())
+        return found
+
+    def set_many(self, values: dict[str, Image]) -> None:
+        for key, value in values.items():
+            self.write(self._path(key), value.etag.encode() + b"\n" + value)
+        self._writes += len(values)
+        if self._writes >= PRUNE_EVERY:
+            self._writes = 0
+            self.prune()
+
+    def delete_many(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._path(key).unlink(missing_ok=True)
+
+    def write(self, path: Path, value: bytes) -> None:
+        """Write a file atomically, so that other processes never read it partially written."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(value)
+        tmp_path.replace(path)
+
+    def prune(self) -> None:
+        """Remove the expired files."""
+        expired_before = time.time() - TIMEOUT
+        for path in self.directory.glob("??/*"):
+            try:
+                if path.stat().st_mtime <= expired_before:
+                    path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def clear(self) -> None:
+        for path in self.directory.glob("??/*"):
+            path.unlink(missing_ok=True)
+
+
+type Tier = MemoryTier | DjangoCacheTier | FileTier
+
+
+@memoize
+def _tiers() -> list[Tier]:
+    tiers: list[Tier] = [MemoryTier(settings.RENDER_CACHE_MEMORY_BYTES)]
+    if not isinstance(caches["default"], LocMemCache):
+        tiers.append(DjangoCacheTier())
+    if settings.RENDER_CACHE_DIR:
+        tiers.append(FileTier(settings.RENDER_CACHE_DIR))
+    return tiers
+
+
+@receiver(setting_changed)
+def _reset_tiers(setting: str, **kwargs) -> None:
+    if setting in {"CACHES", "RENDER_CACHE_MEMORY_BYTES", "RENDER_CACHE_DIR"}:
+        _tiers.cache_clear()
+
+
+def get_many(keys: Iterable[str]) -> dict[str, Image]:
+    """The images found in any tier, filling the faster tiers with the ones found in slower ones."""
+    missing = list(keys)
+    found: dict[str, Image] = {}
+    for i, tier in enumerate(_tiers()):
+        if not missing:
+            break
+        hits = tier.get_many(missing)
+        for result, count in (("hit", len(hits)), ("miss", len(missing) - len(hits))):
+            if count:
+                metrics.inc(
+                    "dailyword_render_cache_requests_total",
+                    count,
+                    tier=tier.name,
+                    result=result,
+                )
+        if hits:
+            for faster_tier in _tiers()[:i]:
+                faster_tier.set_many(hits)
+            found |= hits
+            missing = [key for key in missing if key not in hits]
+    return found
+
+
+def get(key: str) -> Image | None:
+    return get_many([key]).get(key)
+
+
+def set_many(values: dict[str, Image]) -> None:
+    """Store images in all the tiers."""
+    for tier in _tiers():
+        tier.set_many(values)
+
+
+def delete_many(keys: Iterable[str]) -> None:
+    """Remove images from all the tiers."""
+    keys = list(keys)
+    for tier in _tiers():
+        tier.delete_many(keys)
+
+
+def clear() -> None:
+    """Empty the memory and file tiers, for the tests."""
+    for tier in _tiers():
+        tier.clear()
+
+
+def _version_path() -> Path | None:
+    """File holding the version, unless the default cache is shared between processes."""
+    if not isinstance(caches["default"], LocMemCache):
+        # Seen by the processes of every host, unlike a file
+        return None
+    # Each process would have its own version: the other workers and commands wouldn't see it change
+    if settings.RENDER_CACHE_DIR:
+        return settings.RENDER_CACHE_DIR / "version"
+    return VERSION_DIR / "version"
+
+
+def version() -> str:
+    """Version of the cached data, changed by new_version() and shared with the other processes."""
+    if path := _version_path():
+        try:
+            return path.read_text()
+        except FileNotFoundError:
+            new_version()
+            return path.read_text()
+
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        current = cache.get(VERSION_KEY)
+    return current
+
+
+def new_version() -> None:
+    """Change the version, making all the data cached with the previous one stale."""
+    if path := _version_path():
+        FileTier(path.parent).write(path, uuid.uuid4().hex.encode())
+    else:
+        cache.set(VERSION_KEY, uuid.uuid4().hex, timeout=None)
+
+
+def _collect_memory_metrics() -> None:
+    if _tiers.cache_info().currsize:
+        metrics.set_value("dailyword_render_cache_memory_bytes", _tiers()[0].size)
+
+
+metrics.register_collector(_collect_memory_metrics)
@@ -1,10 +1,15 @@
 import io
-from functools import lru_cache
+import os
+import time
+from collections.abc import Callable
+from functools import lru_cache, partial
 from pathlib import Path
 
 from PIL import Image, ImageDraw, ImageFont
 
+from . import metrics
 from .models import Word
+from .timing import timed
 
 FONTS_DIR = Path(__file__).parent / "fonts"
 
@@ -33,6 +38,42 @@ def _load_font(
     )
 
 
+# Font cache statistics inherited from the parent process (the gunicorn master warms it up), counted there already
+_font_cache_at_fork = (0, 0)
+
+
+def _remember_font_cache_at_fork() -> None:
+    global _font_cache_at_fork  # noqa: PLW0603
+    info = _load_font.cache_info()
+    _font_cache_at_fork = (info.hits, info.misses)
+
+
+os.register_at_fork(after_in_child=_remember_font_cache_at_fork)
+
+
+def _collect_font_cache_metrics() -> None:
+    info = _load_font.cache_info()
+    hits_at_fork, misses_at_fork = _font_cache_at_fork
+    metrics.set_value("dailyword_font_cache_hits_total", info.hits - hits_at_fork)
+    metrics.set_value("dailyword_font_cache_misses_total", info.misses - misses_at_fork)
+    metrics.set_value("dailyword_font_cache_size", info.currsize)
+
+
+metrics.register_collector(_collect_font_cache_metrics)
+
+
+def size_class(width: int, height: int) -> str:
+    """Coarse size of an image, to keep the number of metric labels small."""
+    pixels = width * height
+    if pixels <= 512 * 512:
+        return "small"
+    if pixels <= 1024 * 1024:
+        return "medium"
+    if pixels <= 2048 * 2048:
+        return "large"
+    return "huge"
+
+
 def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[str]:
     """Wrap text to fit within max_width pixels using actual font metrics."""
     words = text.split()
@@ -55,6 +96,48 @@ def _wrap_text(text: str, font: ImageFont.FreeTypeFont, max_width: int) -> list[
     return lines
 
 
+# A drawing operation, computed during layout and applied during rasterization
+type DrawOp = Callable[[ImageDraw.ImageDraw], None]
+
+
+def _text(
+    xy: tuple[float, float], text: str, font: ImageFont.FreeTypeFont, fill: int
+) -> DrawOp:
+    return partial(ImageDraw.ImageDraw.text, xy=xy, text=text, font=font, fill=fill)
+
+
+def _line(xy: list[tuple[float, float]], fill: int, width: int) -> DrawOp:
+    return partial(ImageDraw.ImageDraw.line, xy=xy, fill=fill, width=width)
+
+
+def _render(
+    kind: str, width: int, height: int, layout: Callable[[], list[DrawOp]]
+) -> bytes:
+    """Compute the drawing operations, rasterize them on a grayscale image, then encode it as PNG."""
+    start = time.perf_counter()
+    with timed("layout"):
+        ops = layout()
+
+    with timed("rasterize"):
+        img = Image.new("L", (width, height), WHITE)
+        draw = ImageDraw.Draw(img)
+        for op in ops:
+            op(draw)
+
+    with timed("encode"):
+        buffer = io.BytesIO()
+        img.save(buffer, format="PNG")
+        image_data = buffer.getvalue()
+
+    metrics.observe(
+        "dailyword_render_seconds",
+        time.perf_counter() - start,
+        kind=kind,
+        size_class=size_class(width, height),
+    )
+    return image_data
+
+
 def generate_word_image(
     word: Word,
     width: int,
@@ -62,8 +145,21 @@ def generate_word_image(
     yesterday_word: Word | None = None,
 ) -> bytes:
     """Generate a grayscale PNG image with word details using Pillow."""
-    img = Image.new("L", (width, height), WHITE)
-    draw = ImageDraw.Draw(img)
+    return _render(
+        "word",
+        width,
+        height,
+        partial(_layout_word, word, width, height, yesterday_word),
+    )
+
+
+def _layout_word(
+    word: Word,
+    width: int,
+    height: int,
+    yesterday_word: Word | None,
+) -> list[DrawOp]:
+    ops: list[DrawOp] = []
 
     # Responsive sizing
     title_size = max(20, width // 17)
@@ -81,7 +177,7 @@ def generate_word_image(
 
     # Title line: Word  (part_of_speech)  /pronunciation/
     title_text = word.word
-    draw.text((padding, y), title_text, font=title_font, fill=BLACK)
+    ops.append(_text((padding, y), title_text, font=title_font, fill=BLACK))
     title_bbox = title_font.getbbox(title_text)
     meta_x = padding + title_bbox[2]
 
@@ -96,58 +192,71 @@ def generate_word_image(
         title_ascent = title_font.getmetrics()[0]
         meta_ascent = body_font.getmetrics()[0]
         meta_y = y + (title_ascent - meta_ascent)
-        draw.text((meta_x, meta_y), meta_text, font=body_font, fill=GRAY)
+        ops.append(_text((meta_x, meta_y), meta_text, font=body_font, fill=GRAY))
 
     y += title_bbox[3] + (body_size * 0.8)
 
     # Definition
-    draw.text((padding, y), "Definition:", font=label_font, fill=BLACK)
+    ops.append(_text((padding, y), "Definition:", font=label_font, fill=BLACK))
     y += int(body_size * 1.5)
 
     for line in _wrap_text(word.definition, body_font, max_text_width):
-        draw.text((padding, y), line, font=body_font, fill=BLACK)
+        ops.append(_text((padding, y), line, font=body_font, fill=BLACK))
         y += int(body_size * 1.4)
 
     # Example sentence
     if word.example_sentence:
         y += int(body_size * 0.8)
-        draw.text((padding, y), "Example:", font=label_font, fill=BLACK)
+        ops.append(_text((padding, y), "Example:", font=label_font, fill=BLACK))
         y += int(body_size * 1.5)
 
         for line in _wrap_text(word.example_sentence, body_italic_font, max_text_width):
-            draw.text((padding, y), line, font=body_italic_font, fill=BLACK)
+            ops.append(_text((padding, y), line, font=body_italic_font, fill=BLACK))
             y += int(body_size * 1.4)
 
     # Yesterday's word section
     if yesterday_word:
         y += int(body_size * 0.8)
         # Divider line
-        draw.line([(padding, y), (width - padding, y)], fill=DIVIDER_GRAY, width=1)
+        ops.append(
+            _line([(padding, y), (width - padding, y)], fill=DIVIDER_GRAY, width=1)
+        )
         y += int(body_size * 0.8)
 
         yesterday_title = f"Yesterday: {yesterday_word.word}"
         if yesterday_word.pronunciation:
             yesterday_title += f"  /{yesterday_word.pronunciation}/"
-        draw.text((padding, y), yesterday_title, font=body_bold_font, fill=GRAY)
+        ops.append(_text((padding, y), yesterday_title, font=body_bold_font, fill=GRAY))
         y += int(body_size * 1.4)
 
         for line in _wrap_text(
             yesterday_word.example_sentence, body_font, max_text_width
         ):
-            draw.text((padding, y), line, font=body_font, fill=GRAY)
+            ops.append(_text((padding, y), line, font=body_font, fill=GRAY))
             y += int(body_size * 1.4)
 
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer.getvalue()
+    return ops
 
 
 def generate_error_image(message: str, width: int, height: int) -> bytes:
     """Generate a grayscale PNG error image."""
-    img = Image.new("L", (width, height), WHITE)
-    draw = ImageDraw.Draw(img)
+    return _render(
+        "error", width, height, partial(_layout_error, message, width, height)
+    )
+
+
+# Messages of the error images served by the image endpoint
+DICTIONARY_NOT_FOUND = "Dictionary not found"
+NO_WORDS = "No words in this dictionary"
+
 
+@lru_cache(maxsize=64)
+def cached_error_image(message: str, width: int, height: int) -> bytes:
+    """Same as generate_error_image(), memoized: the same few error images are served over and over."""
+    return generate_error_image(message, width, height)
+
+
+def _layout_error(message: str, width: int, height: int) -> list[DrawOp]:
     title_size = max(24, width // 10)
     body_size = max(14, width // 25)
 
@@ -159,16 +268,12 @@ def generate_error_image(message: str, width: int, height: int) -> bytes:
     title_x = (width - title_bbox[2]) // 2
     title_y = height // 3
 
-    draw.text((title_x, title_y), title_text, font=title_font, fill=BLACK)
-
     # Center message below
     msg_bbox = message_font.getbbox(message)
     msg_x = (width - msg_bbox[2]) // 2
     msg_y = title_y + title_bbox[3] + body_size
 
-    draw.text((msg_x, msg_y), message, font=message_font, fill=GRAY)
-
-    buffer = io.BytesIO()
-    img.save(buffer, format="PNG")
-    buffer.seek(0)
-    return buffer.getvalue()
+    return [
+        _text((title_x, title_y), title_text, font=title_font, fill=BLACK),
+        _text((msg_x, msg_y), message, font=message_font, fill=GRAY),
+    ]
@@ -0,0 +1,61 @@
+"""
+Keyed permutation of the words of a dictionary, so that a rotation shows every word once before repeating any.
+
+The permutation of [0, size) is a Feistel network on the smallest even number of bits covering size, restricted to
+[0, size) by cycle-walking: values landing outside are permuted again until they land inside. The domain being less
+than 4 times the size, that takes less than 4 rounds on average, so both directions are O(1) without any stored
+state.
+"""
+
+import hashlib
+
+ROUNDS = 4
+
+
+def _half_bits(size: int) -> int:
+    return max(1, ((size - 1).bit_length() + 1) // 2)
+
+
+def _round(key: bytes, round_number: int, value: int, mask: int) -> int:
+    digest = hashlib.blake2b(
+        f"{round_number}-{value}".encode(), key=key, digest_size=8
+    ).digest()
+    return int.from_bytes(digest) & mask
+
+
+def _feistel(value: int, half_bits: int, key: bytes) -> int:
+    mask = (1 << half_bits) - 1
+    left, right = value >> half_bits, value & mask
+    for round_number in range(ROUNDS):
+        left, right = right, left ^ _round(key, round_number, right, mask)
+    return (left << half_bits) | right
+
+
+def _feistel_inverse(value: int, half_bits: int, key: bytes) -> int:
+    mask = (1 << half_bits) - 1
+    left, right = value >> half_bits, value & mask
+    for round_number in reversed(range(ROUNDS)):
+        left, right = right ^ _round(key, round_number, left, mask), left
+    return (left << half_bits) | right
+
+
+def permute(value: int, size: int, key: bytes) -> int:
+    """Image of value by the permutation of [0, size) given by the key."""
+    if not 0 <= value < size:
+        raise ValueError(f"{value} is out of [0, {size})")
+    half_bits = _half_bits(size)
+    value = _feistel(value, half_bits, key)
+    while value >= size:
+        value = _feistel(value, half_bits, key)
+    return value
+
+
+def unpermute(value: int, size: int, key: bytes) -> int:
+    """Inverse of permute()."""
+    if not 0 <= value < size:
+        raise ValueError(f"{value} is out of [0, {size})")
+    half_bits = _half_bits(size)
+    value = _feistel_inverse(value, half_bits, key)
+    while value >= size:
+        value = _feistel_inverse(value, half_bits, key)
+    return value
@@ -0,0 +1,99 @@
+"""
+Full-text search on the words, using the index created by the 0006 migration: FTS5 on SQLite, GIN on PostgreSQL.
+
+Every word of the search term must match the start of a word of the entry (in its word, definition or example
+sentence). Other databases, or SQLite without FTS5, keep the admin's default search.
+
+On SQLite, triggers on `dailyword_word` keep the FTS5 table in sync. Migrations rebuilding that table (like most
+`AlterField`) drop them silently, so they're recreated after every migration (see `restore_sqlite_triggers()`).
+"""
+
+import logging
+import re
+from functools import cache
+
+from django.db import DEFAULT_DB_ALIAS, connection, connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+POSTGRESQL_QUERY = """
+    SELECT id FROM dailyword_word
+    WHERE to_tsvector('simple', word || ' ' || definition || ' ' || example_sentence)
+        @@ to_tsquery('simple', %s)
+"""
+SQLITE_QUERY = "SELECT rowid FROM dailyword_word_fts WHERE dailyword_word_fts MATCH %s"
+# Same as created by the 0006 migration
+SQLITE_TRIGGERS = {
+    "dailyword_word_fts_insert": """
+        CREATE TRIGGER dailyword_word_fts_insert AFTER INSERT ON dailyword_word BEGIN
+            INSERT INTO dailyword_word_fts(rowid, word, definition, example_sentence)
+            VALUES (new.id, new.word, new.definition, new.example_sentence);
+        END
+    """,
+    "dailyword_word_fts_delete": """
+        CREATE TRIGGER dailyword_word_fts_delete AFTER DELETE ON dailyword_word BEGIN
+            INSERT INTO dailyword_word_fts(dailyword_word_fts, rowid, word, definition, example_sentence)
+            VALUES ('delete', old.id, old.word, old.definition, old.example_sentence);
+        END
+    """,
+    "dailyword_word_fts_update": """
+        CREATE TRIGGER dailyword_word_fts_update AFTER UPDATE ON dailyword_word BEGIN
+            INSERT INTO dailyword_word_fts(dailyword_word_fts, rowid, word, definition, example_sentence)
+            VALUES ('delete', old.id, old.word, old.definition, old.example_sentence);
+            INSERT INTO dailyword_word_fts(rowid, word, definition, example_sentence)
+            VALUES (new.id, new.word, new.definition, new.example_sentence);
+        END
+    """,
+}
+
+logger = logging.getLogger(__name__)
+
+
+@cache
+def _has_sqlite_fts_table(database_name: str) -> bool:
+    with connection.cursor() as cursor:
+        return "dailyword_word_fts" in connection.introspection.table_names(cursor)
+
+
+def word_search_filter(search_term: str) -> Q | None:
+    """Filter matching the search term with the full-text index, or None if it can't be used."""
+    terms = re.findall(r"\w+", search_term)
+    if not terms:
+        return None
+
+    if connection.vendor == "postgresql":
+        query = " & ".join(f"{term}:*" for term in terms)
+        return Q(pk__in=RawSQL(POSTGRESQL_QUERY, [query]))
+
+    if connection.vendor == "sqlite" and _has_sqlite_fts_table(
+        str(connection.settings_dict["NAME"])
+    ):
+        query = " ".join(f'"{term}"*' for term in terms)
+        return Q(pk__in=RawSQL(SQLITE_QUERY, [query]))
+
+    return None
+
+
+def restore_sqlite_triggers(using: str = DEFAULT_DB_ALIAS, **kwargs) -> None:
+    """Recreate the triggers of the FTS5 table dropped by a rebuild of dailyword_word, and reindex the words."""
+    database = connections[using]
+    if database.vendor != "sqlite":
+        return
+    with database.cursor() as cursor:
+        if "dailyword_word_fts" not in database.introspection.table_names(cursor):
+            return
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'dailyword_word'"
+        )
+        missing = SQLITE_TRIGGERS.keys() - {name for (name,) in cursor.fetchall()}
+        if not missing:
+            return
+        for name in sorted(missing):
+            cursor.execute(SQLITE_TRIGGERS[name])
+        # The words changed while the triggers were missing aren't indexed
+        cursor.execute(
+            "INSERT INTO dailyword_word_fts(dailyword_word_fts) VALUES ('rebuild')"
+        )
+    logger.warning(
+        "Recreated the full-text search triggers: %s", ", ".join(sorted(missing))
+    )
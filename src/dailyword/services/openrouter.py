@@ -1,11 +1,14 @@
 import json
 import logging
+import time
 from dataclasses import dataclass
 from typing import Any
 
 import requests
 from django.conf import settings
 
+from .. import metrics
+
 logger = logging.getLogger(__name__)
 
 
@@ -41,6 +44,8 @@ class OpenRouterService:
             raise OpenRouterError(
                 "OpenRouter API key not configured. Set OPENROUTER_API_KEY in settings."
             )
+        # Tokens consumed by all the requests made through this instance
+        self.total_tokens = 0
 
     def _make_request(self, payload: dict[str, Any]) -> dict[str, Any]:
         """Make a request to the OpenRouter API."""
@@ -49,14 +54,24 @@ class OpenRouterService:
             "Content-Type": "application/json",
         }
 
+        start = time.perf_counter()
         response = requests.post(self.BASE_URL, json=payload, headers=headers)
+        metrics.observe(
+            "dailyword_openrouter_request_seconds",
+            time.perf_counter() - start,
+            status=response.status_code,
+        )
 
         if response.status_code != 200:
             raise OpenRouterError(
                 f"OpenRouter API error ({response.status_code}): {response.text}"
             )
 
-        return response.json()
+        data = response.json()
+        tokens = (data.get("usage") or {}).get("total_tokens", 0)
+        self.total_tokens += tokens
+        metrics.inc("dailyword_openrouter_tokens_total", tokens)
+        return data
 
     def generate_word_list(
         self,
@@ -0,0 +1,274 @@
+"""
+Compiled snapshots of the dictionaries, so that the image endpoint can pick and read words without the database.
+
+Each dictionary is compiled to `<SNAPSHOTS_DIR>/<slug>.words`, memory-mapped by the processes reading it: the gunicorn
+workers share its pages through the OS page cache, and only the bytes of the words being read are decoded. Files are
+replaced atomically, and recompiled in the background after every change of the dictionary or its words (or by
+`compile_dictionaries`).
+
+File layout, little-endian:
+- header: magic, format version, selection (0 random, 1 rotation), dictionary id, number of words, SHA-256 of the rest
+- ids of the words, ordered by id (int64 each)
+- offsets in the text blob of each field of each word, plus the end of the blob (uint32 each)
+- text blob: the FIELDS of each word, UTF-8 encoded
+"""
+
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import threading
+from array import array
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Dictionary, Word
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"DWRD"
+FORMAT_VERSION = 1
+SUFFIX = ".words"
+HEADER = struct.Struct("<4sHHqI32s")
+FIELDS = ("word", "definition", "example_sentence", "pronunciation", "part_of_speech")
+SELECTIONS = [Dictionary.Selection.RANDOM, Dictionary.Selection.ROTATION]
+
+# Slug -> (identity of the file, its snapshot), in this process
+_snapshots: dict[str, tuple[tuple[int, int, int], Snapshot]] = {}
+_lock = threading.Lock()
+# Dictionaries changed since they were last compiled
+_pending: set[int] = set()
+# Whether a compile is queued and not started yet: the changes committed meanwhile are compiled by it
+_compile_queued = False
+_pending_lock = threading.Lock()
+# A single thread, so that the requests and jobs changing the words don't wait for the compiles
+_compiler = ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-compile")
+
+
+class Snapshot:
+    """A compiled dictionary, memory-mapped."""
+
+    def __init__(self, path: Path) -> None:
+        with path.open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, selection, dictionary_id, word_count, content_hash = (
+                HEADER.unpack_from(self._map)
+            )
+        except struct.error as e:
+            raise ValueError(f"{path} is truncated") from e
+        if magic != MAGIC or version != FORMAT_VERSION or selection >= len(SELECTIONS):
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} snapshot")
+
+        self.content_hash = content_hash
+        self.word_count = word_count
+        # Only its id and selection are known, enough to pick the words
+        self.dictionary = Dictionary(id=dictionary_id, selection=SELECTIONS[selection])
+        self._ids_start = HEADER.size
+        self._offsets_start = self._ids_start + 8 * word_count
+        self._blob_start = self._offsets_start + 4 * (len(FIELDS) * word_count + 1)
+
+        # Checked once when loaded, so that reading a word never goes out of the file nor decodes garbage
+        if len(self._map) < self._blob_start:
+            raise ValueError(f"{path} is truncated")
+        (blob_end,) = struct.unpack_from("<I", self._map, self._blob_start - 4)
+        if len(self._map) != self._blob_start + blob_end:
+            raise ValueError(f"{path} doesn't have the size of its words")
+        rest = hashlib.sha256(self.dictionary.selection.encode())
+        rest.update(memoryview(self._map)[HEADER.size :])
+        if rest.digest() != content_hash:
+            raise ValueError(f"{path} doesn't match its hash")
+
+    def word(self, index: int) -> Word:
+        """The word at the index, among the words ordered by id. Its dictionary is not loaded."""
+        (word_id,) = struct.unpack_from("<q", self._map, self._ids_start + 8 * index)
+        offsets = struct.unpack_from(
+            f"<{len(FIELDS) + 1}I",
+            self._map,
+            self._offsets_start + 4 * len(FIELDS) * index,
+        )
+        text = memoryview(self._map)[self._blob_start :]
+        return Word(
+            id=word_id,
+            dictionary_id=self.dictionary.id,
+            **{
+                field: str(text[start:end], "utf-8")
+                for field, start, end in zip(FIELDS, offsets, offsets[1:], strict=False)
+            },
+        )
+
+    def get_words_for_dates(self, dates: Iterable[date]) -> dict[date, Word | None]:
+        """Same as Dictionary.get_words_for_dates(), without the database."""
+        if not self.word_count:
+            return dict.fromkeys(dates)
+        return {
+            target_date: self.word(
+                self.dictionary.word_index(target_date, self.word_count)
+            )
+            for target_date in dates
+        }
+
+
+def _path(slug: str) -> Path:
+    return settings.SNAPSHOTS_DIR / f"{slug}{SUFFIX}"
+
+
+def load(slug: str) -> Snapshot | None:
+    """The snapshot of a dictionary, or None if it's not compiled (or snapshots are disabled)."""
+    if not settings.SNAPSHOTS_DIR:
+        return None
+    try:
+        stat = _path(slug).stat()
+    except FileNotFoundError:
+        return None
+
+    # A new file replaced the one already mapped
+    identity = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    loaded = _snapshots.get(slug)
+    if loaded is not None and loaded[0] == identity:
+        return loaded[1]
+
+    with _lock:
+        try:
+            snapshot = Snapshot(_path(slug))
+        except FileNotFoundError, ValueError, struct.error:
+            logger.exception("Cannot load the snapshot of %s", slug)
+            return None
+        # Readers of the previous one keep it mapped until they're done
+        _snapshots[slug] = identity, snapshot
+    return snapshot
+
+
+def compile_dictionary(dictionary: Dictionary) -> bool:
+    """Compile a dictionary to its snapshot. Returns False if the snapshot was already up to date."""
+    ids = array("q")
+    offsets = array("I")
+    text = bytearray()
+    for values in dictionary.words.order_by("id").values_list("id", *FIELDS).iterator():
+        ids.append(values[0])
+        for value in values[1:]:
+            offsets.append(len(text))
+            text += value.encode()
+    offsets.append(len(text))
+    if len(text) >= 2**32:
+        raise ValueError(f"{dictionary} is too big for a snapshot")
+
+    # The file is little-endian, whatever the platform
+    if struct.pack("=I", 1) != struct.pack("<I", 1):
+        ids.byteswap()
+        offsets.byteswap()
+    content_hash = hashlib.sha256()
+    for part in (
+        dictionary.selection.encode(),
+        ids.tobytes(),
+        offsets.tobytes(),
+        text,
+    ):
+        content_hash.update(part)
+
+    path = _path(dictionary.slug)
+    if (existing := load(dictionary.slug)) and existing.content_hash == (
+        content_hash.digest()
+    ):
+        return False
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        SELECTIONS.index(dictionary.selection),
+        dictionary.id,
+        len(ids),
+        content_hash.digest(),
+    )
+    settings.SNAPSHOTS_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with tmp_path.open("wb") as f:
+        for part in (header, ids.tobytes(), offsets.tobytes(), text):
+            f.write(part)
+    tmp_path.replace(path)
+    return True
+
+
+def remove_stale() -> list[str]:
+    """Remove the snapshots of dictionaries that don't exist anymore (or were renamed), returning their slugs."""
+    slugs = set(Dictionary.objects.values_list("slug", flat=True))
+    removed = []
+    for path in settings.SNAPSHOTS_DIR.glob(f"*{SUFFIX}"):
+        if path.stem not in slugs:
+            path.unlink(missing_ok=True)
+            removed.append(path.stem)
+    return removed
+
+
+def compile_pending() -> None:
+    """Compile the dictionaries changed since they were last compiled."""
+    from . import caching  # noqa: PLC0415
+
+    global _compile_queued  # noqa: PLW0603
+    with _pending_lock:
+        _compile_queued = False
+        dictionary_ids = list(_pending)
+        _pending.clear()
+    if not dictionary_ids:
+        return
+
+    compiled = False
+    for dictionary_id in dictionary_ids:
+        dictionary = Dictionary.objects.filter(pk=dictionary_id).first()
+        if dictionary is not None:
+            compiled |= compile_dictionary(dictionary)
+    compiled |= bool(remove_stale())
+    if compiled:
+        # Words and images cached meanwhile may come from the previous snapshots
+        caching.invalidate()
+
+
+def _compile_in_worker() -> None:
+    # The compiler thread doesn't go through the request cycle, so connections have to be handled manually
+    close_old_connections()
+    try:
+        compile_pending()
+    except Exception:
+        logger.exception("Failed to compile the snapshots")
+    finally:
+        close_old_connections()
+
+
+def _queue_compile() -> None:
+    global _compile_queued  # noqa: PLW0603
+    with _pending_lock:
+        # Already queued by a previous commit, or done by the callback of a previous change in the same transaction
+        if _compile_queued or not _pending:
+            return
+        _compile_queued = True
+    _compiler.submit(_compile_in_worker)
+
+
+def schedule_compile(dictionary_ids: Iterable[int]) -> None:
+    """Compile the dictionaries in the background once the current transaction is committed."""
+    if not settings.SNAPSHOTS_DIR:
+        return
+    with _pending_lock:
+        _pending.update(dictionary_ids)
+    # Callbacks of rolled back transactions are dropped, but the dictionaries stay pending for the next one
+    transaction.on_commit(_queue_compile)
+
+
+@receiver(post_save, sender=Dictionary)
+@receiver(post_delete, sender=Dictionary)
+def _compile_on_dictionary_change(instance: Dictionary, **kwargs) -> None:
+    schedule_compile([instance.pk])
+
+
+@receiver(post_save, sender=Word)
+@receiver(post_delete, sender=Word)
+def _compile_on_word_change(instance: Word, **kwargs) -> None:
+    schedule_compile([instance.dictionary_id])
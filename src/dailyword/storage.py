@@ -1,13 +1,50 @@
+from collections.abc import Iterator
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
 from django.urls import get_script_prefix
 from whitenoise.storage import CompressedManifestStaticFilesStorage
 
+# Distinct (file, script prefix) pairs whose URL is kept, WhiteNoise alone looks up every file at startup
+URL_CACHE_SIZE = 1024
+
 
 class ScriptPrefixAwareCompressedManifestStaticFilesStorage(
     CompressedManifestStaticFilesStorage
 ):
+    """
+    Prefix the URLs with the script prefix, set by Home Assistant Ingress.
+
+    Admin pages have dozens of `{% static %}` tags: their URLs are memoized per script prefix. The manifest hash is part
+    of the key, so that reloading a different manifest invalidates them.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._cached_url = lru_cache(maxsize=URL_CACHE_SIZE)(self._prefixed_url)
+        self._memoize = True
+
     def url(self, name, force=False):
+        if settings.DEBUG or force:
+            # Not hashed, nor memoized: the files change while developing
+            return self._prefixed_url(name, get_script_prefix(), force=force)
+        if not self._memoize:
+            return self._prefixed_url(name, get_script_prefix(), self.manifest_hash)
+        return self._cached_url(name, get_script_prefix(), self.manifest_hash)
+
+    @contextmanager
+    def unmemoized_urls(self) -> Iterator[None]:
+        """Build the URLs without the memo within the block (in every thread), to measure what it saves."""
+        self._memoize = False
+        try:
+            yield
+        finally:
+            self._memoize = True
+
+    def _prefixed_url(self, name, script_prefix, manifest_hash=None, force=False):
         base_url = super().url(name, force=force)
-        prefix = get_script_prefix().rstrip("/")
+        prefix = script_prefix.rstrip("/")
         if prefix:
             return prefix + base_url
         return base_url
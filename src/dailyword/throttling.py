@@ -0,0 +1,86 @@
+"""
+Per-client rate limiting of the image endpoint, so that a display stuck in a loop can't keep the workers busy.
+
+Each client (its `X-Device-Token` header if validly signed, see `make_device_token()`, otherwise its IP address) has a
+bucket of `IMAGE_RATE_LIMIT_PER_MINUTE` requests, refilled continuously over a minute. Behind the reverse proxies listed
+in `TRUSTED_PROXIES`, the IP address is taken from the `X-Forwarded-For` header. Buckets are counters in the default cache, incremented atomically: they
+are shared by all the workers with Redis or Memcached, and kept by each process with the default local memory cache.
+
+The refill is approximated with a sliding window: the requests of the previous minute count in proportion to the
+part of that minute still within the last 60 seconds.
+"""
+
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.http import HttpRequest
+
+WINDOW = 60
+
+
+_signer = signing.Signer(salt="dailyword.device-token")
+
+
+def make_device_token(device: str) -> str:
+    """Token identifying a display to the rate limiting, made by the `create_device_token` command."""
+    return _signer.sign(device)
+
+
+def client_key(request: HttpRequest) -> str:
+    """Identifier of the client of a request, hashed to fit in any cache key."""
+    client = None
+    if token := request.headers.get("x-device-token"):
+        try:
+            client = "device:" + _signer.unsign(token)
+        except signing.BadSignature:
+            # Otherwise a client would escape the limit with a new token per request
+            pass
+    if client is None:
+        client = client_address(request)
+    return hashlib.sha256(client.encode()).hexdigest()[:32]
+
+
+def client_address(request: HttpRequest) -> str:
+    """IP address of the client, the closest one to the server that isn't a trusted proxy."""
+    address = request.META.get("REMOTE_ADDR", "")
+    if address in settings.TRUSTED_PROXIES:
+        forwarded = request.META.get("HTTP_X_FORWARDED_FOR", "")
+        for forwarded_address in reversed(forwarded.split(",")):
+            address = forwarded_address.strip()
+            if address not in settings.TRUSTED_PROXIES:
+                break
+    return address
+
+
+def consume(client: str) -> int | None:
+    """Take a request from the bucket of a client. Returns None if allowed, otherwise the seconds to wait."""
+    limit = settings.IMAGE_RATE_LIMIT_PER_MINUTE
+    if not limit:
+        return None
+
+    window, elapsed = divmod(time.time(), WINDOW)
+    current_key = f"dailyword:ratelimit:{client}:{int(window)}"
+    previous_key = f"dailyword:ratelimit:{client}:{int(window) - 1}"
+    counts = cache.get_many([previous_key, current_key])
+    previous, current = counts.get(previous_key, 0), counts.get(current_key, 0)
+
+    if previous * (1 - elapsed / WINDOW) + current >= limit:
+        if current < limit:
+            # Until enough of the previous window slides out
+            wait = WINDOW * (previous + current - limit) / previous - elapsed
+        else:
+            # Until enough of this window slides out, during the next one
+            wait = WINDOW - elapsed + WINDOW * (current - limit) / current
+        return max(1, math.ceil(wait))
+
+    if not cache.add(current_key, 1, timeout=2 * WINDOW):
+        try:
+            cache.incr(current_key)
+        except ValueError:
+            # Expired in the meantime
+            cache.set(current_key, 1, timeout=2 * WINDOW)
+    return None
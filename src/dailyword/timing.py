@@ -0,0 +1,45 @@
+"""
+Per-request timing of the phases of serving an image (database lookups, layout, rasterization, encoding).
+
+`ServerTimingMiddleware` starts recording for each request; code being measured wraps its phases in `timed()`.
+Outside of a recorded request (commands, warm-up, benchmarks), `timed()` does nothing.
+"""
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Phase name -> accumulated duration in milliseconds, for the current request
+_timings: ContextVar[dict[str, float] | None] = ContextVar("timings", default=None)
+
+
+@contextmanager
+def recording() -> Iterator[dict[str, float]]:
+    """Record the phases timed inside the block, in the returned dict."""
+    timings: dict[str, float] = {}
+    token = _timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _timings.reset(token)
+
+
+@contextmanager
+def timed(name: str) -> Iterator[None]:
+    """Add the duration of the block to the given phase, if recording."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def server_timing_header(timings: dict[str, float]) -> str:
+    """Format timings as a Server-Timing header value."""
+    return ", ".join(f"{name};dur={duration:.2f}" for name, duration in timings.items())
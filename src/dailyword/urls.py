@@ -1,10 +1,12 @@
 from django.urls import path
 
-from .views import DailyWordImageView
+from .views import DailyWordImageView, MetricsView, ReadinessView
 
 app_name = "dailyword"
 
 urlpatterns = [
+    path("ready/", ReadinessView.as_view(), name="ready"),
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path(
         "<str:dictionary_slug>/<int:width>x<int:height>/",
         DailyWordImageView.as_view(),
@@ -1,21 +1,36 @@
-from datetime import date, timedelta
+from datetime import date, datetime, time, timedelta
 
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import DatabaseError, connection, transaction
 from django.http import HttpRequest, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.decorators import method_decorator
 from django.views import View
 
+from . import caching, metrics, render_cache, throttling, warmup
 from .models import Dictionary
-from .rendering import generate_error_image, generate_word_image
+from .rendering import DICTIONARY_NOT_FOUND, NO_WORDS, cached_error_image
+
+# Browsers and proxies may reuse an image this long, but not after midnight
+IMAGE_MAX_AGE = 5 * 60
+# Delay suggested to the clients whose requests are shed, in seconds
+SHED_RETRY_AFTER = 5
 
 
 class PngResponse(HttpResponse):
-    """HttpResponse subclass for PNG images that automatically sets Content-Length."""
+    """HttpResponse subclass for PNG images that automatically sets Content-Length, and the ETag of rendered images."""
 
     def __init__(self, content: bytes, **kwargs) -> None:
         kwargs["content_type"] = "image/png"
         super().__init__(content, **kwargs)
         self["Content-Length"] = len(content)
+        if isinstance(content, render_cache.Image):
+            self["ETag"] = content.etag
 
 
+# Doesn't write, and with a compiled snapshot doesn't even read the database: no need to open a transaction
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
 class DailyWordImageView(View):
     """
     API endpoint to get the daily word image for a dictionary.
@@ -23,9 +38,18 @@ class DailyWordImageView(View):
     URL: /api/daily-word/<dictionary_slug>/<width>x<height>/
     Example: /api/daily-word/english-vocabulary/512x256/
 
-    The word changes automatically each day based on a deterministic hash.
+    The word changes automatically each day based on a deterministic hash. Images carry an ETag: revalidating an
+    unchanged one gets a 304 response.
     """
 
+    def dispatch(self, request: HttpRequest, *args, **kwargs) -> HttpResponse:
+        response = super().dispatch(request, *args, **kwargs)
+        if response.status_code == 200 and response.has_header("ETag"):
+            return get_conditional_response(
+                request, etag=response["ETag"], response=response
+            )
+        return response
+
     def get(
         self,
         request: HttpRequest,
@@ -37,24 +61,110 @@ class DailyWordImageView(View):
         width = max(100, min(width, 4096))
         height = max(100, min(height, 4096))
 
+        if (
+            retry_after := throttling.consume(throttling.client_key(request))
+        ) is not None:
+            return self.throttled(
+                "rate_limit", retry_after, dictionary_slug, width, height
+            )
+
         try:
-            dictionary = Dictionary.objects.get(slug=dictionary_slug)
+            image_data, stale = caching.get_fresh_or_stale_image(
+                dictionary_slug, date.today(), width, height
+            )
+        except caching.Overloaded:
+            return self.throttled(
+                "overloaded", SHED_RETRY_AFTER, dictionary_slug, width, height
+            )
         except Dictionary.DoesNotExist:
-            image_data = generate_error_image("Dictionary not found", width, height)
+            metrics.inc("dailyword_error_images_total", reason="dictionary_not_found")
+            image_data = cached_error_image(DICTIONARY_NOT_FOUND, width, height)
             return PngResponse(image_data)
 
-        today = date.today()
-        word = dictionary.get_word_for_date(today)
+        if image_data is None:
+            metrics.inc("dailyword_error_images_total", reason="no_words")
+            image_data = cached_error_image(NO_WORDS, width, height)
+            return PngResponse(image_data)
 
-        if word is None:
-            image_data = generate_error_image(
-                "No words in this dictionary", width, height
+        response = PngResponse(image_data)
+        if stale:
+            # Being rendered again: the next request gets the current one
+            patch_cache_control(response, no_cache=True)
+        else:
+            now = datetime.now()
+            until_midnight = datetime.combine(now.date() + timedelta(days=1), time())
+            patch_cache_control(
+                response,
+                max_age=min(IMAGE_MAX_AGE, int((until_midnight - now).total_seconds())),
+                stale_while_revalidate=IMAGE_MAX_AGE,
+                stale_if_error=settings.STALE_GRACE_SECONDS,
             )
-            return PngResponse(image_data)
+        return response
+
+    def throttled(
+        self,
+        reason: str,
+        retry_after: int,
+        dictionary_slug: str,
+        width: int,
+        height: int,
+    ) -> HttpResponse:
+        """Answer without rendering: with the image in the cache if any, otherwise with an error."""
+        image_data = caching.get_cached_image(
+            dictionary_slug, date.today(), width, height
+        )
+        if image_data is not None:
+            metrics.inc(
+                "dailyword_throttled_requests_total", reason=reason, response="image"
+            )
+            response = PngResponse(image_data)
+            patch_cache_control(response, no_cache=True)
+        else:
+            metrics.inc(
+                "dailyword_throttled_requests_total", reason=reason, response="error"
+            )
+            response = HttpResponse(
+                "Too many requests" if reason == "rate_limit" else "Overloaded",
+                content_type="text/plain",
+                status=429 if reason == "rate_limit" else 503,
+            )
+        response["Retry-After"] = retry_after
+        return response
+
+
+@method_decorator(transaction.non_atomic_requests, name="dispatch")
+class ReadinessView(View):
+    """
+    Readiness check: answers once the worker is warmed up, running the warm-up if needed, and while the database is
+    reachable.
+
+    URL: /ready/
+    """
+
+    def get(self, request: HttpRequest) -> HttpResponse:
+        try:
+            warmup.warm_up()
+            # The warm-up runs once, the database is checked by every probe
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+        except DatabaseError:
+            return HttpResponse("Database unavailable", status=503)
+        return HttpResponse("Ready")
 
-        yesterday = today - timedelta(days=1)
-        yesterday_word = dictionary.get_word_for_date(yesterday)
 
-        image_data = generate_word_image(word, width, height, yesterday_word)
+class MetricsView(View):
+    """
+    Metrics in the Prometheus text format, for staff users and the addresses in METRICS_ALLOWED_IPS.
+
+    URL: /metrics/
+    """
 
-        return PngResponse(image_data)
+    def get(self, request: HttpRequest) -> HttpResponse:
+        if not (
+            request.user.is_staff
+            or throttling.client_address(request) in settings.METRICS_ALLOWED_IPS
+        ):
+            raise PermissionDenied
+        return HttpResponse(
+            metrics.export(), content_type="text/plain; version=0.0.4; charset=utf-8"
+        )
@@ -0,0 +1,79 @@
+"""
+Warm-up of the expensive lazy initializations, so that the first requests served by a worker are not slower than the others.
+
+In production, this is triggered by the gunicorn hooks in `config.gunicorn_conf`. Elsewhere, the readiness endpoint triggers it.
+"""
+
+import logging
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+
+from . import caching
+from .models import Dictionary, Word
+from .rendering import (
+    DICTIONARY_NOT_FOUND,
+    NO_WORDS,
+    cached_error_image,
+    generate_word_image,
+)
+
+logger = logging.getLogger(__name__)
+
+# Sizes of the displays we know about, plus the admin preview
+STANDARD_SIZES = [
+    (512, 256),
+    (800, 600),
+    (960, 540),
+]
+
+_lock = threading.Lock()
+_ready = threading.Event()
+
+_SAMPLE_WORD = Word(
+    word="Warm-up",
+    definition="Preparation for an activity by practicing gently beforehand.",
+    example_sentence="A short warm-up makes the first image as fast as the others.",
+    pronunciation="WAWRM-uhp",
+    part_of_speech="noun",
+)
+
+
+def warm_up_rendering() -> None:
+    """
+    Load Pillow's plugins and the fonts for the standard sizes, and render their error images, without touching the
+    database.
+    """
+    for width, height in STANDARD_SIZES:
+        generate_word_image(_SAMPLE_WORD, width, height, yesterday_word=_SAMPLE_WORD)
+        for message in (DICTIONARY_NOT_FOUND, NO_WORDS):
+            cached_error_image(message, width, height)
+
+
+def warm_up() -> None:
+    """Warm up rendering and database access. Only the first call does the work, the next ones wait for it."""
+    with _lock:
+        if _ready.is_set():
+            return
+
+        start = time.perf_counter()
+        warm_up_rendering()
+
+        today = date.today()
+        dictionaries = list(Dictionary.objects.all())
+        for dictionary in dictionaries:
+            # Through the cache, where the first requests will find them
+            if settings.WARMUP_RENDER_IMAGES:
+                for width, height in STANDARD_SIZES:
+                    caching.get_word_image(dictionary.slug, today, width, height)
+            else:
+                caching.get_daily_words(dictionary.slug, today)
+
+        _ready.set()
+        logger.info(
+            "Warm-up done in %.2fs (%d dictionaries)",
+            time.perf_counter() - start,
+            len(dictionaries),
+        )
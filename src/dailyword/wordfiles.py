@@ -0,0 +1,88 @@
+"""
+Streaming readers and writers for the word files used by `import_words` and `export_words`.
+
+Each record is a flat object with the dictionary slug and the word fields, either as one JSON object per line (NDJSON) or as a CSV row with a header.
+"""
+
+import csv
+import hashlib
+import json
+from collections.abc import Iterable, Iterator
+from enum import StrEnum
+from pathlib import Path
+from typing import TextIO
+
+FIELDS = (
+    "dictionary",
+    "word",
+    "definition",
+    "example_sentence",
+    "pronunciation",
+    "part_of_speech",
+)
+REQUIRED_FIELDS = ("dictionary", "word", "definition")
+
+
+class WordFileFormat(StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @classmethod
+    def from_path(cls, path: Path) -> WordFileFormat:
+        """Guess the format from the file extension, defaulting to NDJSON."""
+        if path.suffix.lower() == ".csv":
+            return cls.CSV
+        return cls.NDJSON
+
+
+class WordFileError(Exception):
+    """Exception raised for malformed word files."""
+
+    pass
+
+
+def file_hash(path: Path) -> str:
+    """SHA-256 of the file contents, computed in chunks."""
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_records(file: TextIO, file_format: WordFileFormat) -> Iterator[dict[str, str]]:
+    """Yield the records of a word file one at a time, with all the FIELDS filled in."""
+    if file_format == WordFileFormat.CSV:
+        rows: Iterable[dict] = csv.DictReader(file)
+    else:
+        rows = (json.loads(line) for line in file if line.strip())
+
+    try:
+        for number, row in enumerate(rows, start=1):
+            if not isinstance(row, dict):
+                raise WordFileError(f"Record {number} is not an object")
+            if missing := [field for field in REQUIRED_FIELDS if not row.get(field)]:
+                raise WordFileError(f"Record {number} is missing {', '.join(missing)}")
+            yield {field: row.get(field) or "" for field in FIELDS}
+    except (json.JSONDecodeError, csv.Error) as e:
+        raise WordFileError(f"Malformed file: {e}") from e
+
+
+def write_records(
+    file: TextIO,
+    file_format: WordFileFormat,
+    records: Iterable[tuple[str, ...]],
+) -> int:
+    """Write records (tuples ordered as FIELDS) to a word file, returning how many were written."""
+    count = 0
+    if file_format == WordFileFormat.CSV:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(FIELDS)
+        for record in records:
+            writer.writerow(record)
+            count += 1
+    else:
+        for record in records:
+            file.write(json.dumps(dict(zip(FIELDS, record, strict=True))) + "\n")
+            count += 1
+    return count
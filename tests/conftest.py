@@ -1,8 +1,15 @@
+from unittest.mock import patch
+
 import pytest
 from django.conf import settings
+from django.core.cache import cache
 from django.urls import clear_script_prefix
 from django.utils import translation
 
+from dailyword import caching, render_cache
+from dailyword.models import Dictionary, Word
+from dailyword.rendering import cached_error_image
+
 
 @pytest.fixture(autouse=True)
 def set_test_settings(settings):
@@ -48,3 +55,43 @@ def clear_url_script_prefix():
     """
 
     clear_script_prefix()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache(monkeypatch, tmp_path):
+    """
+    Clear the caches before each test, so that words and images cached by a test don't leak into the next ones.
+    """
+    monkeypatch.setattr(render_cache, "VERSION_DIR", tmp_path / "version")
+    cache.clear()
+    render_cache.clear()
+    cached_error_image.cache_clear()
+
+
+@pytest.fixture
+def dictionary(db):
+    return Dictionary.objects.create(
+        name="Test Dictionary", slug="test-dictionary", prompt="test prompt"
+    )
+
+
+@pytest.fixture
+def word(dictionary):
+    return Word.objects.create(
+        dictionary=dictionary,
+        word="Ephemeral",
+        definition="Lasting for a very short time.",
+        example_sentence="The ephemeral beauty of cherry blossoms.",
+    )
+
+
+@pytest.fixture(autouse=True)
+def refresh_images_synchronously(monkeypatch):
+    """
+    Refresh the stale images in the requests serving them, so that no thread outlives its test, and forget the
+    database failures of the previous tests.
+    """
+    monkeypatch.setattr(caching, "_failing_since", None)
+    with patch("dailyword.caching._refresher") as refresher:
+        refresher.submit.side_effect = lambda function, *args: function(*args)
+        yield
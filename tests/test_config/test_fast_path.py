@@ -0,0 +1,118 @@
+import io
+import sys
+
+import pytest
+from django.conf import settings as django_settings
+from django.core.handlers import base
+from django.core.handlers.wsgi import WSGIHandler
+
+from config.fast_path import FastPathDispatcher, FastPathHandler, is_fast_path
+
+
+def _get(application, path: str) -> tuple[str, dict[str, str], bytes]:
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "REMOTE_ADDR": "127.0.0.1",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.url_scheme": "http",
+        "wsgi.errors": sys.stderr,
+    }
+    started = []
+    response = application(
+        environ, lambda status, headers: started.append((status, dict(headers)))
+    )
+    content = b"".join(response)
+    response.close()
+    status, headers = started[0]
+    return status, headers, content
+
+
+class TestIsFastPath:
+    @pytest.mark.parametrize("path", ["/", "/ready/", "/english-vocabulary/512x256/"])
+    def test_public_endpoints(self, path):
+        assert is_fast_path(path)
+
+    @pytest.mark.parametrize(
+        "path", ["/admin/", "/admin/login/", "/metrics/", "/unknown/"]
+    )
+    def test_other_paths(self, path):
+        assert not is_fast_path(path)
+
+
+class TestFastPathHandler:
+    def test_minimal_middleware(self):
+        # The CSRF middleware is the only one with a process_view()
+        assert FastPathHandler()._view_middleware == []
+        assert WSGIHandler()._view_middleware != []
+
+    def test_independent_of_middleware_setting(self, settings):
+        middleware = ["does.not.Exist"]
+        settings.MIDDLEWARE = middleware
+
+        handler = FastPathHandler()
+
+        assert handler._middleware_chain is not None
+        assert settings.MIDDLEWARE is middleware
+
+    def test_same_as_django_with_same_middleware(self, settings):
+        settings.FAST_PATH_MIDDLEWARE = settings.MIDDLEWARE
+
+        handler, django_handler = FastPathHandler(), WSGIHandler()
+
+        for attribute in (
+            "_view_middleware",
+            "_template_response_middleware",
+            "_exception_middleware",
+        ):
+            assert [
+                method.__self__.__class__ for method in getattr(handler, attribute)
+            ] == [
+                method.__self__.__class__
+                for method in getattr(django_handler, attribute)
+            ]
+
+    def test_settings_restored(self):
+        FastPathHandler()
+
+        assert base.settings is django_settings
+
+    def test_middleware_not_used(self, settings, db):
+        settings.DEBUG = False
+        settings.FAST_PATH_MIDDLEWARE = [
+            "dailyword.middleware.QueryBudgetMiddleware",
+            "django.middleware.common.CommonMiddleware",
+        ]
+
+        status, _, _ = _get(FastPathHandler(), "/")
+
+        assert status.startswith("200")
+
+
+class TestFastPathDispatcher:
+    def test_image(self, word):
+        status, headers, content = _get(
+            FastPathDispatcher(), "/test-dictionary/512x256/"
+        )
+
+        assert status.startswith("200")
+        assert headers["Content-Type"] == "image/png"
+        assert content.startswith(b"\x89PNG")
+        # Skipped middleware
+        assert "X-Frame-Options" not in headers
+        assert "Vary" not in headers
+
+    def test_home(self, db):
+        status, headers, _ = _get(FastPathDispatcher(), "/")
+
+        assert status.startswith("200")
+        assert "X-Frame-Options" not in headers
+
+    def test_other_paths(self, db):
+        status, headers, _ = _get(FastPathDispatcher(), "/admin/login/")
+
+        assert status.startswith("200")
+        assert "X-Frame-Options" in headers
@@ -1,12 +1,19 @@
 import io
 from collections.abc import Iterator
+from contextlib import contextmanager
 from pathlib import Path
 from typing import TYPE_CHECKING
+from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from PIL import Image, ImageChops, ImageEnhance
 from syrupy.extensions.image import PNGImageSnapshotExtension
 
+from dailyword import snapshots
+from dailyword.query_budget import BUDGETS, is_transaction_control
+
 if TYPE_CHECKING:
     from syrupy.types import SerializableData, SerializedData
 
@@ -123,3 +130,42 @@ class FuzzyPNGSnapshotExtension(PNGImageSnapshotExtension):
 @pytest.fixture
 def snapshot_png(snapshot):
     return snapshot.use_extension(FuzzyPNGSnapshotExtension)
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Check that the code inside the block stays within the query budget of the given view.
+
+    Yields the list of the queries, filled when the block exits.
+    """
+
+    @contextmanager
+    def check(view_name: str) -> Iterator[list[str]]:
+        queries: list[str] = []
+        with CaptureQueriesContext(connection) as context:
+            yield queries
+        queries.extend(
+            query["sql"]
+            for query in context.captured_queries
+            if not is_transaction_control(query["sql"])
+        )
+        budget = BUDGETS[view_name]
+        assert len(queries) <= budget, (
+            f"{len(queries)} queries for {view_name}, over the budget of {budget}:\n"
+            + "\n".join(queries)
+        )
+
+    return check
+
+
+@pytest.fixture
+def snapshots_dir(settings, tmp_path):
+    """Enable the compiled snapshots of the dictionaries, in a temporary directory, compiled in the committing thread."""
+    settings.SNAPSHOTS_DIR = tmp_path / "snapshots"
+    with patch("dailyword.snapshots._compiler") as compiler:
+        compiler.submit.side_effect = lambda function, *args: function(*args)
+        yield settings.SNAPSHOTS_DIR
+    snapshots._snapshots.clear()
+    snapshots._pending.clear()
+    snapshots._compile_queued = False
@@ -1,8 +1,17 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
 import pytest
 from django.contrib.admin.sites import AdminSite
 
-from dailyword.admin import DictionaryAdmin
-from dailyword.models import Dictionary, Word
+from dailyword.admin import (
+    CALENDAR_DAYS,
+    MAX_CALENDAR_DAYS,
+    DictionaryAdmin,
+    WordAdmin,
+)
+from dailyword.models import Dictionary, GenerationJob, Word
+from dailyword.query_budget import count_queries
 
 
 @pytest.fixture
@@ -45,6 +54,15 @@ class TestDictionaryAdmin:
         result = admin.word_count(dictionary)
         assert ">2</a>" in result
 
+    def test_word_count_from_annotation(
+        self, admin_site, dictionary, word, rf, django_assert_num_queries
+    ):
+        admin = DictionaryAdmin(Dictionary, admin_site)
+        annotated = admin.get_queryset(rf.get("/")).get()
+        with django_assert_num_queries(0):
+            result = admin.word_count(annotated)
+        assert ">1</a>" in result
+
     def test_word_count_empty(self, admin_site, dictionary):
         admin = DictionaryAdmin(Dictionary, admin_site)
         result = admin.word_count(dictionary)
@@ -72,6 +90,16 @@ class TestAdminIntegration:
         content = response.content.decode()
         assert "Test Dictionary" in content
 
+    def test_dictionary_list_sorted_by_word_count(self, admin_client, dictionary, word):
+        Dictionary.objects.create(name="Empty Dictionary", prompt="test prompt")
+        response = admin_client.get("/admin/dailyword/dictionary/?o=-3")
+        content = response.content.decode()
+        assert content.index("Test Dictionary") < content.index("Empty Dictionary")
+
+        response = admin_client.get("/admin/dailyword/dictionary/?o=3")
+        content = response.content.decode()
+        assert content.index("Empty Dictionary") < content.index("Test Dictionary")
+
     def test_dictionary_change_page(self, admin_client, dictionary):
         response = admin_client.get(
             f"/admin/dailyword/dictionary/{dictionary.id}/change/"
@@ -99,8 +127,155 @@ class TestAdminIntegration:
         content = response.content.decode()
         assert "Example Word" in content
 
+    def test_word_changelist_includes_dictionary(
+        self, admin_site, admin_user, word, rf, django_assert_num_queries
+    ):
+        request = rf.get("/")
+        request.user = admin_user
+        changelist = WordAdmin(Word, admin_site).get_changelist_instance(request)
+        queryset = changelist.get_queryset(request)
+        with django_assert_num_queries(1):
+            assert [str(w) for w in queryset] == ["Example Word (Test Dictionary)"]
+
     def test_word_change_page(self, admin_client, word):
         response = admin_client.get(f"/admin/dailyword/word/{word.id}/change/")
         assert response.status_code == 200
         content = response.content.decode()
         assert "Example Word" in content
+
+    def test_word_change_page_shows_next_date(self, admin_client, word):
+        response = admin_client.get(f"/admin/dailyword/word/{word.id}/change/")
+        assert "Next date" in response.content.decode()
+
+    def test_generate_words_action_asks_for_count(self, admin_client, dictionary):
+        response = admin_client.post(
+            "/admin/dailyword/dictionary/",
+            {"action": "generate_words", "_selected_action": [dictionary.pk]},
+        )
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert 'name="count"' in content
+        assert "Test Dictionary" in content
+        assert not GenerationJob.objects.exists()
+
+    def test_generate_words_action_enqueues_job(self, admin_client, dictionary):
+        with patch("dailyword.jobs._executor"):
+            response = admin_client.post(
+                "/admin/dailyword/dictionary/",
+                {
+                    "action": "generate_words",
+                    "_selected_action": [dictionary.pk],
+                    "count": 15,
+                    "apply": "Generate",
+                },
+            )
+        assert response.status_code == 302
+        job = GenerationJob.objects.get()
+        assert job.dictionary == dictionary
+        assert job.count == 15
+        assert job.status == GenerationJob.Status.PENDING
+
+    def test_generation_job_list_page(self, admin_client, dictionary):
+        GenerationJob.objects.create(dictionary=dictionary, count=5)
+        response = admin_client.get("/admin/dailyword/generationjob/")
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert "Test Dictionary" in content
+        assert 'http-equiv="refresh"' in content
+
+    def test_generation_job_list_page_without_active_jobs(
+        self, admin_client, dictionary
+    ):
+        GenerationJob.objects.create(
+            dictionary=dictionary, count=5, status=GenerationJob.Status.DONE
+        )
+        response = admin_client.get("/admin/dailyword/generationjob/")
+        assert response.status_code == 200
+        assert 'http-equiv="refresh"' not in response.content.decode()
+
+
+class TestDictionaryCalendar:
+    @pytest.fixture
+    def words(self, dictionary):
+        return Word.objects.bulk_create(
+            Word(dictionary=dictionary, word=f"Word{i}", definition=f"Definition {i}")
+            for i in range(20)
+        )
+
+    def test_change_page_links_to_calendar(self, admin_client, dictionary):
+        response = admin_client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/change/"
+        )
+        assert f"/admin/dailyword/dictionary/{dictionary.pk}/calendar/" in (
+            response.content.decode()
+        )
+
+    def test_calendar_page(self, admin_client, dictionary, words):
+        response = admin_client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/calendar/"
+        )
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert content.count("data:image/png;base64,") == CALENDAR_DAYS
+        for i in range(CALENDAR_DAYS):
+            word = dictionary.get_word_for_date(date.today() + timedelta(days=i))
+            assert f"/admin/dailyword/word/{word.pk}/change/" in content
+
+    def test_calendar_page_renders_in_one_batch(self, admin_client, dictionary, words):
+        url = f"/admin/dailyword/dictionary/{dictionary.pk}/calendar/?days=30"
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            admin_client.get(url)
+            admin_client.get(url)
+
+        assert mock_render.call_count == 30
+
+    def test_calendar_queries_independent_of_days(
+        self, admin_client, dictionary, words
+    ):
+        url = f"/admin/dailyword/dictionary/{dictionary.pk}/calendar.json"
+        admin_client.get(url)
+
+        with count_queries() as week:
+            admin_client.get(f"{url}?days=7")
+        with count_queries() as months:
+            admin_client.get(f"{url}?days=60")
+
+        assert week.count == months.count
+
+    def test_calendar_empty_dictionary(self, admin_client, dictionary):
+        response = admin_client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/calendar/"
+        )
+        assert response.status_code == 200
+        assert "data:image/png" not in response.content.decode()
+
+    def test_calendar_json(self, admin_client, dictionary, words):
+        response = admin_client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/calendar.json?days=3"
+        )
+        data = response.json()
+        assert data["dictionary"] == dictionary.slug
+        assert [day["date"] for day in data["days"]] == [
+            (date.today() + timedelta(days=i)).isoformat() for i in range(3)
+        ]
+        word = dictionary.get_word_for_date(date.today())
+        assert data["days"][0]["word"]["id"] == word.pk
+        assert data["days"][0]["word"]["word"] == word.word
+
+    @pytest.mark.parametrize(
+        ("days", "expected"),
+        [("0", 1), ("1000", MAX_CALENDAR_DAYS), ("invalid", CALENDAR_DAYS)],
+    )
+    def test_calendar_days(self, admin_client, dictionary, days, expected):
+        response = admin_client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/calendar.json?days={days}"
+        )
+        assert len(response.json()["days"]) == expected
+
+    def test_calendar_requires_staff(self, client, dictionary):
+        response = client.get(
+            f"/admin/dailyword/dictionary/{dictionary.pk}/calendar.json"
+        )
+        assert response.status_code == 302
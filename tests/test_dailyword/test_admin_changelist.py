@@ -0,0 +1,169 @@
+import re
+from unittest.mock import patch
+
+import pytest
+from django.core.management.sql import emit_post_migrate_signal
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from dailyword import search
+from dailyword.admin import WordAdmin
+from dailyword.models import Dictionary, Word
+
+
+@pytest.fixture
+def words(dictionary):
+    return Word.objects.bulk_create(
+        Word(dictionary=dictionary, word=f"word{i:02d}", definition=f"Definition {i}")
+        for i in range(10)
+    )
+
+
+def _listed_words(content: str) -> list[str]:
+    return re.findall(r">(word\d\d)</a>", content)
+
+
+class TestKeysetPagination:
+    @pytest.fixture(autouse=True)
+    def small_pages(self):
+        with patch.object(WordAdmin, "list_per_page", 4):
+            yield
+
+    def test_follows_cursor(self, admin_client, words):
+        listed = []
+        url = "/admin/dailyword/word/"
+        while url:
+            response = admin_client.get(url)
+            assert response.status_code == 200
+            listed += _listed_words(response.content.decode())
+            next_page = response.context["cl"].next_cursor
+            url = f"/admin/dailyword/word/?after={next_page}" if next_page else None
+
+        assert listed == [w.word for w in words]
+
+    def test_next_page_link(self, admin_client, words):
+        response = admin_client.get("/admin/dailyword/word/")
+
+        assert f'href="?after={words[3].pk}"' in response.content.decode()
+        assert "First page" not in response.content.decode()
+
+    def test_keeps_filters(self, admin_client, words, dictionary):
+        other = Dictionary.objects.create(name="Other", prompt="test prompt")
+        Word.objects.create(dictionary=other, word="word05b", definition="Other")
+
+        response = admin_client.get(
+            f"/admin/dailyword/word/?dictionary__id__exact={dictionary.pk}&after={words[3].pk}"
+        )
+
+        content = response.content.decode()
+        assert _listed_words(content) == ["word04", "word05", "word06", "word07"]
+        assert (
+            f'href="?after={words[7].pk}&amp;dictionary__id__exact={dictionary.pk}"'
+            in content
+        )
+        assert f'href="?dictionary__id__exact={dictionary.pk}"' in content
+
+    def test_invalid_cursor(self, admin_client, words):
+        response = admin_client.get("/admin/dailyword/word/?after=nope")
+
+        assert response.status_code == 302
+        assert response.url.endswith("?e=1")
+
+    def test_sorted_by_column_uses_page_numbers(self, admin_client, words):
+        response = admin_client.get("/admin/dailyword/word/?o=-1")
+
+        assert not response.context["cl"].uses_cursor
+        assert _listed_words(response.content.decode()) == [
+            "word09",
+            "word08",
+            "word07",
+            "word06",
+        ]
+
+
+class TestEstimatedCount:
+    def test_estimates_big_tables(self, admin_client, words):
+        with (
+            patch("dailyword.admin_changelist.ESTIMATE_ABOVE", 5),
+            patch.object(WordAdmin, "list_per_page", 4),
+        ):
+            Word.objects.filter(pk=words[0].pk).delete()
+            response = admin_client.get("/admin/dailyword/word/")
+
+        # From the highest id, including the deleted row
+        assert "About 10 words" in response.content.decode()
+
+    def test_exact_count_when_filtered(self, admin_client, words, dictionary):
+        # The dictionary filter is ignored when there is a single dictionary
+        Dictionary.objects.create(name="Other", prompt="test prompt")
+        with patch("dailyword.admin_changelist.ESTIMATE_ABOVE", 5):
+            Word.objects.filter(pk=words[0].pk).delete()
+            response = admin_client.get(
+                f"/admin/dailyword/word/?dictionary__id__exact={dictionary.pk}"
+            )
+
+        assert response.context["cl"].result_count == 9
+
+    def test_exact_count_for_small_tables(self, admin_client, words):
+        response = admin_client.get("/admin/dailyword/word/")
+
+        assert response.context["cl"].result_count == 10
+        assert not response.context["cl"].paginator.count_is_estimated
+
+
+class TestSearch:
+    def _search(self, admin_client, term: str) -> list[str]:
+        response = admin_client.get("/admin/dailyword/word/", {"q": term})
+        return [str(word.word) for word in response.context["cl"].result_list]
+
+    def test_word_prefix(self, admin_client, dictionary):
+        Word.objects.create(dictionary=dictionary, word="Ephemeral", definition="Short")
+        Word.objects.create(dictionary=dictionary, word="Eternal", definition="Long")
+
+        assert self._search(admin_client, "ephem") == ["Ephemeral"]
+
+    def test_all_terms_in_any_field(self, admin_client, dictionary):
+        Word.objects.create(
+            dictionary=dictionary,
+            word="Ephemeral",
+            definition="Lasting a short time",
+            example_sentence="Cherry blossoms",
+        )
+        Word.objects.create(dictionary=dictionary, word="Brief", definition="Short")
+
+        assert self._search(admin_client, "short cherry") == ["Ephemeral"]
+        assert self._search(admin_client, "short") == ["Brief", "Ephemeral"]
+
+    def test_follows_updates_and_deletes(self, admin_client, dictionary):
+        word = Word.objects.create(dictionary=dictionary, word="Old", definition="x")
+
+        word.word = "New"
+        word.save()
+        assert self._search(admin_client, "old") == []
+        assert self._search(admin_client, "new") == ["New"]
+
+        word.delete()
+        assert self._search(admin_client, "new") == []
+
+    def test_special_characters_only(self, admin_client, dictionary):
+        Word.objects.create(dictionary=dictionary, word="a-b", definition="x")
+
+        assert self._search(admin_client, "-") == ["a-b"]
+
+    @pytest.mark.skipif(connection.vendor != "sqlite", reason="SQLite triggers")
+    def test_triggers_restored_after_migrations(self, admin_client, dictionary):
+        # Like a migration rebuilding the table
+        with connection.cursor() as cursor:
+            for name in search.SQLITE_TRIGGERS:
+                cursor.execute(f"DROP TRIGGER {name}")
+        Word.objects.create(dictionary=dictionary, word="Unindexed", definition="x")
+
+        emit_post_migrate_signal(verbosity=0, interactive=False, db=DEFAULT_DB_ALIAS)
+
+        assert self._search(admin_client, "unindexed") == ["Unindexed"]
+        Word.objects.create(dictionary=dictionary, word="Indexed", definition="x")
+        assert self._search(admin_client, "indexed") == ["Indexed"]
+
+    def test_help_text(self, admin_client):
+        response = admin_client.get("/admin/dailyword/word/")
+
+        assert "starting with each term" in response.text
@@ -0,0 +1,309 @@
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from django.contrib.admin.sites import AdminSite
+from django.core.management import call_command
+from django.db import OperationalError
+
+from dailyword import caching
+from dailyword.admin import DictionaryAdmin
+from dailyword.models import Dictionary
+from dailyword.query_budget import count_queries
+
+TODAY = date(2024, 1, 2)
+
+
+def _database_down():
+    return patch(
+        "django.db.backends.utils.CursorWrapper.execute",
+        side_effect=OperationalError("database is locked"),
+    )
+
+
+class TestGetDailyWords:
+    def test_words(self, dictionary, word):
+        daily_words = caching.get_daily_words("test-dictionary", TODAY)
+
+        assert daily_words.word == word
+        assert daily_words.yesterday_word == word
+
+    def test_empty_dictionary(self, dictionary):
+        daily_words = caching.get_daily_words("test-dictionary", TODAY)
+
+        assert daily_words.word is None
+        assert daily_words.yesterday_word is None
+
+    def test_unknown_dictionary(self, db):
+        with pytest.raises(Dictionary.DoesNotExist):
+            caching.get_daily_words("nonexistent", TODAY)
+
+    def test_unknown_dictionary_cached(self, db, django_assert_num_queries):
+        with pytest.raises(Dictionary.DoesNotExist):
+            caching.get_daily_words("nonexistent", TODAY)
+
+        with django_assert_num_queries(0), pytest.raises(Dictionary.DoesNotExist):
+            caching.get_daily_words("nonexistent", TODAY)
+
+    def test_found_once_created(self, db):
+        with pytest.raises(Dictionary.DoesNotExist):
+            caching.get_daily_words("test-dictionary", TODAY)
+        Dictionary.objects.create(
+            name="Test Dictionary", slug="test-dictionary", prompt="test prompt"
+        )
+
+        assert caching.get_daily_words("test-dictionary", TODAY).word is None
+
+    def test_cached(self, word, django_assert_num_queries):
+        caching.get_daily_words("test-dictionary", TODAY)
+
+        with django_assert_num_queries(0):
+            assert caching.get_daily_words("test-dictionary", TODAY).word == word
+
+    def test_invalidated_when_words_change(self, dictionary, word):
+        caching.get_daily_words("test-dictionary", TODAY)
+        word.delete()
+
+        assert caching.get_daily_words("test-dictionary", TODAY).word is None
+
+    def test_invalidated_when_dictionary_changes(self, dictionary, word):
+        caching.get_daily_words("test-dictionary", TODAY)
+        dictionary.slug = "renamed"
+        dictionary.save()
+
+        with pytest.raises(Dictionary.DoesNotExist):
+            caching.get_daily_words("test-dictionary", TODAY)
+
+    def test_by_date(self, word, django_assert_num_queries):
+        caching.get_daily_words("test-dictionary", TODAY)
+
+        # Dictionary, number of words, words
+        with django_assert_num_queries(3):
+            caching.get_daily_words("test-dictionary", date(2024, 1, 3))
+
+
+class TestGetWordImage:
+    def test_rendered_once(self, word, django_assert_num_queries):
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            assert caching.get_word_image("test-dictionary", TODAY, 512, 256) == (
+                b"image"
+            )
+            with django_assert_num_queries(0):
+                assert caching.get_word_image("test-dictionary", TODAY, 512, 256) == (
+                    b"image"
+                )
+
+        mock_render.assert_called_once_with(word, 512, 256, word)
+
+    def test_by_size(self, word):
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            caching.get_word_image("test-dictionary", TODAY, 512, 256)
+            caching.get_word_image("test-dictionary", TODAY, 800, 600)
+
+        assert mock_render.call_count == 2
+
+    def test_rendered_again_when_words_change(self, dictionary, word):
+        caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        word.definition = "Changed"
+        word.save()
+
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            caching.get_word_image("test-dictionary", TODAY, 512, 256)
+
+        assert mock_render.call_args.args[0].definition == "Changed"
+
+    def test_empty_dictionary(self, dictionary):
+        assert caching.get_word_image("test-dictionary", TODAY, 512, 256) is None
+
+    def test_invalidated_by_import(self, dictionary, word, tmp_path):
+        caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        path = tmp_path / "words.ndjson"
+        path.write_text(
+            '{"dictionary": "test-dictionary", "word": "Ephemeral", "definition": "Imported"}\n'
+        )
+        call_command("import_words", str(path))
+
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            caching.get_word_image("test-dictionary", TODAY, 512, 256)
+
+        assert mock_render.call_args.args[0].definition == "Imported"
+
+
+class TestAdminPreview:
+    def test_shares_the_image_view_cache(self, client, dictionary, word):
+        admin = DictionaryAdmin(Dictionary, AdminSite())
+        admin.todays_image(dictionary)
+
+        with count_queries() as queries:
+            assert client.get("/test-dictionary/512x256/").status_code == 200
+            assert client.get("/test-dictionary/512x256/").status_code == 200
+
+        assert queries.count == 0
+
+
+class TestGetWordImages:
+    def test_renders_missing_images(self, dictionary, word):
+        dates = [TODAY, date(2024, 1, 3)]
+        words = dictionary.get_words_for_dates([date(2024, 1, 1), *dates])
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            caching.get_word_image("test-dictionary", TODAY, 256, 128)
+            images = caching.get_word_images("test-dictionary", dates, words, 256, 128)
+
+        assert images == {TODAY: b"image", date(2024, 1, 3): b"image"}
+        assert mock_render.call_count == 2
+
+    def test_same_as_single_image(self, dictionary, word):
+        words = dictionary.get_words_for_dates([date(2024, 1, 1), TODAY])
+        images = caching.get_word_images("test-dictionary", [TODAY], words, 256, 128)
+        caching.invalidate()
+
+        assert images[TODAY] == caching.get_word_image(
+            "test-dictionary", TODAY, 256, 128
+        )
+
+    def test_dates_without_words(self, dictionary):
+        words = dictionary.get_words_for_dates([date(2024, 1, 1), TODAY])
+
+        assert (
+            caching.get_word_images("test-dictionary", [TODAY], words, 256, 128) == {}
+        )
+
+
+class TestGetFreshOrStaleImage:
+    def test_fresh(self, word):
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+
+        assert caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256) == (
+            image,
+            False,
+        )
+
+    def test_stale_at_rollover(self, word):
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"tomorrow"
+        ) as mock_render:
+            assert caching.get_fresh_or_stale_image(
+                "test-dictionary", date(2024, 1, 3), 512, 256
+            ) == (image, True)
+            assert caching.get_fresh_or_stale_image(
+                "test-dictionary", date(2024, 1, 3), 512, 256
+            ) == (b"tomorrow", False)
+
+        mock_render.assert_called_once()
+
+    def test_stale_after_change(self, word):
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        word.definition = "Changed"
+        word.save()
+
+        stale_image, stale = caching.get_fresh_or_stale_image(
+            "test-dictionary", TODAY, 512, 256
+        )
+        assert (stale_image, stale) == (image, True)
+        fresh_image, stale = caching.get_fresh_or_stale_image(
+            "test-dictionary", TODAY, 512, 256
+        )
+        assert fresh_image != image
+        assert not stale
+
+    def test_refreshed_once(self, word):
+        caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        caching.invalidate()
+
+        with patch("dailyword.caching._refresher") as refresher:
+            caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+            caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+
+        refresher.submit.assert_called_once()
+
+    def test_rendered_without_last_image(self, word):
+        image, stale = caching.get_fresh_or_stale_image(
+            "test-dictionary", TODAY, 512, 256
+        )
+
+        assert image == caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        assert not stale
+
+    def test_deleted_dictionary(self, dictionary, word):
+        caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        dictionary.delete()
+
+        caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+        with pytest.raises(Dictionary.DoesNotExist):
+            caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+
+    def test_database_failure_within_grace(self, word):
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        caching.invalidate()
+
+        with _database_down():
+            for _ in range(2):
+                assert caching.get_fresh_or_stale_image(
+                    "test-dictionary", TODAY, 512, 256
+                ) == (image, True)
+
+    def test_database_failure_after_grace(self, settings, word):
+        settings.STALE_GRACE_SECONDS = 0
+        caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        caching.invalidate()
+
+        with _database_down():
+            caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+            with pytest.raises(OperationalError):
+                caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+
+
+class TestStaleWords:
+    def test_database_failure_within_grace(self, word):
+        caching.get_daily_words("test-dictionary", TODAY)
+        caching.invalidate()
+
+        with _database_down():
+            assert caching.get_daily_words("test-dictionary", TODAY).word == word
+
+    def test_database_failure_after_grace(self, settings, word):
+        settings.STALE_GRACE_SECONDS = 0
+        caching.get_daily_words("test-dictionary", TODAY)
+        caching.invalidate()
+
+        with _database_down(), pytest.raises(OperationalError):
+            caching.get_daily_words("test-dictionary", TODAY)
+
+
+class TestLoadShedding:
+    def test_overloaded(self, settings, word):
+        settings.RENDER_QUEUE_LIMIT = 0
+
+        with pytest.raises(caching.Overloaded):
+            caching.get_fresh_or_stale_image("test-dictionary", TODAY, 512, 256)
+
+    def test_stale_not_refreshed(self, settings, word):
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        caching.invalidate()
+        settings.RENDER_QUEUE_LIMIT = 0
+
+        with patch("dailyword.caching._refresher") as refresher:
+            assert caching.get_fresh_or_stale_image(
+                "test-dictionary", TODAY, 512, 256
+            ) == (image, True)
+
+        refresher.submit.assert_not_called()
+
+    def test_cached_image(self, word):
+        assert caching.get_cached_image("test-dictionary", TODAY, 512, 256) is None
+        image = caching.get_word_image("test-dictionary", TODAY, 512, 256)
+        caching.invalidate()
+
+        assert caching.get_cached_image("test-dictionary", TODAY, 512, 256) == image
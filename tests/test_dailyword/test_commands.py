@@ -1,11 +1,17 @@
+import json
+import random
 from io import StringIO
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.contrib.auth.models import User
 from django.core.management import call_command
 from django.core.management.base import CommandError
+from django.test import RequestFactory
 
-from dailyword.models import Dictionary, Word
+from dailyword import snapshots, throttling
+from dailyword.management.commands.loadtest import Result, _plan_requests, _summarize
+from dailyword.models import Dictionary, GenerationJob, ImportedFile, Word
 from dailyword.services.openrouter import (
     OpenRouterError,
     WordDefinition,
@@ -68,6 +74,17 @@ class TestCreateDictionaryCommand:
         dictionary = Dictionary.objects.get(name="New Dictionary")
         assert dictionary.prompt == "vocabulary words related to cooking"
 
+    def test_create_dictionary_in_rotation(self, db):
+        call_command(
+            "create_dictionary",
+            "New Dictionary",
+            "--prompt=test prompt",
+            "--rotation",
+        )
+
+        dictionary = Dictionary.objects.get(name="New Dictionary")
+        assert dictionary.selection == Dictionary.Selection.ROTATION
+
     def test_create_dictionary_duplicate_name(self, dictionary):
         with pytest.raises(CommandError) as exc_info:
             call_command(
@@ -246,3 +263,562 @@ class TestGenerateWordsCommand:
             )
 
         assert "Failed to generate" in str(exc_info.value)
+
+
+class TestExportWordsCommand:
+    @pytest.fixture
+    def words(self, dictionary, word):
+        other = Dictionary.objects.create(name="Other", prompt="other")
+        Word.objects.create(
+            dictionary=other,
+            word="Other word",
+            definition="Defined, with a comma",
+            example_sentence='Say "hello"',
+        )
+
+    def test_export_ndjson(self, words, tmp_path):
+        output = tmp_path / "words.ndjson"
+        out = StringIO()
+        call_command("export_words", str(output), stdout=out)
+
+        records = [json.loads(line) for line in output.read_text().splitlines()]
+        assert records == [
+            {
+                "dictionary": "test-dictionary",
+                "word": "Existing",
+                "definition": "An existing word",
+                "example_sentence": "",
+                "pronunciation": "",
+                "part_of_speech": "",
+            },
+            {
+                "dictionary": "other",
+                "word": "Other word",
+                "definition": "Defined, with a comma",
+                "example_sentence": 'Say "hello"',
+                "pronunciation": "",
+                "part_of_speech": "",
+            },
+        ]
+        assert "Exported 2 words" in out.getvalue()
+
+    def test_export_csv(self, words, tmp_path):
+        output = tmp_path / "words.csv"
+        call_command("export_words", str(output))
+
+        lines = output.read_text().splitlines()
+        assert lines[0] == (
+            "dictionary,word,definition,example_sentence,pronunciation,part_of_speech"
+        )
+        assert len(lines) == 3
+
+    def test_export_single_dictionary_to_stdout(self, words):
+        out = StringIO()
+        call_command("export_words", "-", "--dictionary=other", stdout=out)
+
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        assert [record["word"] for record in records] == ["Other word"]
+
+    def test_export_dictionary_not_found(self, words, tmp_path):
+        with pytest.raises(CommandError) as exc_info:
+            call_command(
+                "export_words", str(tmp_path / "words.ndjson"), "--dictionary=nope"
+            )
+
+        assert "not found" in str(exc_info.value)
+
+
+class TestImportWordsCommand:
+    def test_roundtrip(self, dictionary, word, tmp_path):
+        for file_name in ("words.ndjson", "words.csv"):
+            path = tmp_path / file_name
+            call_command("export_words", str(path))
+            Word.objects.all().delete()
+
+            call_command("import_words", str(path), "--force")
+
+            assert list(Word.objects.values_list("word", "definition")) == [
+                ("Existing", "An existing word")
+            ]
+
+    def test_upserts_and_creates_dictionaries(self, dictionary, word, tmp_path):
+        path = tmp_path / "words.ndjson"
+        path.write_text(
+            json.dumps(
+                {
+                    "dictionary": "test-dictionary",
+                    "word": "Existing",
+                    "definition": "Updated definition",
+                }
+            )
+            + "\n\n"
+            + json.dumps(
+                {
+                    "dictionary": "new-dictionary",
+                    "word": "Fresh",
+                    "definition": "Brand new",
+                    "part_of_speech": "adjective",
+                }
+            )
+            + "\n"
+        )
+
+        out = StringIO()
+        call_command("import_words", str(path), "--batch-size=1", stdout=out)
+
+        word.refresh_from_db()
+        assert word.definition == "Updated definition"
+        fresh = Word.objects.get(word="Fresh")
+        assert fresh.dictionary.slug == "new-dictionary"
+        assert fresh.part_of_speech == "adjective"
+        assert "Imported 2 words" in out.getvalue()
+        assert "Created dictionary: new-dictionary" in out.getvalue()
+        assert "Created dictionary: test-dictionary" not in out.getvalue()
+
+    def test_deduplicates_within_batch(self, dictionary, tmp_path):
+        path = tmp_path / "words.csv"
+        path.write_text(
+            "dictionary,word,definition\n"
+            "test-dictionary,Twice,First\n"
+            "test-dictionary,Twice,Second\n"
+        )
+
+        call_command("import_words", str(path))
+
+        assert Word.objects.get(word="Twice").definition == "Second"
+
+    def test_skips_already_imported_file(self, dictionary, tmp_path):
+        path = tmp_path / "words.csv"
+        path.write_text("dictionary,word,definition\ntest-dictionary,Once,Defined\n")
+        call_command("import_words", str(path))
+        Word.objects.all().delete()
+
+        out = StringIO()
+        call_command("import_words", str(path), stdout=out)
+
+        assert "already imported" in out.getvalue()
+        assert not Word.objects.exists()
+        imported = ImportedFile.objects.get()
+        assert imported.name == "words.csv"
+        assert imported.record_count == 1
+
+    def test_invalid_record(self, dictionary, tmp_path):
+        path = tmp_path / "words.ndjson"
+        path.write_text(json.dumps({"dictionary": "test-dictionary", "word": "x"}))
+
+        with pytest.raises(CommandError) as exc_info:
+            call_command("import_words", str(path))
+
+        assert "missing definition" in str(exc_info.value)
+        assert not ImportedFile.objects.exists()
+
+    @pytest.mark.parametrize("line", ["[1, 2]", '"word"', "42"])
+    def test_record_not_an_object(self, dictionary, tmp_path, line):
+        path = tmp_path / "words.ndjson"
+        path.write_text(line + "\n")
+
+        with pytest.raises(CommandError) as exc_info:
+            call_command("import_words", str(path))
+
+        assert "Record 1 is not an object" in str(exc_info.value)
+
+    def test_malformed_file(self, dictionary, tmp_path):
+        path = tmp_path / "words.ndjson"
+        path.write_text("{not json")
+
+        with pytest.raises(CommandError) as exc_info:
+            call_command("import_words", str(path))
+
+        assert "Malformed" in str(exc_info.value)
+
+
+class TestStartupCommand:
+    @pytest.fixture
+    def fixture_file(self, tmp_path):
+        path = tmp_path / "dailyword.json"
+        path.write_text(
+            json.dumps(
+                [
+                    {
+                        "model": "dailyword.dictionary",
+                        "pk": 100,
+                        "fields": {
+                            "created_at": "2024-01-01T00:00:00Z",
+                            "updated_at": "2024-01-01T00:00:00Z",
+                            "name": "Loaded",
+                            "slug": "loaded",
+                            "prompt": "loaded prompt",
+                        },
+                    }
+                ]
+            )
+        )
+        return path
+
+    def test_skips_migrations_when_up_to_date(self, db, caplog):
+        with (
+            caplog.at_level("INFO"),
+            patch("dailyword.management.commands.startup.call_command") as mock_call,
+        ):
+            call_command("startup")
+
+        mock_call.assert_not_called()
+        assert "migrations: skipped, nothing to apply" in caplog.text
+
+    def test_fails_orphaned_jobs(self, db, caplog):
+        dictionary = Dictionary.objects.create(name="Test", prompt="test prompt")
+        job = GenerationJob.objects.create(
+            dictionary=dictionary, count=2, status=GenerationJob.Status.RUNNING
+        )
+
+        with caplog.at_level("INFO"):
+            call_command("startup")
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.Status.FAILED
+        assert "orphaned jobs: 1 marked as failed" in caplog.text
+
+    def test_applies_pending_migrations(self, db, caplog):
+        with (
+            caplog.at_level("INFO"),
+            patch(
+                "dailyword.management.commands.startup.MigrationExecutor"
+            ) as mock_executor,
+            patch("dailyword.management.commands.startup.call_command") as mock_call,
+        ):
+            mock_executor.return_value.migration_plan.return_value = [MagicMock()]
+            call_command("startup")
+
+        mock_call.assert_called_once_with("migrate", interactive=False)
+        assert "migrations: applied 1" in caplog.text
+
+    def test_loads_fixture_once(self, db, fixture_file, caplog):
+        with caplog.at_level("INFO"):
+            call_command("startup", f"--fixture={fixture_file}")
+        assert Dictionary.objects.filter(slug="loaded").exists()
+        assert f"{fixture_file}: loaded" in caplog.text
+        assert "1 separate Django boot(s) avoided" in caplog.text
+
+        Dictionary.objects.all().delete()
+        caplog.clear()
+        with caplog.at_level("INFO"):
+            call_command("startup", f"--fixture={fixture_file}")
+        assert not Dictionary.objects.exists()
+        assert f"{fixture_file}: skipped, already loaded" in caplog.text
+
+    def test_loads_words_file(self, dictionary, tmp_path, caplog):
+        path = tmp_path / "dailyword.csv"
+        path.write_text("dictionary,word,definition\ntest-dictionary,Loaded,Defined\n")
+
+        with caplog.at_level("INFO"):
+            call_command("startup", f"--fixture={path}")
+
+        assert Word.objects.filter(word="Loaded").exists()
+        assert ImportedFile.objects.filter(name="dailyword.csv").exists()
+        # Not loaded by a separate process before
+        assert "0 separate Django boot(s) avoided" in caplog.text
+
+    def test_ignores_missing_fixture(self, db, tmp_path, caplog):
+        with caplog.at_level("INFO"):
+            call_command("startup", f"--fixture={tmp_path / 'missing.json'}")
+
+        assert "missing.json" not in caplog.text
+        assert not ImportedFile.objects.exists()
+
+    def test_runs_command(self, db):
+        with patch("dailyword.management.commands.startup.os.execvp") as mock_exec:
+            call_command("startup", "--", "gunicorn", "--workers", "2")
+
+        mock_exec.assert_called_once_with("gunicorn", ["gunicorn", "--workers", "2"])
+
+
+class TestCompileDictionariesCommand:
+    def test_compiles_all(self, snapshots_dir, word):
+        out = StringIO()
+        call_command("compile_dictionaries", stdout=out)
+
+        assert "test-dictionary: 1 words" in out.getvalue()
+        assert "Compiled 1 dictionaries (0 up to date)" in out.getvalue()
+        assert snapshots.load("test-dictionary").word(0).word == "Existing"
+
+    def test_skips_up_to_date(self, snapshots_dir, word):
+        call_command("compile_dictionaries", stdout=StringIO())
+        out = StringIO()
+        call_command("compile_dictionaries", stdout=out)
+
+        assert "Compiled 0 dictionaries (1 up to date)" in out.getvalue()
+
+    def test_selected_dictionary(self, snapshots_dir, word):
+        Dictionary.objects.create(name="Other", slug="other", prompt="test")
+        call_command(
+            "compile_dictionaries", "--dictionary=test-dictionary", stdout=StringIO()
+        )
+
+        assert snapshots.load("test-dictionary") is not None
+        assert snapshots.load("other") is None
+
+    def test_removes_stale(self, snapshots_dir, word):
+        call_command("compile_dictionaries", stdout=StringIO())
+        Dictionary.objects.filter(pk=word.dictionary_id).update(slug="renamed")
+        out = StringIO()
+        call_command("compile_dictionaries", stdout=out)
+
+        assert "test-dictionary: removed" in out.getvalue()
+        assert not (snapshots_dir / "test-dictionary.words").exists()
+
+    def test_unknown_dictionary(self, snapshots_dir, db):
+        with pytest.raises(CommandError, match="Dictionary not found: missing"):
+            call_command("compile_dictionaries", "--dictionary=missing")
+
+    def test_disabled(self, db):
+        with pytest.raises(CommandError, match="SNAPSHOTS_DIR"):
+            call_command("compile_dictionaries")
+
+    def test_import_words_compiles(
+        self, snapshots_dir, dictionary, tmp_path, django_capture_on_commit_callbacks
+    ):
+        path = tmp_path / "words.csv"
+        path.write_text(
+            "dictionary,word,definition\ntest-dictionary,Imported,Defined\n"
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("import_words", str(path), stdout=StringIO())
+
+        assert snapshots.load("test-dictionary").word(0).word == "Imported"
+
+    def test_startup_compiles(self, snapshots_dir, word, caplog):
+        with caplog.at_level("INFO"):
+            call_command("startup", stdout=StringIO())
+
+        assert snapshots.load("test-dictionary") is not None
+        assert "snapshots: compiled" in caplog.text
+
+
+class TestBenchmarkColdStartCommand:
+    IMPORTTIME = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       100 |        100 |   django.utils\n"
+        "import time:       200 |        300 | django\n"
+        "import time:        50 |         50 | dailyword\n"
+    )
+
+    @pytest.fixture
+    def mock_run(self):
+        with (
+            patch(
+                "dailyword.management.commands.benchmark_cold_start.time.perf_counter",
+                side_effect=[10.0, 12.0],
+            ),
+            patch(
+                "dailyword.management.commands.benchmark_cold_start.subprocess.run"
+            ) as mock,
+        ):
+            mock.return_value = MagicMock(
+                returncode=0,
+                stdout=json.dumps(
+                    {
+                        "interpreter_and_imports": 10.5,
+                        "app_registry": 10.75,
+                        "wsgi_handler": 10.8,
+                        "first_render": 11.0,
+                    }
+                ),
+                stderr=self.IMPORTTIME,
+            )
+            yield mock
+
+    def test_reports_phases_and_imports(self, mock_run):
+        out = StringIO()
+        call_command("benchmark_cold_start", "--runs=1", stdout=out)
+
+        output = out.getvalue()
+        assert "interpreter_and_imports     500.0 ms" in output
+        assert "app_registry                250.0 ms" in output
+        assert "total                      1000.0 ms" in output
+        assert "process_exit               1000.0 ms" in output
+        assert "django.utils" not in output
+        assert output.index("django ") < output.index("dailyword ")
+        assert mock_run.call_args.args[0][1:3] == ["-X", "importtime"]
+
+    def test_fails_over_threshold(self, mock_run):
+        with pytest.raises(CommandError) as exc_info:
+            call_command("benchmark_cold_start", "--runs=1", "--max-total=0.5")
+
+        assert "more than the 0.50s allowed" in str(exc_info.value)
+
+    def test_child_failure(self, mock_run):
+        mock_run.return_value.returncode = 1
+        mock_run.return_value.stderr = "Traceback: boom"
+
+        with pytest.raises(CommandError) as exc_info:
+            call_command("benchmark_cold_start", "--runs=1")
+
+        assert "boom" in str(exc_info.value)
+
+
+class TestBenchmarkDispatchCommand:
+    def test_reports_both_stacks(self, db):
+        out = StringIO()
+        call_command("benchmark_dispatch", "--requests=2", stdout=out)
+
+        output = out.getvalue()
+        assert "/ready/" in output
+        assert "complete" in output
+        assert "fast path" in output
+        assert "saved" in output
+
+    def test_images(self, db):
+        dictionary = Dictionary.objects.create(
+            name="Test Dictionary", slug="test-dictionary", prompt="test prompt"
+        )
+        Word.objects.create(dictionary=dictionary, word="Ephemeral", definition="Short")
+        out = StringIO()
+        call_command(
+            "benchmark_dispatch",
+            "--requests=2",
+            "--dictionary=test-dictionary",
+            stdout=out,
+        )
+
+        assert "/test-dictionary/512x256/" in out.getvalue()
+
+
+class TestCreateDeviceTokenCommand:
+    def test_signed_token(self):
+        out = StringIO()
+        call_command("create_device_token", "kitchen", stdout=out)
+
+        token = out.getvalue().strip()
+        request = RequestFactory().get("/", headers={"x-device-token": token})
+        assert throttling.client_key(request) == throttling.client_key(
+            RequestFactory().get(
+                "/", headers={"x-device-token": token}, REMOTE_ADDR="10.0.0.2"
+            )
+        )
+
+
+class TestBenchmarkAdminCommand:
+    def test_reports_static_urls(self, db):
+        out = StringIO()
+        call_command("benchmark_admin", "--requests=2", "--path=/admin/", stdout=out)
+
+        output = out.getvalue()
+        assert "static URLs per page" in output
+        assert "memoized" in output
+        assert "uncached" in output
+        assert not User.objects.exists()
+
+
+class TestBenchmarkRenderingCommand:
+    def test_renders_matrix(self):
+        out = StringIO()
+        call_command("benchmark_rendering", "--size=100x100", "--repeat=1", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        # 3 definition lengths, with/without example, with/without yesterday, plus the error image
+        assert len(lines) == 13
+        assert lines[0].startswith("word 100x100 short +example +yesterday")
+        assert lines[-1].startswith("error 100x100")
+
+    def test_saves_and_compares_baseline(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        call_command(
+            "benchmark_rendering",
+            "--size=100x100",
+            "--repeat=1",
+            f"--baseline={baseline}",
+            "--save",
+        )
+        cases = json.loads(baseline.read_text())["cases"]
+        assert set(cases["error 100x100"]) == {
+            "time_ms",
+            "peak_memory_bytes",
+            "size_bytes",
+        }
+
+        out = StringIO()
+        call_command(
+            "benchmark_rendering",
+            "--size=100x100",
+            "--repeat=1",
+            f"--baseline={baseline}",
+            "--tolerance=1000",
+            stdout=out,
+        )
+        assert "No regressions" in out.getvalue()
+
+    def test_flags_regressions(self, tmp_path):
+        baseline = tmp_path / "baseline.json"
+        baseline.write_text(
+            json.dumps(
+                {
+                    "cases": {
+                        "error 100x100": {
+                            "time_ms": 1000,
+                            "peak_memory_bytes": 1,
+                            "size_bytes": 1000000,
+                        }
+                    }
+                }
+            )
+        )
+
+        with pytest.raises(CommandError) as exc_info:
+            call_command(
+                "benchmark_rendering",
+                "--size=100x100",
+                "--repeat=1",
+                f"--baseline={baseline}",
+            )
+
+        message = str(exc_info.value)
+        assert "error 100x100 peak_memory_bytes" in message
+        assert "time_ms" not in message
+        assert "size_bytes" not in message
+
+    def test_invalid_size(self):
+        with pytest.raises(CommandError) as exc_info:
+            call_command("benchmark_rendering", "--size=big")
+
+        assert "WIDTHxHEIGHT" in str(exc_info.value)
+
+
+class TestLoadtestCommand:
+    def test_plan_is_deterministic(self):
+        def plan():
+            return _plan_requests(
+                random.Random(42), 100, ["a", "b"], ["512x256"], 0.1, 0.2
+            )
+
+        assert plan() == plan()
+
+    def test_plan_mix(self):
+        plan = _plan_requests(
+            random.Random(0), 2000, ["a", "b"], ["512x256", "800x600"], 0.1, 0.3
+        )
+
+        misses = [p for p in plan if p.path.startswith("/missing-")]
+        assert 100 < len(misses) < 300
+        assert 400 < sum(p.conditional for p in plan) < 800
+        assert {p.path for p in plan if p not in misses} == {
+            "/a/512x256/",
+            "/a/800x600/",
+            "/b/512x256/",
+            "/b/800x600/",
+        }
+
+    def test_summary(self):
+        results = [Result("/a/512x256/", 200, i / 1000) for i in range(1, 101)]
+        results.append(Result("/missing/512x256/", 404, 0.001))
+
+        lines = _summarize(results, 2.0)
+
+        assert lines[0] == "Requests:   101 in 2.00s (50.5 req/s)"
+        assert "p99 99.0 ms" in lines[1]
+        assert "max 100.0 ms" in lines[1]
+        assert lines[2] == "Statuses:   200: 100, 404: 1"
+
+    def test_summary_single_request(self):
+        lines = _summarize([Result("/a/512x256/", 200, 0.01)], 0.5)
+
+        assert "p50 10.0 ms" in lines[1]
@@ -0,0 +1,106 @@
+import gzip
+
+import brotli
+import pytest
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+from django.utils.cache import patch_cache_control
+
+from dailyword.middleware import CompressionMiddleware, _compress_cached
+
+HTML = b"<html><body>" + b"<p>Ephemeral: lasting for a very short time.</p>" * 50
+PNG = b"\x89PNG\r\n\x1a\n" + bytes(range(256)) * 4
+
+
+@pytest.fixture(autouse=True)
+def clear_compressed():
+    _compress_cached.cache_clear()
+
+
+def _serve(response, accept_encoding="gzip, deflate, br"):
+    request = RequestFactory().get("/", headers={"accept-encoding": accept_encoding})
+    return CompressionMiddleware(lambda request: response)(request)
+
+
+class TestCompressionMiddleware:
+    def test_brotli(self):
+        response = _serve(HttpResponse(HTML))
+
+        assert response["Content-Encoding"] == "br"
+        assert response["Vary"] == "Accept-Encoding"
+        assert brotli.decompress(response.content) == HTML
+        assert int(response["Content-Length"]) == len(response.content)
+
+    def test_gzip(self):
+        response = _serve(HttpResponse(HTML), "gzip")
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(response.content) == HTML
+
+    def test_not_accepted(self):
+        response = _serve(HttpResponse(HTML), "identity")
+
+        assert not response.has_header("Content-Encoding")
+        assert response["Vary"] == "Accept-Encoding"
+        assert response.content == HTML
+
+    def test_json(self):
+        response = _serve(HttpResponse(HTML, content_type="application/json"))
+
+        assert response["Content-Encoding"] == "br"
+
+    def test_png_left_alone(self):
+        response = _serve(HttpResponse(PNG, content_type="image/png"))
+
+        assert not response.has_header("Content-Encoding")
+        assert not response.has_header("Vary")
+        assert response.content == PNG
+
+    def test_short_left_alone(self):
+        response = _serve(HttpResponse(b"<p>Short</p>"))
+
+        assert not response.has_header("Content-Encoding")
+
+    def test_already_encoded(self):
+        original = HttpResponse(HTML)
+        original["Content-Encoding"] = "identity"
+
+        assert _serve(original).content == HTML
+
+    def test_weak_etag(self):
+        original = HttpResponse(HTML)
+        original["ETag"] = '"abc"'
+
+        assert _serve(original)["ETag"] == 'W/"abc"'
+
+    def test_streaming_gzip(self):
+        response = _serve(StreamingHttpResponse(iter([HTML, HTML])))
+
+        assert response["Content-Encoding"] == "gzip"
+        assert gzip.decompress(b"".join(response.streaming_content)) == HTML * 2
+
+    def test_cacheable_compressed_once(self):
+        for _ in range(2):
+            original = HttpResponse(HTML)
+            patch_cache_control(original, max_age=60)
+            _serve(original, "gzip")
+
+        assert _compress_cached.cache_info().hits == 1
+
+    def test_private_not_cached(self):
+        for _ in range(2):
+            original = HttpResponse(HTML)
+            patch_cache_control(original, max_age=60, private=True)
+            _serve(original, "gzip")
+
+        assert _compress_cached.cache_info().currsize == 0
+
+    def test_logs_ratio(self, caplog):
+        with caplog.at_level("INFO", logger="dailyword.compression"):
+            _serve(HttpResponse(HTML))
+
+        (record,) = caplog.records
+        assert record.encoding == "br"
+        assert record.size == len(HTML)
+        assert record.compressed_size < len(HTML)
+        assert record.cpu_time >= 0
@@ -1,12 +1,16 @@
 import pytest
 from django.contrib import admin
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_in
 from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.db import connection
 from django.http import HttpResponse
 from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import path, reverse
 
-from dailyword.middleware import HA_SUPERVISOR_IP
+from dailyword.middleware import HA_SUPERVISOR_IP, INGRESS_USERS_CACHE_KEY
 
 
 def reverse_view(request):
@@ -21,11 +25,16 @@ def check_flag_view(request):
     return HttpResponse(str(request.is_ingress))
 
 
+def whoami_view(request):
+    return HttpResponse(request.user.username)
+
+
 urlpatterns = [
     path("", lambda request: HttpResponse(), name="home"),
     path("reverse/", reverse_view, name="reverse"),
     path("static-url/", static_url_view, name="static-url"),
     path("check-flag/", check_flag_view, name="check-flag"),
+    path("whoami/", whoami_view, name="whoami"),
     path("admin/", admin.site.urls),
 ]
 
@@ -98,6 +107,48 @@ class TestStaticURL:
         response = client.get("/static-url/")
         assert response.content.startswith(b"/static/")
 
+    def test_memoized_per_prefix(self, client, db):
+        # WhiteNoise looks up all the files on its first request
+        client.get("/static-url/")
+        staticfiles_storage._cached_url.cache_clear()
+        response = client.get("/static-url/")
+        client.get("/static-url/", **INGRESS_HEADERS)
+        ingress_response = client.get("/static-url/", **INGRESS_HEADERS)
+
+        assert response.content.startswith(b"/static/")
+        assert ingress_response.content.startswith(b"/api/hassio_ingress/abc123/")
+        assert staticfiles_storage._cached_url.cache_info().hits == 1
+
+    def test_unmemoized_urls(self, client, db):
+        client.get("/static-url/")
+        staticfiles_storage._cached_url.cache_clear()
+
+        with staticfiles_storage.unmemoized_urls():
+            response = client.get("/static-url/", **INGRESS_HEADERS)
+        client.get("/static-url/", **INGRESS_HEADERS)
+
+        assert response.content.startswith(b"/api/hassio_ingress/abc123/")
+        assert staticfiles_storage._cached_url.cache_info().hits == 0
+
+    def test_new_manifest_invalidates(self, client, db, monkeypatch):
+        client.get("/static-url/", **INGRESS_HEADERS)
+        monkeypatch.setattr(
+            staticfiles_storage,
+            "hashed_files",
+            {
+                **staticfiles_storage.hashed_files,
+                "admin/css/base.css": "admin/css/base.new.css",
+            },
+        )
+        monkeypatch.setattr(staticfiles_storage, "manifest_hash", "new")
+
+        response = client.get("/static-url/", **INGRESS_HEADERS)
+
+        assert (
+            response.content
+            == b"/api/hassio_ingress/abc123/static/admin/css/base.new.css"
+        )
+
 
 class TestAutoLogin:
     def test_creates_user_with_staff_and_superuser(self, client, db):
@@ -124,6 +175,96 @@ class TestAutoLogin:
 
         assert User.objects.count() == 0
 
+    def test_logs_in_once_per_session(self, client, db):
+        logins = []
+
+        def logged_in(user, **kwargs):
+            logins.append(user.username)
+
+        user_logged_in.connect(logged_in)
+        try:
+            client.get("/", **INGRESS_HEADERS)
+            session_key = client.session.session_key
+            client.get("/", **INGRESS_HEADERS)
+            client.get("/", **{**INGRESS_HEADERS, "HTTP_X_REMOTE_USER_NAME": "other"})
+            client.get("/", **INGRESS_HEADERS)
+        finally:
+            user_logged_in.disconnect(logged_in)
+
+        assert logins == ["hauser", "other"]
+        assert client.session.session_key != session_key
+
+    def test_switches_user(self, client, db):
+        client.get("/", **INGRESS_HEADERS)
+        response = client.get(
+            "/whoami/", **{**INGRESS_HEADERS, "HTTP_X_REMOTE_USER_NAME": "other"}
+        )
+
+        assert response.content == b"other"
+
+    def test_recreates_deleted_user(self, client, db):
+        client.get("/", **INGRESS_HEADERS)
+        User.objects.get(username="hauser").delete()
+
+        response = client.get("/whoami/", **INGRESS_HEADERS)
+
+        assert response.content == b"hauser"
+        assert User.objects.filter(username="hauser").exists()
+
+    def test_user_deleted_by_another_process(self, client, db):
+        Client().get("/", **INGRESS_HEADERS)
+        users = cache.get(INGRESS_USERS_CACHE_KEY)
+        User.objects.get(username="hauser").delete()
+        # The other process didn't invalidate the map of this one
+        cache.set(INGRESS_USERS_CACHE_KEY, users)
+
+        response = client.get("/whoami/", **INGRESS_HEADERS)
+
+        assert response.content == b"hauser"
+
+    def test_switches_back_to_user(self, client, db):
+        client.get("/", **INGRESS_HEADERS)
+        client.get("/", **{**INGRESS_HEADERS, "HTTP_X_REMOTE_USER_NAME": "other"})
+        response = client.get("/whoami/", **INGRESS_HEADERS)
+
+        assert response.content == b"hauser"
+
+    def test_renamed_user(self, client, db):
+        client.get("/", **INGRESS_HEADERS)
+        User.objects.filter(username="hauser").update(username="renamed")
+        User.objects.get(username="renamed").save()
+
+        response = client.get("/whoami/", **INGRESS_HEADERS)
+
+        assert response.content == b"hauser"
+        assert User.objects.filter(username="hauser").exists()
+
+
+class TestQueries:
+    def test_no_extra_query_once_logged_in(self, client, db):
+        client.get("/whoami/", **INGRESS_HEADERS)
+        with CaptureQueriesContext(connection) as ingress_queries:
+            response = client.get("/whoami/", **INGRESS_HEADERS)
+        assert response.content == b"hauser"
+
+        # The same session and user loads, without ingress
+        direct_client = Client()
+        direct_client.force_login(User.objects.get(username="hauser"))
+        with CaptureQueriesContext(connection) as direct_queries:
+            response = direct_client.get("/whoami/")
+        assert response.content == b"hauser"
+
+        assert len(ingress_queries) == len(direct_queries)
+
+    def test_only_session_loaded(self, client, db):
+        client.get("/", **INGRESS_HEADERS)
+        with CaptureQueriesContext(connection) as queries:
+            client.get("/", **INGRESS_HEADERS)
+
+        tables = [query["sql"] for query in queries if "FROM" in query["sql"]]
+        assert len(tables) == 1
+        assert "django_session" in tables[0]
+
 
 class TestXFrameOptions:
     def test_removed_for_ingress(self, client, db):
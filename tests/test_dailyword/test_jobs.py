@@ -0,0 +1,144 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from dailyword.jobs import enqueue_generation, fail_orphaned_jobs, run_generation
+from dailyword.models import GenerationJob, Word
+from dailyword.services.openrouter import OpenRouterError, WordDefinition
+
+
+@pytest.fixture
+def mock_service():
+    with patch("dailyword.jobs.OpenRouterService") as mock:
+        service_instance = MagicMock()
+        service_instance.total_tokens = 123
+        mock.return_value = service_instance
+        yield service_instance
+
+
+class TestEnqueueGeneration:
+    def test_submits_job_on_commit(
+        self, dictionary, django_capture_on_commit_callbacks
+    ):
+        with (
+            patch("dailyword.jobs._executor") as mock_executor,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            job = enqueue_generation(dictionary, 5)
+            mock_executor.submit.assert_not_called()
+
+        assert job.status == GenerationJob.Status.PENDING
+        assert job.count == 5
+        mock_executor.submit.assert_called_once()
+        assert mock_executor.submit.call_args.args[1] == job.pk
+
+
+class TestRunGeneration:
+    def test_creates_words_and_tracks_progress(self, dictionary, mock_service):
+        Word.objects.create(dictionary=dictionary, word="Existing", definition="Old")
+        mock_service.generate_word_list.return_value = [
+            WordDefinition(
+                word="Generated",
+                definition="Definition",
+                example_sentence="Example",
+                pronunciation="pron",
+                part_of_speech="noun",
+            ),
+            WordDefinition(
+                word="Existing",
+                definition="New definition",
+                example_sentence="",
+                pronunciation="",
+                part_of_speech="",
+            ),
+        ]
+        job = GenerationJob.objects.create(dictionary=dictionary, count=2)
+
+        run_generation(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.Status.DONE
+        assert job.created_count == 1
+        assert job.skipped_count == 1
+        assert job.total_tokens == 123
+        assert job.started_at is not None
+        assert job.finished_at is not None
+        assert job.elapsed is not None
+        assert Word.objects.filter(dictionary=dictionary, word="Generated").exists()
+        assert Word.objects.get(word="Existing").definition == "Old"
+        mock_service.generate_word_list.assert_called_once_with(
+            prompt=dictionary.prompt,
+            count=2,
+        )
+
+    def test_compiles_snapshot_once(
+        self,
+        snapshots_dir,
+        dictionary,
+        mock_service,
+        django_capture_on_commit_callbacks,
+    ):
+        mock_service.generate_word_list.return_value = [
+            WordDefinition(
+                word=f"Generated{i}",
+                definition="Definition",
+                example_sentence="",
+                pronunciation="",
+                part_of_speech="",
+            )
+            for i in range(5)
+        ]
+        job = GenerationJob.objects.create(dictionary=dictionary, count=5)
+
+        with (
+            patch(
+                "dailyword.snapshots.compile_dictionary", return_value=True
+            ) as mock_compile,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            run_generation(job.pk)
+
+        mock_compile.assert_called_once()
+
+    def test_records_failure(self, dictionary, mock_service):
+        mock_service.generate_word_list.side_effect = OpenRouterError("API error")
+        job = GenerationJob.objects.create(dictionary=dictionary, count=2)
+
+        run_generation(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.Status.FAILED
+        assert job.error == "API error"
+        assert job.total_tokens == 123
+        assert job.finished_at is not None
+
+    def test_records_missing_api_key(self, dictionary, settings):
+        settings.OPENROUTER_API_KEY = ""
+        job = GenerationJob.objects.create(dictionary=dictionary, count=2)
+
+        run_generation(job.pk)
+
+        job.refresh_from_db()
+        assert job.status == GenerationJob.Status.FAILED
+        assert "API key" in job.error
+
+
+class TestFailOrphanedJobs:
+    def test_fails_pending_and_running(self, dictionary):
+        pending = GenerationJob.objects.create(dictionary=dictionary, count=2)
+        running = GenerationJob.objects.create(
+            dictionary=dictionary, count=2, status=GenerationJob.Status.RUNNING
+        )
+        done = GenerationJob.objects.create(
+            dictionary=dictionary, count=2, status=GenerationJob.Status.DONE
+        )
+
+        assert fail_orphaned_jobs() == 2
+
+        for job in (pending, running):
+            job.refresh_from_db()
+            assert job.status == GenerationJob.Status.FAILED
+            assert "restart" in job.error
+            assert job.finished_at is not None
+        done.refresh_from_db()
+        assert done.status == GenerationJob.Status.DONE
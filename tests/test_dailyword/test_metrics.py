@@ -0,0 +1,252 @@
+import json
+import os
+import subprocess
+import time
+
+import pytest
+from django.contrib.auth.models import User
+from django.test import Client
+
+from dailyword import metrics, rendering
+from dailyword.models import Word
+from dailyword.rendering import generate_word_image, size_class
+
+
+@pytest.fixture(autouse=True)
+def empty_metrics(monkeypatch):
+    metrics._reset_after_fork()
+    monkeypatch.setattr(rendering, "_font_cache_at_fork", (0, 0))
+    yield
+    metrics._reset_after_fork()
+
+
+@pytest.fixture
+def metrics_dir(settings, tmp_path):
+    settings.METRICS_DIR = tmp_path
+    return tmp_path
+
+
+class TestRegistry:
+    def test_counter(self):
+        metrics.inc("dailyword_error_images_total", reason="no_words")
+        metrics.inc("dailyword_error_images_total", 2, reason="no_words")
+
+        assert 'dailyword_error_images_total{reason="no_words"} 3\n' in metrics.export()
+
+    def test_histogram(self):
+        for value in (0, 3, 3, 1000):
+            metrics.observe("dailyword_db_queries_per_request", value)
+
+        lines = metrics.export().splitlines()
+        assert 'dailyword_db_queries_per_request_bucket{le="0"} 1' in lines
+        assert 'dailyword_db_queries_per_request_bucket{le="2"} 1' in lines
+        assert 'dailyword_db_queries_per_request_bucket{le="5"} 3' in lines
+        assert 'dailyword_db_queries_per_request_bucket{le="100"} 3' in lines
+        assert 'dailyword_db_queries_per_request_bucket{le="+Inf"} 4' in lines
+        assert "dailyword_db_queries_per_request_sum 1006" in lines
+        assert "dailyword_db_queries_per_request_count 4" in lines
+
+    def test_unknown_metric(self):
+        with pytest.raises(KeyError):
+            metrics.inc("unknown_total")
+
+    def test_renders_and_font_cache(self):
+        generate_word_image(Word(word="Test", definition="A test."), 512, 256)
+
+        exported = metrics.export()
+        assert (
+            'dailyword_render_seconds_count{kind="word",size_class="small"} 1'
+            in exported
+        )
+        assert "dailyword_font_cache_size " in exported
+
+    def test_font_cache_counted_from_fork(self):
+        generate_word_image(Word(word="Test", definition="A test."), 512, 256)
+        # Like a gunicorn worker forked from the master, after its warm-up
+        rendering._remember_font_cache_at_fork()
+
+        exported = metrics.export()
+
+        assert "dailyword_font_cache_hits_total 0\n" in exported
+        assert "dailyword_font_cache_misses_total 0\n" in exported
+
+    def test_size_class(self):
+        assert size_class(512, 256) == "small"
+        assert size_class(1024, 768) == "medium"
+        assert size_class(1920, 1080) == "large"
+        assert size_class(4096, 4096) == "huge"
+
+
+class TestMultiprocess:
+    def test_sums_processes(self, metrics_dir):
+        metrics.inc("dailyword_error_images_total", reason="no_words")
+        metrics.observe("dailyword_db_queries_per_request", 1)
+        # Another worker, possibly exited since
+        (metrics_dir / "1-other.json").write_text(
+            json.dumps(
+                {
+                    "values": [
+                        ["dailyword_error_images_total", [["reason", "no_words"]], 2]
+                    ],
+                    "histograms": [
+                        [
+                            "dailyword_db_queries_per_request",
+                            [],
+                            [0, 1, 0, 0, 0, 0, 0, 0, 0, 1],
+                        ]
+                    ],
+                }
+            )
+        )
+
+        exported = metrics.export()
+
+        assert 'dailyword_error_images_total{reason="no_words"} 3' in exported
+        assert "dailyword_db_queries_per_request_count 2" in exported
+        assert "dailyword_db_queries_per_request_sum 2" in exported
+
+    def test_gauges_of_exited_processes_dropped(self, metrics_dir):
+        metrics.inc("dailyword_error_images_total", reason="no_words")
+        before = metrics.export()
+        process = subprocess.Popen(["true"])
+        process.wait()
+        (metrics_dir / f"{process.pid}-exited.json").write_text(
+            json.dumps(
+                {
+                    "values": [
+                        ["dailyword_render_cache_memory_bytes", [], 1000],
+                        ["dailyword_error_images_total", [["reason", "no_words"]], 2],
+                    ],
+                    "histograms": [],
+                }
+            )
+        )
+
+        exported = metrics.export()
+
+        assert 'dailyword_error_images_total{reason="no_words"} 3' in exported
+        gauge = [
+            line
+            for line in exported.splitlines()
+            if line.startswith("dailyword_render_cache_memory_bytes ")
+        ]
+        assert gauge == [
+            line
+            for line in before.splitlines()
+            if line.startswith("dailyword_render_cache_memory_bytes ")
+        ]
+
+    def test_exited_processes_folded(self, metrics_dir):
+        for _ in range(2):
+            process = subprocess.Popen(["true"])
+            process.wait()
+            (metrics_dir / f"{process.pid}-exited.json").write_text(
+                json.dumps(
+                    {
+                        "values": [
+                            [
+                                "dailyword_error_images_total",
+                                [["reason", "no_words"]],
+                                2,
+                            ]
+                        ],
+                        "histograms": [
+                            [
+                                "dailyword_db_queries_per_request",
+                                [],
+                                [0, 1, 0, 0, 0, 0, 0, 0, 0, 1],
+                            ]
+                        ],
+                    }
+                )
+            )
+
+        metrics.export()
+        exported = metrics.export()
+
+        assert sorted(path.name for path in metrics_dir.glob("*.json")) == sorted(
+            [metrics.EXITED_FILE_NAME, metrics._file_name]
+        )
+        assert 'dailyword_error_images_total{reason="no_words"} 4' in exported
+        assert "dailyword_db_queries_per_request_count 2" in exported
+
+    def test_flushes_periodically(self, metrics_dir, monkeypatch):
+        monkeypatch.setattr(metrics, "FLUSH_INTERVAL", 0.01)
+        metrics.inc("dailyword_error_images_total", reason="no_words")
+
+        metrics.start_flushing()
+        flusher = metrics._flusher
+        metrics.start_flushing()
+        assert metrics._flusher is flusher
+
+        for _ in range(100):
+            if paths := list(metrics_dir.glob("*.json")):
+                break
+            time.sleep(0.01)
+        (path,) = paths
+        assert path.name.startswith(f"{os.getpid()}-")
+        assert "dailyword_error_images_total" in path.read_text()
+
+        metrics._reset_after_fork()
+        flusher.join(timeout=1)
+        assert not flusher.is_alive()
+
+    def test_fork_starts_empty(self, metrics_dir):
+        metrics.inc("dailyword_error_images_total", reason="no_words")
+        metrics.flush()
+
+        metrics._reset_after_fork()
+        metrics.flush()
+
+        assert len(list(metrics_dir.glob("*.json"))) == 2
+        assert "no_words" not in (metrics_dir / metrics._file_name).read_text()
+        # The counters of the previous process are kept
+        assert 'dailyword_error_images_total{reason="no_words"} 1' in metrics.export()
+
+
+class TestMetricsView:
+    def test_allowed_address(self, db):
+        response = Client(REMOTE_ADDR="127.0.0.1").get("/metrics/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"].startswith("text/plain; version=0.0.4")
+        assert "# TYPE dailyword_render_seconds histogram" in response.text
+
+    def test_denied_address(self, db):
+        response = Client(REMOTE_ADDR="10.0.0.1").get("/metrics/")
+
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize(
+        ("forwarded_for", "status_code"), [("127.0.0.1", 200), ("10.0.0.1", 403)]
+    )
+    def test_behind_trusted_proxy(self, db, settings, forwarded_for, status_code):
+        settings.TRUSTED_PROXIES = ["10.0.0.2"]
+
+        response = Client(
+            REMOTE_ADDR="10.0.0.2", HTTP_X_FORWARDED_FOR=forwarded_for
+        ).get("/metrics/")
+
+        assert response.status_code == status_code
+
+    def test_staff_user(self, db):
+        client = Client(REMOTE_ADDR="10.0.0.1")
+        client.force_login(User.objects.create(username="staff", is_staff=True))
+
+        assert client.get("/metrics/").status_code == 200
+
+    def test_request_metrics(self, word):
+        client = Client(REMOTE_ADDR="127.0.0.1")
+        client.get("/test-dictionary/512x256/")
+        client.get("/missing/512x256/")
+
+        exported = client.get("/metrics/").text
+        assert (
+            'dailyword_error_images_total{reason="dictionary_not_found"} 1' in exported
+        )
+        assert (
+            'dailyword_render_seconds_count{kind="error",size_class="small"} 1'
+            in exported
+        )
+        # The scrape itself isn't counted yet
+        assert "dailyword_db_queries_per_request_count 2" in exported
@@ -1,4 +1,6 @@
-from datetime import date
+import hashlib
+from datetime import date, timedelta
+from unittest.mock import patch
 
 import pytest
 from django.db import IntegrityError
@@ -110,11 +112,119 @@ class TestDictionary:
         assert result1 is not None
         assert result2 is not None
 
+    def test_get_word_for_date_same_as_whole_list(self, dictionary):
+        Word.objects.bulk_create(
+            Word(dictionary=dictionary, word=f"Word{i}", definition=f"Definition {i}")
+            for i in range(50)
+        )
+        words = list(dictionary.words.order_by("id"))
+
+        for day in range(1, 29):
+            target_date = date(2024, 2, day)
+            hash_value = int(
+                hashlib.md5(
+                    f"{dictionary.id}-{target_date.isoformat()}".encode()
+                ).hexdigest(),
+                16,
+            )
+            expected = words[hash_value % len(words)]
+            assert dictionary.get_word_for_date(target_date) == expected
+
+    def test_get_words_for_dates(self, dictionary, django_assert_num_queries):
+        Word.objects.bulk_create(
+            Word(dictionary=dictionary, word=f"Word{i}", definition=f"Definition {i}")
+            for i in range(20)
+        )
+        dates = [date(2024, 3, day) for day in range(1, 31)]
+
+        with django_assert_num_queries(2):
+            words = dictionary.get_words_for_dates(dates)
+
+        assert words == {
+            target_date: dictionary.get_word_for_date(target_date)
+            for target_date in dates
+        }
+
+    def test_get_words_for_dates_empty_dictionary(self, dictionary):
+        assert dictionary.get_words_for_dates([date(2024, 1, 1)]) == {
+            date(2024, 1, 1): None
+        }
+
     def test_get_absolute_url(self, dictionary):
         url = dictionary.get_absolute_url()
         assert url == "/test-dictionary/512x256/"
 
 
+class TestRotation:
+    @pytest.fixture
+    def words(self, dictionary):
+        dictionary.selection = Dictionary.Selection.ROTATION
+        dictionary.save()
+        return Word.objects.bulk_create(
+            Word(dictionary=dictionary, word=f"Word{i}", definition=f"Definition {i}")
+            for i in range(30)
+        )
+
+    def _rotation_dates(self, start: date, count: int) -> list[date]:
+        # Rotations start on the multiples of the number of words
+        first_day = start.toordinal() // count * count
+        return [date.fromordinal(first_day + i) for i in range(count)]
+
+    def test_every_word_once_per_rotation(self, dictionary, words):
+        for start in (date(2024, 1, 1), date(2025, 6, 1)):
+            dates = self._rotation_dates(start, len(words))
+            assigned = dictionary.get_words_for_dates(dates).values()
+
+            assert sorted(word.pk for word in assigned) == sorted(
+                word.pk for word in words
+            )
+
+    def test_rotations_differ(self, dictionary, words):
+        first = self._rotation_dates(date(2024, 1, 1), len(words))
+        second = [day + timedelta(days=len(words)) for day in first]
+
+        assert list(dictionary.get_words_for_dates(first).values()) != list(
+            dictionary.get_words_for_dates(second).values()
+        )
+
+    def test_next_date_for_word(self, dictionary, words):
+        from_date = date(2024, 1, 1)
+        dates = [from_date + timedelta(days=i) for i in range(2 * len(words))]
+        assigned = dictionary.get_words_for_dates(dates)
+
+        for word in words:
+            next_date = dictionary.get_next_date_for_word(word, from_date)
+            assert assigned[next_date] == word
+            assert all(assigned[day] != word for day in dates if day < next_date)
+
+    def test_next_date_for_word_queries(
+        self, dictionary, words, django_assert_num_queries
+    ):
+        with django_assert_num_queries(2):
+            dictionary.get_next_date_for_word(words[0], date(2024, 1, 1))
+
+
+class TestNextDateForWordAtRandom:
+    def test_next_date(self, dictionary):
+        words = Word.objects.bulk_create(
+            Word(dictionary=dictionary, word=f"Word{i}", definition=f"Definition {i}")
+            for i in range(5)
+        )
+        from_date = date(2024, 1, 1)
+
+        for word in words:
+            next_date = dictionary.get_next_date_for_word(word, from_date)
+            assert next_date >= from_date
+            assert dictionary.get_word_for_date(next_date) == word
+
+    def test_not_found(self, dictionary, word):
+        other = Word.objects.create(
+            dictionary=dictionary, word="Other", definition="Other"
+        )
+        with patch("dailyword.models.RANDOM_SEARCH_DAYS", 0):
+            assert dictionary.get_next_date_for_word(other, date(2024, 1, 1)) is None
+
+
 class TestWord:
     def test_str(self, word):
         assert str(word) == "Example (Test Dictionary)"
@@ -0,0 +1,144 @@
+import marshal
+import pstats
+from unittest.mock import patch
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import signing
+from django.test import Client
+
+from dailyword import profiling
+from dailyword.models import RequestProfile
+
+
+@pytest.fixture
+def token(admin_user):
+    return profiling.make_token(admin_user)
+
+
+class TestToken:
+    def test_roundtrip(self, token):
+        assert profiling.check_token(token) == "admin"
+
+    def test_invalid(self):
+        assert profiling.check_token("admin:forged") is None
+
+    def test_expired(self, token):
+        with patch.object(signing.TimestampSigner, "timestamp", return_value="0"):
+            expired = profiling.make_token(User(username="admin"))
+        assert profiling.check_token(expired) is None
+
+
+class TestProfilingMiddleware:
+    def test_query_parameter(self, word, token):
+        response = Client().get("/test-dictionary/512x256/", {"_profile": token})
+
+        assert response.status_code == 200
+        profile = RequestProfile.objects.get()
+        assert response["X-Profile-Id"] == str(profile.pk)
+        assert profile.method == "GET"
+        assert profile.path == "/test-dictionary/512x256/"
+        assert profile.status_code == 200
+        assert profile.requested_by == "admin"
+        assert profile.duration > 0
+        functions = {function for _, _, function in marshal.loads(profile.stats)}
+        assert "generate_word_image" in functions
+
+    def test_header(self, word, token):
+        response = Client().get(
+            "/test-dictionary/512x256/", headers={"X-Profile": token}
+        )
+
+        assert response["X-Profile-Id"] == str(RequestProfile.objects.get().pk)
+
+    def test_without_token(self, word):
+        response = Client().get("/test-dictionary/512x256/")
+
+        assert "X-Profile-Id" not in response
+        assert not RequestProfile.objects.exists()
+
+    def test_invalid_token(self, word):
+        response = Client().get("/test-dictionary/512x256/", {"_profile": "forged"})
+
+        assert response.status_code == 200
+        assert not RequestProfile.objects.exists()
+
+    def test_user_no_longer_staff(self, word, token, admin_user):
+        admin_user.is_staff = False
+        admin_user.save()
+
+        response = Client().get("/test-dictionary/512x256/", {"_profile": token})
+
+        assert "X-Profile-Id" not in response
+        assert not RequestProfile.objects.exists()
+
+    def test_user_deleted(self, word, token, admin_user):
+        admin_user.delete()
+
+        response = Client().get("/test-dictionary/512x256/", {"_profile": token})
+
+        assert "X-Profile-Id" not in response
+
+    def test_profiles_capped(self, word, token, monkeypatch):
+        monkeypatch.setattr(profiling, "MAX_PROFILES_PER_WINDOW", 2)
+
+        responses = [
+            Client().get("/test-dictionary/512x256/", {"_profile": token})
+            for _ in range(3)
+        ]
+
+        assert ["X-Profile-Id" in response for response in responses] == [
+            True,
+            True,
+            False,
+        ]
+        assert RequestProfile.objects.count() == 2
+
+    def test_profiler_already_active(self, word, token):
+        with patch("dailyword.profiling.cProfile.Profile") as profile_class:
+            profile_class.return_value.enable.side_effect = ValueError
+            response = Client().get("/test-dictionary/512x256/", {"_profile": token})
+
+        assert response.status_code == 200
+        assert not RequestProfile.objects.exists()
+
+
+class TestRequestProfileAdmin:
+    @pytest.fixture
+    def profile(self, word, token):
+        Client().get("/test-dictionary/512x256/", {"_profile": token})
+        return RequestProfile.objects.get()
+
+    def test_token_page(self, admin_client):
+        response = admin_client.get("/admin/dailyword/requestprofile/token/")
+
+        assert response.status_code == 200
+        assert profiling.check_token(response.context["token"]) == "admin"
+
+    def test_list_page(self, admin_client, profile):
+        response = admin_client.get("/admin/dailyword/requestprofile/")
+
+        assert response.status_code == 200
+        assert b"/admin/dailyword/requestprofile/token/" in response.content
+        assert b"/test-dictionary/512x256/" in response.content
+
+    def test_change_page_shows_top_functions(self, admin_client, profile):
+        response = admin_client.get(
+            f"/admin/dailyword/requestprofile/{profile.pk}/change/"
+        )
+
+        assert response.status_code == 200
+        assert b"cumtime" in response.content
+        assert b"generate_word_image" in response.content
+
+    def test_download(self, admin_client, profile, tmp_path):
+        response = admin_client.get(
+            f"/admin/dailyword/requestprofile/{profile.pk}/download/"
+        )
+
+        assert response["Content-Disposition"] == (
+            f'attachment; filename="profile-{profile.pk}.prof"'
+        )
+        path = tmp_path / "profile.prof"
+        path.write_bytes(response.content)
+        assert pstats.Stats(str(path)).total_tt > 0
@@ -0,0 +1,125 @@
+import logging
+
+import pytest
+from django.core.exceptions import MiddlewareNotUsed
+from django.test import RequestFactory
+
+from dailyword.middleware import QueryBudgetMiddleware
+from dailyword.models import Dictionary, Word
+from dailyword.query_budget import count_queries
+
+DICTIONARIES = 30
+WORDS_PER_DICTIONARY = 10
+# Numbers of dictionaries the budgets are checked with: an N+1 query makes the counts differ
+SIZES = (3, DICTIONARIES)
+
+
+def _add_dictionaries(total: int) -> None:
+    """Add dictionaries of WORDS_PER_DICTIONARY words, up to `total`."""
+    dictionaries = Dictionary.objects.bulk_create(
+        Dictionary(name=f"Dictionary {i}", slug=f"dictionary-{i}", prompt="test")
+        for i in range(Dictionary.objects.count(), total)
+    )
+    Word.objects.bulk_create(
+        Word(
+            dictionary=dictionary,
+            word=f"word{i}",
+            definition=f"Definition {i}",
+            part_of_speech="noun" if i % 2 else "verb",
+        )
+        for dictionary in dictionaries
+        for i in range(WORDS_PER_DICTIONARY)
+    )
+
+
+@pytest.fixture
+def dictionaries(db):
+    _add_dictionaries(DICTIONARIES)
+    return list(Dictionary.objects.all())
+
+
+class TestBudgets:
+    def test_image_view(self, client, db, query_budget):
+        counts = []
+        for size in SIZES:
+            _add_dictionaries(size)
+
+            # A dictionary not requested yet, not to hit the cache
+            with query_budget("dailyword:day-image") as queries:
+                response = client.get(f"/dictionary-{size - 1}/512x256/")
+
+            assert response.status_code == 200
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+
+    @pytest.mark.parametrize(
+        ("view_name", "path"),
+        [
+            ("admin:dailyword_dictionary_changelist", "/admin/dailyword/dictionary/"),
+            ("admin:dailyword_word_changelist", "/admin/dailyword/word/"),
+        ],
+    )
+    def test_admin_changelist(self, admin_client, query_budget, view_name, path):
+        counts = []
+        for size in SIZES:
+            _add_dictionaries(size)
+            admin_client.get(path)
+
+            with query_budget(view_name) as queries:
+                response = admin_client.get(path)
+
+            assert response.status_code == 200
+            counts.append(len(queries))
+
+        assert counts[0] == counts[1]
+
+
+class TestCountQueries:
+    def test_ignores_transaction_control(self, dictionaries):
+        with count_queries() as queries:
+            Dictionary.objects.count()
+            Word.objects.count()
+
+        assert queries.count == 2
+
+
+class TestQueryBudgetMiddleware:
+    @pytest.fixture
+    def middleware(self, settings):
+        settings.DEBUG = True
+
+        def get_response(request):
+            request.resolver_match = type(
+                "Match", (), {"view_name": "dailyword:day-image"}
+            )()
+            for _ in range(request.query_count):
+                Dictionary.objects.count()
+            return "response"
+
+        return QueryBudgetMiddleware(get_response)
+
+    def test_warns_over_budget(self, db, middleware, caplog):
+        request = RequestFactory().get("/dictionary-0/512x256/")
+        request.query_count = 4
+
+        with caplog.at_level(logging.WARNING, logger="dailyword.middleware"):
+            assert middleware(request) == "response"
+
+        assert caplog.messages == [
+            "/dictionary-0/512x256/ ran 4 queries, over the budget of 3 for dailyword:day-image"
+        ]
+
+    def test_silent_within_budget(self, db, middleware, caplog):
+        request = RequestFactory().get("/dictionary-0/512x256/")
+        request.query_count = 3
+
+        with caplog.at_level(logging.WARNING, logger="dailyword.middleware"):
+            middleware(request)
+
+        assert not caplog.records
+
+    def test_disabled_without_debug(self, settings):
+        settings.DEBUG = False
+        with pytest.raises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(lambda request: None)
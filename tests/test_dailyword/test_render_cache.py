@@ -0,0 +1,192 @@
+import os
+import pickle
+import time
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+
+from dailyword import caching, metrics, render_cache
+from dailyword.render_cache import FileTier, Image, MemoryTier
+
+
+@pytest.fixture(autouse=True)
+def empty_metrics():
+    metrics._reset_after_fork()
+    yield
+    metrics._reset_after_fork()
+
+
+@pytest.fixture
+def render_cache_dir(settings, tmp_path):
+    settings.RENDER_CACHE_DIR = tmp_path / "render_cache"
+    return settings.RENDER_CACHE_DIR
+
+
+def _requests(tier: str, result: str) -> float:
+    return metrics._values.get(
+        metrics._key(
+            "dailyword_render_cache_requests_total", {"tier": tier, "result": result}
+        ),
+        0,
+    )
+
+
+class TestMemoryTier:
+    def test_evicts_least_recently_used(self):
+        tier = MemoryTier(max_bytes=10)
+        tier.set_many({"a": b"1234", "b": b"1234"})
+        tier.get_many(["a"])
+        tier.set_many({"c": b"1234"})
+
+        assert tier.get_many(["a", "b", "c"]) == {"a": b"1234", "c": b"1234"}
+        assert tier.size == 8
+
+    def test_replaces(self):
+        tier = MemoryTier(max_bytes=10)
+        tier.set_many({"a": b"1234"})
+        tier.set_many({"a": b"12"})
+
+        assert tier.size == 2
+
+    def test_skips_too_big(self):
+        tier = MemoryTier(max_bytes=10)
+        tier.set_many({"a": b"1234", "big": b"12345678901"})
+
+        assert tier.get_many(["a", "big"]) == {"a": b"1234"}
+
+
+class TestImage:
+    def test_etag_from_content(self):
+        assert Image(b"a").etag == Image(b"a").etag
+        assert Image(b"a").etag != Image(b"b").etag
+        assert Image(b"a").etag.startswith('"')
+
+    def test_pickled_with_etag(self):
+        image = Image(b"image")
+
+        with patch("dailyword.render_cache.hashlib.blake2b") as mock_hash:
+            loaded = pickle.loads(pickle.dumps(image))
+
+        mock_hash.assert_not_called()
+        assert loaded == b"image"
+        assert loaded.etag == image.etag
+
+
+class TestFileTier:
+    def test_shared_between_instances(self, tmp_path):
+        image = Image(b"image")
+        FileTier(tmp_path).set_many({"a": image})
+
+        found = FileTier(tmp_path).get_many(["a", "b"])
+
+        assert found == {"a": b"image"}
+        assert found["a"].etag == image.etag
+
+    def test_ignores_files_without_etag(self, tmp_path):
+        tier = FileTier(tmp_path)
+        tier.write(tier._path("a"), b"\x89PNG\r\n")
+
+        assert tier.get_many(["a"]) == {}
+
+    def test_expires(self, tmp_path):
+        tier = FileTier(tmp_path)
+        tier.set_many({"a": Image(b"image")})
+        (path,) = tmp_path.glob("??/*")
+        expired = time.time() - render_cache.TIMEOUT - 1
+        os.utime(path, (expired, expired))
+
+        assert tier.get_many(["a"]) == {}
+        tier.prune()
+        assert not path.exists()
+
+
+class TestTiers:
+    def test_memory_only(self):
+        render_cache.set_many({"a": b"image"})
+
+        assert render_cache.get("a") == b"image"
+        assert render_cache.get("b") is None
+        assert _requests("memory", "hit") == 1
+        assert _requests("memory", "miss") == 1
+
+    def test_file_fills_memory(self, render_cache_dir):
+        render_cache.set_many({"a": Image(b"image")})
+        render_cache._tiers()[0].clear()
+
+        assert render_cache.get("a") == b"image"
+        assert render_cache.get("a") == b"image"
+        assert _requests("memory", "miss") == 1
+        assert _requests("file", "hit") == 1
+        assert _requests("memory", "hit") == 1
+
+    def test_shared_django_cache(self, settings):
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+        }
+
+        assert [tier.name for tier in render_cache._tiers()] == ["memory", "django"]
+
+    def test_memory_metric(self):
+        render_cache.set_many({"a": b"image"})
+
+        assert "dailyword_render_cache_memory_bytes 5" in metrics.export()
+
+
+class TestVersion:
+    def test_in_file(self, render_cache_dir):
+        version = render_cache.version()
+        assert (render_cache_dir / "version").read_text() == version
+
+        render_cache.new_version()
+        assert render_cache.version() != version
+
+    def test_in_version_dir_with_local_memory_cache(self):
+        version = render_cache.version()
+        assert (render_cache.VERSION_DIR / "version").read_text() == version
+
+        render_cache.new_version()
+        # Like another worker, with its own local memory cache
+        cache.clear()
+        assert render_cache.version() != version
+
+    def test_in_shared_django_cache(self, settings):
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+        }
+
+        render_cache.version()
+
+        assert not (render_cache.VERSION_DIR / "version").exists()
+
+    def test_shared_django_cache_over_render_cache_dir(
+        self, settings, render_cache_dir, tmp_path
+    ):
+        settings.CACHES = {
+            "default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": tmp_path / "shared_cache",
+            }
+        }
+
+        version = render_cache.version()
+
+        assert cache.get(render_cache.VERSION_KEY) == version
+        assert not (render_cache_dir / "version").exists()
+
+
+class TestImagesAcrossProcesses:
+    def test_rendered_once_per_host(self, render_cache_dir, word):
+        today = date(2024, 1, 2)
+        with patch(
+            "dailyword.caching.generate_word_image", return_value=b"image"
+        ) as mock_render:
+            caching.get_word_image("test-dictionary", today, 512, 256)
+            # Like another worker, with an empty memory
+            render_cache._tiers.cache_clear()
+            assert caching.get_word_image("test-dictionary", today, 512, 256) == (
+                b"image"
+            )
+
+        mock_render.assert_called_once()
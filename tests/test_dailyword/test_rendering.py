@@ -1,10 +1,15 @@
 import io
+from unittest.mock import patch
 
 import pytest
 from PIL import Image
 
 from dailyword.models import Dictionary, Word
-from dailyword.rendering import generate_error_image, generate_word_image
+from dailyword.rendering import (
+    cached_error_image,
+    generate_error_image,
+    generate_word_image,
+)
 
 
 @pytest.fixture
@@ -116,6 +121,23 @@ class TestGenerateWordImage:
         assert image_data == snapshot_png
 
 
+class TestCachedErrorImage:
+    def test_same_as_generated(self):
+        assert cached_error_image("Test error", 800, 600) == generate_error_image(
+            "Test error", 800, 600
+        )
+
+    def test_rendered_once(self):
+        with patch(
+            "dailyword.rendering.generate_error_image", return_value=b"image"
+        ) as mock_render:
+            cached_error_image("Test error", 800, 600)
+            cached_error_image("Test error", 800, 600)
+            cached_error_image("Test error", 960, 540)
+
+        assert mock_render.call_count == 2
+
+
 class TestGenerateErrorImage:
     def test_generates_image_800x600(self, snapshot_png):
         image_data = generate_error_image("Test error", 800, 600)
@@ -0,0 +1,36 @@
+import pytest
+
+from dailyword.rotation import permute, unpermute
+
+
+class TestPermutation:
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 16, 100, 1000, 1025])
+    def test_bijective(self, size):
+        images = [permute(value, size, b"key") for value in range(size)]
+
+        assert sorted(images) == list(range(size))
+        assert [unpermute(image, size, b"key") for image in images] == list(range(size))
+
+    def test_depends_on_key(self):
+        assert [permute(value, 100, b"key") for value in range(100)] != [
+            permute(value, 100, b"other key") for value in range(100)
+        ]
+
+    def test_shuffles(self):
+        images = [permute(value, 100, b"key") for value in range(100)]
+
+        assert images != list(range(100))
+
+    def test_large_size(self):
+        size = 10**9 + 7
+        image = permute(123_456_789, size, b"key")
+
+        assert 0 <= image < size
+        assert unpermute(image, size, b"key") == 123_456_789
+
+    @pytest.mark.parametrize("value", [-1, 10])
+    def test_out_of_range(self, value):
+        with pytest.raises(ValueError, match="out of"):
+            permute(value, 10, b"key")
+        with pytest.raises(ValueError, match="out of"):
+            unpermute(value, 10, b"key")
@@ -3,6 +3,7 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
+from dailyword import metrics
 from dailyword.services.openrouter import (
     OpenRouterError,
     OpenRouterService,
@@ -48,6 +49,43 @@ class TestOpenRouterServiceMakeRequest:
             },
         )
 
+    def test_make_request_counts_tokens(self, service):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"usage": {"total_tokens": 42}}
+
+        with patch("dailyword.services.openrouter.requests.post") as mock_post:
+            mock_post.return_value = mock_response
+            service._make_request({"test": "data"})
+            service._make_request({"test": "data"})
+
+        assert service.total_tokens == 84
+
+    def test_make_request_without_usage(self, service):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"usage": None}
+
+        with patch("dailyword.services.openrouter.requests.post") as mock_post:
+            mock_post.return_value = mock_response
+            service._make_request({"test": "data"})
+
+        assert service.total_tokens == 0
+
+    def test_make_request_metrics(self, service):
+        metrics._reset_after_fork()
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {"usage": {"total_tokens": 42}}
+
+        with patch("dailyword.services.openrouter.requests.post") as mock_post:
+            mock_post.return_value = mock_response
+            service._make_request({"test": "data"})
+
+        exported = metrics.export()
+        assert "dailyword_openrouter_tokens_total 42" in exported
+        assert 'dailyword_openrouter_request_seconds_count{status="200"} 1' in exported
+
     def test_make_request_error(self, service):
         mock_response = MagicMock()
         mock_response.status_code = 400
@@ -0,0 +1,263 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.db import OperationalError
+from django.test import Client
+
+from dailyword import caching, snapshots
+from dailyword.models import Dictionary, Word
+from dailyword.query_budget import count_queries
+
+DATES = [date(2024, 1, 1) + timedelta(days=i) for i in range(40)]
+
+
+@pytest.fixture
+def words(dictionary):
+    return Word.objects.bulk_create(
+        Word(
+            dictionary=dictionary,
+            word=f"Wört{i}",
+            definition=f"Definition {i} — ✓",
+            example_sentence=f"Example {i}" if i % 2 else "",
+            pronunciation=f"/vœrt{i}/",
+            part_of_speech="noun",
+        )
+        for i in range(25)
+    )
+
+
+def _fields(word: Word | None) -> tuple | None:
+    if word is None:
+        return None
+    return (
+        word.pk,
+        word.dictionary_id,
+        *(getattr(word, field) for field in snapshots.FIELDS),
+    )
+
+
+class TestSnapshot:
+    @pytest.mark.parametrize("selection", Dictionary.Selection.values)
+    def test_same_words_as_database(self, snapshots_dir, dictionary, words, selection):
+        dictionary.selection = selection
+        dictionary.save()
+        snapshots.compile_dictionary(dictionary)
+
+        snapshot = snapshots.load("test-dictionary")
+        from_database = dictionary.get_words_for_dates(DATES)
+        from_snapshot = snapshot.get_words_for_dates(DATES)
+
+        assert snapshot.word_count == len(words)
+        assert {d: _fields(w) for d, w in from_snapshot.items()} == {
+            d: _fields(w) for d, w in from_database.items()
+        }
+
+    def test_empty_dictionary(self, snapshots_dir, dictionary):
+        snapshots.compile_dictionary(dictionary)
+
+        snapshot = snapshots.load("test-dictionary")
+        assert snapshot.get_words_for_dates(DATES[:2]) == dict.fromkeys(DATES[:2])
+
+    def test_not_compiled(self, snapshots_dir, dictionary):
+        assert snapshots.load("test-dictionary") is None
+
+    def test_disabled(self, dictionary):
+        assert snapshots.load("test-dictionary") is None
+
+    def test_invalid_file(self, snapshots_dir):
+        snapshots_dir.mkdir()
+        (snapshots_dir / "invalid.words").write_bytes(b"x" * 100)
+
+        assert snapshots.load("invalid") is None
+
+    def test_truncated_header(self, snapshots_dir):
+        snapshots_dir.mkdir()
+        (snapshots_dir / "truncated.words").write_bytes(snapshots.MAGIC + b"\x01")
+
+        assert snapshots.load("truncated") is None
+
+    def test_truncated_words(self, snapshots_dir, dictionary, words):
+        snapshots.compile_dictionary(dictionary)
+        path = snapshots_dir / "test-dictionary.words"
+        path.write_bytes(path.read_bytes()[:-10])
+
+        assert snapshots.load("test-dictionary") is None
+
+    def test_corrupted_words(self, snapshots_dir, dictionary, words):
+        snapshots.compile_dictionary(dictionary)
+        path = snapshots_dir / "test-dictionary.words"
+        content = bytearray(path.read_bytes())
+        content[-1] ^= 0xFF
+        path.write_bytes(bytes(content))
+
+        assert snapshots.load("test-dictionary") is None
+
+    def test_unchanged(self, snapshots_dir, dictionary, words):
+        assert snapshots.compile_dictionary(dictionary)
+        mtime = (snapshots_dir / "test-dictionary.words").stat().st_mtime_ns
+
+        assert not snapshots.compile_dictionary(dictionary)
+        assert (snapshots_dir / "test-dictionary.words").stat().st_mtime_ns == mtime
+
+    def test_reloaded_when_replaced(self, snapshots_dir, dictionary, words):
+        snapshots.compile_dictionary(dictionary)
+        before = snapshots.load("test-dictionary")
+        Word.objects.filter(pk=words[0].pk).update(word="Changed")
+        snapshots.compile_dictionary(dictionary)
+
+        after = snapshots.load("test-dictionary")
+        assert after.word(0).word == "Changed"
+        # Still readable by whoever holds it
+        assert before.word(0).word == words[0].word
+
+
+class TestRecompile:
+    def test_on_word_change(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        snapshots.compile_dictionary(dictionary)
+        with django_capture_on_commit_callbacks(execute=True):
+            words[0].word = "Changed"
+            words[0].save()
+            Word.objects.create(dictionary=dictionary, word="New", definition="New")
+
+        snapshot = snapshots.load("test-dictionary")
+        assert snapshot.word_count == len(words) + 1
+        assert snapshot.word(0).word == "Changed"
+
+    def test_compiled_once_per_transaction(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        with (
+            patch(
+                "dailyword.snapshots.compile_dictionary", return_value=True
+            ) as mock_compile,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            for word in words:
+                word.save()
+
+        mock_compile.assert_called_once()
+
+    def test_debounced_in_background(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        with (
+            patch("dailyword.snapshots._compiler") as compiler,
+            patch(
+                "dailyword.snapshots.compile_dictionary", return_value=True
+            ) as mock_compile,
+        ):
+            # Committed while the first compile is still queued
+            for word in words[:2]:
+                with django_capture_on_commit_callbacks(execute=True):
+                    word.save()
+            mock_compile.assert_not_called()
+            compiler.submit.assert_called_once()
+
+            compiler.submit.call_args.args[0]()
+
+        mock_compile.assert_called_once()
+        assert not snapshots._pending
+
+    def test_not_on_rollback(self, snapshots_dir, dictionary, words):
+        with patch("dailyword.snapshots.compile_dictionary") as mock_compile:
+            words[0].save()
+
+        mock_compile.assert_not_called()
+        assert snapshots._pending == {dictionary.pk}
+
+    def test_renamed_dictionary(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        snapshots.compile_dictionary(dictionary)
+        with django_capture_on_commit_callbacks(execute=True):
+            dictionary.slug = "renamed"
+            dictionary.save()
+
+        assert snapshots.load("test-dictionary") is None
+        assert snapshots.load("renamed").word_count == len(words)
+
+    def test_deleted_dictionary(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        snapshots.compile_dictionary(dictionary)
+        with django_capture_on_commit_callbacks(execute=True):
+            dictionary.delete()
+
+        assert not (snapshots_dir / "test-dictionary.words").exists()
+
+    def test_invalidates_cache(
+        self, snapshots_dir, dictionary, words, django_capture_on_commit_callbacks
+    ):
+        snapshots.compile_dictionary(dictionary)
+        with (
+            patch("dailyword.caching.invalidate") as mock_invalidate,
+            django_capture_on_commit_callbacks(execute=True),
+        ):
+            Word.objects.create(dictionary=dictionary, word="New", definition="New")
+
+        assert mock_invalidate.called
+
+    def test_disabled(self, dictionary, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            Word.objects.create(dictionary=dictionary, word="New", definition="New")
+
+        assert snapshots._queue_compile not in callbacks
+
+
+class TestImageView:
+    def test_without_database(self, snapshots_dir, dictionary, words):
+        snapshots.compile_dictionary(dictionary)
+        cache.clear()
+
+        with count_queries() as queries:
+            response = Client().get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/png"
+        assert queries.count == 0
+
+    def test_database_locked(self, snapshots_dir, dictionary, words):
+        snapshots.compile_dictionary(dictionary)
+        cache.clear()
+
+        with patch(
+            "django.db.backends.utils.CursorWrapper.execute",
+            side_effect=OperationalError("database is locked"),
+        ):
+            response = Client().get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/png"
+
+    def test_same_words_as_database(self, snapshots_dir, dictionary, words):
+        today = date.today()
+        from_database = caching.get_daily_words("test-dictionary", today)
+        snapshots.compile_dictionary(dictionary)
+        cache.clear()
+
+        from_snapshot = caching.get_daily_words("test-dictionary", today)
+        assert _fields(from_snapshot.word) == _fields(from_database.word)
+        assert _fields(from_snapshot.yesterday_word) == _fields(
+            from_database.yesterday_word
+        )
+
+    def test_falls_back_to_database(self, snapshots_dir, dictionary, words):
+        response = Client().get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/png"
+
+    def test_falls_back_to_database_with_truncated_snapshot(
+        self, snapshots_dir, dictionary, words
+    ):
+        snapshots_dir.mkdir()
+        (snapshots_dir / "test-dictionary.words").write_bytes(snapshots.MAGIC)
+
+        response = Client().get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response["Content-Type"] == "image/png"
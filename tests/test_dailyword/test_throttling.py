@@ -0,0 +1,128 @@
+from unittest.mock import patch
+
+import pytest
+from django.test import Client, RequestFactory
+
+from dailyword import throttling
+
+# Start of a window
+NOW = 1_700_000_040.0
+
+
+@pytest.fixture(autouse=True)
+def rate_limit(settings):
+    settings.IMAGE_RATE_LIMIT_PER_MINUTE = 3
+
+
+def _consume_at(timestamp: float, client: str = "client") -> int | None:
+    with patch("dailyword.throttling.time.time", return_value=timestamp):
+        return throttling.consume(client)
+
+
+class TestConsume:
+    def test_limit(self):
+        assert [_consume_at(NOW) for _ in range(4)] == [None, None, None, 60]
+
+    def test_by_client(self):
+        for _ in range(3):
+            _consume_at(NOW, "first")
+
+        assert _consume_at(NOW, "second") is None
+
+    def test_refilled(self):
+        for _ in range(3):
+            _consume_at(NOW)
+
+        # Two thirds of the previous window still count: 2 requests
+        assert _consume_at(NOW + 80) is None
+        assert _consume_at(NOW + 80) == 1
+        # Then half of it
+        assert _consume_at(NOW + 90) is None
+        assert _consume_at(NOW + 90) == 10
+
+    def test_rejected_requests_not_counted(self):
+        for _ in range(10):
+            _consume_at(NOW)
+
+        assert _consume_at(NOW + 120) is None
+
+    def test_disabled(self, settings):
+        settings.IMAGE_RATE_LIMIT_PER_MINUTE = 0
+
+        assert all(_consume_at(NOW) is None for _ in range(10))
+
+
+class TestClientKey:
+    def test_device_token(self):
+        token = throttling.make_device_token("kitchen")
+        request = RequestFactory().get("/", headers={"x-device-token": token})
+        other_request = RequestFactory().get(
+            "/", headers={"x-device-token": token}, REMOTE_ADDR="10.0.0.2"
+        )
+
+        assert throttling.client_key(request) == throttling.client_key(other_request)
+
+    def test_unsigned_device_token_ignored(self):
+        request = RequestFactory().get(
+            "/", headers={"x-device-token": "kitchen"}, REMOTE_ADDR="10.0.0.1"
+        )
+        other_request = RequestFactory().get(
+            "/", headers={"x-device-token": "bedroom"}, REMOTE_ADDR="10.0.0.1"
+        )
+
+        assert throttling.client_key(request) == throttling.client_key(other_request)
+
+    def test_ip_address(self):
+        request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.1")
+        other_request = RequestFactory().get("/", REMOTE_ADDR="10.0.0.2")
+
+        assert throttling.client_key(request) != throttling.client_key(other_request)
+
+
+class TestClientAddress:
+    def test_forwarded_ignored_from_untrusted_address(self):
+        request = RequestFactory().get(
+            "/", REMOTE_ADDR="10.0.0.1", headers={"x-forwarded-for": "192.0.2.1"}
+        )
+
+        assert throttling.client_address(request) == "10.0.0.1"
+
+    def test_forwarded_by_trusted_proxies(self, settings):
+        settings.TRUSTED_PROXIES = ["10.0.0.1", "10.0.0.2"]
+        request = RequestFactory().get(
+            "/",
+            REMOTE_ADDR="10.0.0.1",
+            # The first address is made up by the client
+            headers={"x-forwarded-for": "198.51.100.1, 192.0.2.1, 10.0.0.2"},
+        )
+
+        assert throttling.client_address(request) == "192.0.2.1"
+
+
+class TestImageView:
+    def test_too_many_requests(self, db):
+        client = Client()
+        for _ in range(3):
+            client.get("/test-dictionary/512x256/")
+
+        response = client.get("/test-dictionary/512x256/")
+
+        assert response.status_code == 429
+        assert int(response["Retry-After"]) > 0
+
+    def test_cached_image_over_limit(self, word):
+        client = Client()
+        images = [client.get("/test-dictionary/512x256/").content for _ in range(3)]
+
+        response = client.get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response.content == images[0]
+        assert "Retry-After" in response
+
+    def test_overloaded(self, word):
+        with patch("dailyword.caching.render_queue_depth", return_value=8):
+            response = Client().get("/test-dictionary/512x256/")
+
+        assert response.status_code == 503
+        assert response["Retry-After"] == "5"
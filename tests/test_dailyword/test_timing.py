@@ -0,0 +1,104 @@
+import logging
+from datetime import date
+from unittest.mock import patch
+
+import pytest
+from django.test import Client
+
+from dailyword.timing import recording, server_timing_header, timed
+
+
+def _phases(header: str) -> list[str]:
+    return [entry.split(";")[0] for entry in header.split(", ")]
+
+
+class TestTimed:
+    def test_accumulates_phases(self):
+        with recording() as timings:
+            with timed("a"):
+                pass
+            with timed("b"):
+                pass
+            with timed("a"):
+                pass
+
+        assert list(timings) == ["a", "b"]
+        assert all(duration >= 0 for duration in timings.values())
+
+    def test_records_on_exception(self):
+        with recording() as timings, pytest.raises(ValueError), timed("a"):
+            raise ValueError
+
+        assert "a" in timings
+
+    def test_noop_without_recording(self):
+        with recording() as timings:
+            pass
+        with timed("a"):
+            pass
+
+        assert timings == {}
+
+    def test_header(self):
+        assert (
+            server_timing_header({"word": 1.234, "total": 10})
+            == "word;dur=1.23, total;dur=10.00"
+        )
+
+
+class TestServerTimingMiddleware:
+    def test_image_phases(self, word):
+        with patch("dailyword.views.date") as mock_date:
+            mock_date.today.return_value = date(2024, 1, 1)
+            response = Client().get("/test-dictionary/512x256/")
+
+        assert _phases(response["Server-Timing"]) == [
+            "cache",
+            "dictionary",
+            "word",
+            "layout",
+            "rasterize",
+            "encode",
+            "total",
+        ]
+
+    def test_error_image_phases(self, db):
+        response = Client().get("/missing/512x256/")
+
+        assert _phases(response["Server-Timing"]) == [
+            "cache",
+            "dictionary",
+            "layout",
+            "rasterize",
+            "encode",
+            "total",
+        ]
+
+    def test_cached_error_image_phases(self, db):
+        Client().get("/missing/512x256/")
+        response = Client().get("/missing/512x256/")
+
+        assert _phases(response["Server-Timing"]) == ["cache", "total"]
+
+    def test_cached_image_phases(self, word):
+        Client().get("/test-dictionary/512x256/")
+        response = Client().get("/test-dictionary/512x256/")
+
+        assert _phases(response["Server-Timing"]) == ["cache", "total"]
+
+    def test_logs_structured_fields(self, word, caplog):
+        with caplog.at_level(logging.INFO, logger="dailyword.timing"):
+            Client().get("/test-dictionary/512x256/")
+
+        (record,) = caplog.records
+        assert record.path == "/test-dictionary/512x256/"
+        assert record.status == 200
+        assert set(record.timings) >= {"dictionary", "word", "encode", "total"}
+        assert "rasterize=" in record.getMessage()
+
+    def test_ignores_uninstrumented_views(self, db, caplog):
+        with caplog.at_level(logging.INFO, logger="dailyword.timing"):
+            response = Client().get("/")
+
+        assert "Server-Timing" not in response
+        assert not caplog.records
@@ -6,6 +6,7 @@ import pytest
 from django.test import Client
 from PIL import Image
 
+from dailyword import render_cache
 from dailyword.models import Dictionary, Word
 from dailyword.views import PngResponse
 
@@ -42,6 +43,12 @@ class TestPngResponse:
         response = PngResponse(b"test content")
         assert response["Content-Type"] == "image/png"
 
+    def test_etag_of_rendered_image(self):
+        image = render_cache.Image(b"test content")
+
+        assert PngResponse(image)["ETag"] == image.etag
+        assert not PngResponse(b"test content").has_header("ETag")
+
     def test_content_length_matches_actual_content(self):
         content = b"x" * 1000
         response = PngResponse(content)
@@ -62,6 +69,57 @@ class TestDailyWordImageView:
         img = Image.open(io.BytesIO(response.content))
         assert img.format == "PNG"
 
+    def test_cache_headers(self, client, word):
+        response = client.get("/test-dictionary/512x256/")
+
+        cache_control = response["Cache-Control"]
+        assert "max-age=" in cache_control
+        assert "stale-if-error=3600" in cache_control
+
+    def test_stale_image_not_cached(self, client, word):
+        client.get("/test-dictionary/512x256/")
+        word.definition = "Changed"
+        word.save()
+
+        response = client.get("/test-dictionary/512x256/")
+
+        assert response.status_code == 200
+        assert response["Cache-Control"] == "no-cache"
+
+    def test_not_modified(self, client, word):
+        response = client.get("/test-dictionary/512x256/")
+
+        revalidated = client.get(
+            "/test-dictionary/512x256/", headers={"if-none-match": response["ETag"]}
+        )
+
+        assert revalidated.status_code == 304
+        assert revalidated.content == b""
+        assert revalidated["Cache-Control"] == response["Cache-Control"]
+
+    def test_modified(self, client, word):
+        response = client.get("/test-dictionary/512x256/")
+        word.definition = "Changed"
+        word.save()
+        # The stale image is served while the new one is rendered
+        client.get("/test-dictionary/512x256/")
+
+        revalidated = client.get(
+            "/test-dictionary/512x256/", headers={"if-none-match": response["ETag"]}
+        )
+
+        assert revalidated.status_code == 200
+        assert revalidated["ETag"] != response["ETag"]
+
+    def test_etag_not_hashed_on_cache_hit(self, client, word):
+        response = client.get("/test-dictionary/512x256/")
+
+        with patch("dailyword.render_cache.hashlib.blake2b") as mock_hash:
+            cached = client.get("/test-dictionary/512x256/")
+
+        mock_hash.assert_not_called()
+        assert cached["ETag"] == response["ETag"]
+
     def test_returns_grayscale_image(self, client, word):
         with patch("dailyword.views.date") as mock_date:
             mock_date.today.return_value = date(2024, 1, 1)
@@ -106,6 +164,23 @@ class TestDailyWordImageView:
         assert img.format == "PNG"
         assert img.mode == "L"
 
+    def test_dictionary_not_found_cached(self, client, db, django_assert_num_queries):
+        first = client.get("/nonexistent/512x256/")
+
+        with django_assert_num_queries(0):
+            assert client.get("/nonexistent/512x256/").content == first.content
+
+    def test_dictionary_created_after_not_found(self, client, db):
+        client.get("/test-dictionary/512x256/")
+        dictionary = Dictionary.objects.create(
+            name="Test Dictionary", slug="test-dictionary", prompt="test prompt"
+        )
+        Word.objects.create(dictionary=dictionary, word="Ephemeral", definition="Short")
+
+        response = client.get("/test-dictionary/512x256/")
+
+        assert "max-age=" in response["Cache-Control"]
+
     def test_empty_dictionary(self, client, dictionary):
         response = client.get("/test-dictionary/512x256/")
 
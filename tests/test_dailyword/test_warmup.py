@@ -0,0 +1,92 @@
+from unittest.mock import patch
+
+import pytest
+from django.db import OperationalError, connection
+from django.test import Client
+
+from dailyword import warmup
+from dailyword.rendering import DICTIONARY_NOT_FOUND, NO_WORDS
+
+
+@pytest.fixture(autouse=True)
+def reset_warmup():
+    warmup._ready.clear()
+    yield
+    warmup._ready.clear()
+
+
+class TestWarmUp:
+    def test_renders_standard_sizes(self, word, settings):
+        settings.WARMUP_RENDER_IMAGES = True
+        with (
+            patch(
+                "dailyword.warmup.generate_word_image", return_value=b""
+            ) as mock_render,
+            patch(
+                "dailyword.caching.generate_word_image", return_value=b"image"
+            ) as mock_cached_render,
+        ):
+            warmup.warm_up()
+
+        rendered = [
+            (call.args[0].word, *call.args[1:3])
+            for call in mock_render.call_args_list + mock_cached_render.call_args_list
+        ]
+        for width, height in warmup.STANDARD_SIZES:
+            assert ("Warm-up", width, height) in rendered
+            assert ("Ephemeral", width, height) in rendered
+
+    def test_skips_todays_images_by_default(self, word):
+        with (
+            patch(
+                "dailyword.warmup.generate_word_image", return_value=b""
+            ) as mock_render,
+            patch("dailyword.caching.generate_word_image") as mock_cached_render,
+        ):
+            warmup.warm_up()
+
+        assert {call.args[0].word for call in mock_render.call_args_list} == {"Warm-up"}
+        mock_cached_render.assert_not_called()
+
+    def test_renders_error_images(self):
+        with patch("dailyword.warmup.cached_error_image") as mock_render:
+            warmup.warm_up_rendering()
+
+        rendered = {call.args for call in mock_render.call_args_list}
+        for width, height in warmup.STANDARD_SIZES:
+            assert (DICTIONARY_NOT_FOUND, width, height) in rendered
+            assert (NO_WORDS, width, height) in rendered
+
+    def test_runs_once(self, word, django_assert_num_queries):
+        warmup.warm_up()
+
+        with django_assert_num_queries(0):
+            warmup.warm_up()
+
+
+class TestReadinessView:
+    def test_ready(self, word):
+        response = Client().get("/ready/")
+
+        assert response.status_code == 200
+        assert warmup._ready.is_set()
+
+    def test_database_unavailable(self, db):
+        with patch(
+            "dailyword.warmup.Dictionary.objects.all",
+            side_effect=OperationalError("database is locked"),
+        ):
+            response = Client().get("/ready/")
+
+        assert response.status_code == 503
+        assert not warmup._ready.is_set()
+
+    def test_database_lost_after_warm_up(self, word):
+        Client().get("/ready/")
+
+        with patch.object(
+            connection, "cursor", side_effect=OperationalError("database is locked")
+        ):
+            response = Client().get("/ready/")
+
+        assert response.status_code == 503